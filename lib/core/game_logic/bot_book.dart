@@ -0,0 +1,82 @@
+// lib/core/game_logic/bot_book.dart
+import 'dart:convert';
+import 'dart:math';
+import 'package:flutter/foundation.dart';
+import 'package:flutter/services.dart' show rootBundle;
+
+/// Precomputed bot replies built by tools/build_bot_books.py.
+///
+/// Maps a hash of each covered position to weighted moves for one bot.
+/// '*' stands for "a uniformly random legal move" (the bot's blunder chance).
+class BotBook {
+  static const String assetPath = 'assets/data/bots/bot_books.json';
+  static const int version = 1;
+  static const String randomMove = '*';
+
+  static Future<Map<String, dynamic>?>? _data;
+
+  final Map<String, dynamic> _positions;
+  final Random _random;
+
+  BotBook._(this._positions, this._random);
+
+  /// The book for [botId], or null if there is no book asset or no entry for the bot
+  static Future<BotBook?> load(String botId, {Random? random}) async {
+    final data = await (_data ??= _loadData());
+    final bot = data?['bots']?[botId] as Map<String, dynamic>?;
+    if (bot == null) return null;
+    return BotBook._(bot['positions'] as Map<String, dynamic>, random ?? Random());
+  }
+
+  static Future<Map<String, dynamic>?> _loadData() async {
+    try {
+      final data = json.decode(await rootBundle.loadString(assetPath)) as Map<String, dynamic>;
+      if (data['version'] != version) {
+        if (kDebugMode) {
+          print('Ignoring bot book version ${data['version']} (expected $version)');
+        }
+        return null;
+      }
+      return data;
+    } catch (e) {
+      // No book built yet: every move comes from the engine
+      return null;
+    }
+  }
+
+  /// 64-bit FNV-1a of the FEN's placement, side to move and castling fields
+  static String positionHash(String fen) {
+    final key = fen.split(' ').take(3).join(' ');
+    var hash = 0xcbf29ce484222325;
+    for (final byte in utf8.encode(key)) {
+      hash ^= byte;
+      hash *= 0x100000001b3;
+    }
+    return (hash >>> 32).toRadixString(16).padLeft(8, '0') +
+        (hash & 0xffffffff).toRadixString(16).padLeft(8, '0');
+  }
+
+  /// A book move for [fen] (UCI, or SAN from [legalMoves] for a random move),
+  /// or null if the position isn't covered.
+  ///
+  /// The hash leaves out the en passant square, so a book move can belong to
+  /// a same-looking position where it is illegal; a UCI move [isLegal] rejects
+  /// gives null too, and the engine decides instead.
+  String? pick(String fen, List<String> legalMoves, bool Function(String uci) isLegal) {
+    final entry = _positions[positionHash(fen)] as List<dynamic>?;
+    if (entry == null || legalMoves.isEmpty) return null;
+
+    final total = entry.fold<int>(0, (sum, move) => sum + (move[1] as int));
+    if (total <= 0) return null;
+    var roll = _random.nextInt(total);
+    for (final move in entry) {
+      roll -= move[1] as int;
+      if (roll < 0) {
+        final uci = move[0] as String;
+        if (uci == randomMove) return legalMoves[_random.nextInt(legalMoves.length)];
+        return isLegal(uci) ? uci : null;
+      }
+    }
+    return null;
+  }
+}
@@ -92,6 +92,18 @@ class ChessBoardState extends ChangeNotifier {
     final moves = _chess.moves({'square': square});
     return List<String>.from(moves);
   }
+
+  /// Whether a UCI move (e.g. "e2e4", "e7e8q") is legal in the current position
+  bool isLegalUciMove(String uciMove) {
+    if (uciMove.length < 4) return false;
+
+    final from = uciMove.substring(0, 2);
+    final to = uciMove.substring(2, 4);
+    final promotion = uciMove.length > 4 ? uciMove.substring(4, 5) : null;
+
+    final moves = _chess.moves({'square': from, 'verbose': true});
+    return moves.any((move) => move['to'] == to && move['promotion'] == promotion);
+  }
   
   // === UI STATE ===
   
@@ -3,6 +3,7 @@ import 'dart:async';
 import 'dart:math';
 import 'package:flutter/foundation.dart';
 import 'package:stockfish/stockfish.dart';
+import 'bot_book.dart';
 import 'chess_board_state.dart';
 import '../../data/models/bot.dart';
 import '../constants.dart';
@@ -15,9 +16,11 @@ class StockfishBot {
   final Random _random = Random();
   bool _initializationFailed = false;
   String? _lastError;
+  BotBook? _book;
 
   StockfishBot({required this.botConfig}) {
     _initializeStockfish();
+    BotBook.load(botConfig.id).then((book) => _book = book);
   }
 
   Future<void> _initializeStockfish() async {
@@ -105,6 +108,13 @@ class StockfishBot {
   String? get errorMessage => _lastError;
   
   Future<String?> getNextMove(ChessBoardState boardState) async {
+    // Positions in the precomputed book are a lookup, not a search
+    final bookMove = _book?.pick(boardState.fen, boardState.getLegalMoves(), boardState.isLegalUciMove);
+    if (bookMove != null) {
+      await Future.delayed(Duration(milliseconds: _getMoveTime()));
+      return bookMove;
+    }
+
     // If initialization failed, return null (caller should handle fallback)
     if (_initializationFailed || _stockfish == null) {
       if (kDebugMode) {
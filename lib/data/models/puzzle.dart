@@ -11,6 +11,7 @@ class Puzzle {
   final int difficulty;
   final List<String> solutionMoves; // For single-move puzzles
   final List<MoveSequence>? solutionSequence; // For multi-move puzzles
+  final Map<String, String?>? solutionTree; // Position after a winning user move -> opponent reply (null = solved)
   final List<String> hints;
   final String successMessage;
   final String failureMessage;
@@ -25,11 +26,31 @@ class Puzzle {
     required this.difficulty,
     required this.solutionMoves,
     this.solutionSequence,
+    this.solutionTree,
     required this.hints,
     required this.successMessage,
     required this.failureMessage,
   });
 
+  /// Whether every winning move was precomputed (tools/puzzle_reviewer/solution_tree.py)
+  bool get hasSolutionTree => solutionTree != null && solutionTree!.isNotEmpty;
+
+  /// Solution tree key for a FEN: piece placement and side to move
+  static String solutionTreeKey(String fen) {
+    final fields = fen.trim().split(' ');
+    return fields.length > 1 ? '${fields[0]} ${fields[1]}' : fields[0];
+  }
+
+  /// Check if the position the user's move reached is on a winning line
+  bool isWinningPosition(String fenAfterMove) {
+    return hasSolutionTree && solutionTree!.containsKey(solutionTreeKey(fenAfterMove));
+  }
+
+  /// Opponent's reply to a winning position, or null when the puzzle is solved
+  String? treeReplyFor(String fenAfterMove) {
+    return solutionTree?[solutionTreeKey(fenAfterMove)];
+  }
+
   /// Check if this is a multi-move puzzle
   bool get isMultiMove => solutionSequence != null && solutionSequence!.isNotEmpty;
   
@@ -133,6 +154,12 @@ class Puzzle {
           .map((item) => MoveSequence.fromJson(item))
           .toList();
     }
+
+    // Parse solution tree if present
+    Map<String, String?>? tree;
+    if (json['solutionTree'] != null) {
+      tree = Map<String, String?>.from(json['solutionTree'] as Map);
+    }
     
     return Puzzle(
       id: json['id'] as String,
@@ -144,6 +171,7 @@ class Puzzle {
       difficulty: json['difficulty'] as int,
       solutionMoves: List<String>.from(json['solutionMoves'] as List),
       solutionSequence: sequence,
+      solutionTree: tree,
       hints: List<String>.from(json['hints'] as List),
       successMessage: json['successMessage'] as String,
       failureMessage: json['failureMessage'] as String,
@@ -162,6 +190,7 @@ class Puzzle {
       'solutionMoves': solutionMoves,
       if (solutionSequence != null) 
         'solutionSequence': solutionSequence!.map((s) => s.toJson()).toList(),
+      if (solutionTree != null) 'solutionTree': solutionTree,
       'hints': hints,
       'successMessage': successMessage,
       'failureMessage': failureMessage,
@@ -155,8 +155,25 @@ class _PuzzlesPageState extends ConsumerState<PuzzlesPage> {
     if (_currentPuzzle != null) {
       bool isCorrect = false;
       
-      // Check if this is a multi-move puzzle
-      if (_currentPuzzle!.isMultiMove) {
+      // Precomputed solution tree: one lookup on the position the move reached
+      if (_currentPuzzle!.hasSolutionTree) {
+        final fenAfterMove = _boardState.fen;
+        isCorrect = _currentPuzzle!.isWinningPosition(fenAfterMove);
+        print('DEBUG PuzzlesPage: Solution tree - winning position? $isCorrect');
+
+        if (isCorrect) {
+          _currentStepIndex++;
+          final computerMove = _currentPuzzle!.treeReplyFor(fenAfterMove);
+          if (computerMove != null) {
+            print('DEBUG PuzzlesPage: Computer needs to respond with: $computerMove');
+            _makeComputerMove(computerMove);
+            return; // Don't complete puzzle yet
+          }
+          _handleCorrectMove();
+        } else {
+          _handleIncorrectMove();
+        }
+      } else if (_currentPuzzle!.isMultiMove) {
         // Debug the expected move at this step
         if (_currentPuzzle!.solutionSequence != null &&
             _currentStepIndex < _currentPuzzle!.solutionSequence!.length) {
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# tools/benchmarks/bench_pipeline.py
+"""
+Pipeline Throughput Benchmark
+-----------------------------
+Times every pipeline stage (see pipeline_stages.py) on synthetic
+Lichess-format databases and records peak RSS per stage. Save a run as
+a baseline and compare later runs against it to spot regressions.
+
+Usage:
+  python3 bench_pipeline.py                          # 10k rows
+  python3 bench_pipeline.py --rows 10k 1M 5M
+  python3 bench_pipeline.py --save baseline.json
+  python3 bench_pipeline.py --compare baseline.json  # exit 1 on regressions
+
+The same stages run under pytest-benchmark:
+  pytest test_pipeline_benchmarks.py --rows 1M
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from generate_puzzle_csv import SEED, ensure_csv, parse_rows
+from pipeline_stages import STAGES, PipelineData, measure
+
+# Slower or bigger than baseline by more than this factor counts as a regression
+REGRESSION_THRESHOLD = 1.25
+# Ignore timing and allocator noise below these
+MIN_SECONDS = 0.005
+MIN_RSS_GROWTH_MB = 32
+
+
+def run_benchmarks(row_counts, repeat=3, seed=SEED, stages=STAGES, on_result=None):
+    """{rows: {stage: measure() result}} for every row count"""
+    results = {}
+    for rows in row_counts:
+        data = PipelineData(ensure_csv(rows, seed))
+        results[str(rows)] = {}
+        for stage in stages:
+            result = measure(data, stage, repeat)
+            results[str(rows)][stage] = result
+            if on_result:
+                on_result(rows, stage, result)
+    return results
+
+
+def find_regressions(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """[(rows, stage, metric, baseline value, new value), ...] worse than `threshold`"""
+    regressions = []
+    for rows, stages in results.items():
+        for stage, result in stages.items():
+            before = baseline.get(rows, {}).get(stage)
+            if before is None:
+                continue
+            if result['seconds'] > MIN_SECONDS and result['seconds'] > before['seconds'] * threshold:
+                regressions.append((rows, stage, 'seconds', before['seconds'], result['seconds']))
+            growth = result['rss_growth_mb'] - before['rss_growth_mb']
+            if growth > MIN_RSS_GROWTH_MB and result['rss_growth_mb'] > before['rss_growth_mb'] * threshold:
+                regressions.append((rows, stage, 'rss_growth_mb', before['rss_growth_mb'], result['rss_growth_mb']))
+    return regressions
+
+
+def print_result(rows, stage, result):
+    print(f"   {rows:>9,}  {stage:<30} {result['seconds'] * 1000:10.1f} ms "
+          f"{result['items_per_second'] or 0:14,.0f} /s "
+          f"{result['peak_rss_mb']:14.1f} MB {result['rss_growth_mb']:+9.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the import -> review -> convert pipeline")
+    parser.add_argument('--rows', nargs='+', default=['10k'], help="database sizes, e.g. 10k 1M 5M (default: 10k)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per stage; the best is reported (default: 3)")
+    parser.add_argument('--seed', type=int, default=SEED, help=f"synthetic data seed (default: {SEED})")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES), help="stages to run")
+    parser.add_argument('--save', metavar='FILE', help="write results as JSON")
+    parser.add_argument('--compare', metavar='FILE', help="baseline JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help=f"regression factor (default: {REGRESSION_THRESHOLD})")
+    args = parser.parse_args()
+
+    row_counts = [parse_rows(rows) for rows in args.rows]
+    print(f"⏱️  Benchmarking {len(args.stages)} stages on {', '.join(f'{rows:,}' for rows in row_counts)} rows...")
+    print(f"   {'rows':>9}  {'stage':<30} {'best':>13} {'items/s':>17} {'peak RSS':>17} {'growth':>12}")
+    results = run_benchmarks(row_counts, args.repeat, args.seed, args.stages, on_result=print_result)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'python': platform.python_version(),
+                'machine': platform.platform(),
+                'seed': args.seed,
+                'results': results,
+            }, f, indent=2)
+        print(f"\n💾 Results saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} regressions vs {args.compare}:")
+            for rows, stage, metric, before, after in regressions:
+                ratio = f" ({after / before:.2f}x)" if before else ""
+                print(f"   {int(rows):>9,}  {stage:<30} {metric}: {before:.4g} -> {after:.4g}{ratio}")
+            sys.exit(1)
+        print(f"\n✅ No regressions vs {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+# tools/benchmarks/conftest.py
+"""pytest options for the pipeline benchmarks: --rows 10k 1M 5M"""
+
+import pytest
+
+from generate_puzzle_csv import ensure_csv, parse_rows
+from pipeline_stages import PipelineData
+
+
+def pytest_addoption(parser):
+    parser.addoption('--rows', nargs='+', default=['10k'],
+                     help="synthetic database sizes to benchmark, e.g. 10k 1M 5M (default: 10k)")
+
+
+def pytest_generate_tests(metafunc):
+    if 'rows' in metafunc.fixturenames:
+        row_counts = [parse_rows(rows) for rows in metafunc.config.getoption('rows')]
+        metafunc.parametrize('rows', row_counts, ids=[f"{rows}rows" for rows in row_counts], scope='session')
+
+
+_loaded = {}
+
+
+@pytest.fixture(scope='session')
+def pipeline_data(rows):
+    """PipelineData for the current row count, loaded once per session"""
+    if rows not in _loaded:
+        # One database in memory at a time keeps 5M-row runs within RAM
+        _loaded.clear()
+        _loaded[rows] = PipelineData(ensure_csv(rows))
+    return _loaded[rows]
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# tools/benchmarks/generate_puzzle_csv.py
+"""
+Synthetic Lichess Puzzle Database
+---------------------------------
+Writes a deterministic CSV in the lichess_db_puzzle.csv format (same
+columns, same value ranges) for benchmarking the import pipeline without
+the real 4M-row dump. The same seed and row count always give the same
+bytes.
+
+Rows draw their position from a pool of legal lines built with
+python-chess:
+
+  mate lines    back-rank mate-in-1 patterns at random files and
+                colours, tagged mate/mateIn1/backRankMate, so
+                solution-tree building does its real mate search
+  other lines   2-6 random legal plies branching off random games
+                between plies 8 and 60, tagged with random tactical
+                themes
+
+Ratings, deviations, popularity, play counts and theme mixes are drawn
+with numpy so multi-million-row files generate quickly.
+
+Usage:
+  python3 generate_puzzle_csv.py 10k                  # data/synthetic_10k.csv
+  python3 generate_puzzle_csv.py 1M --seed 7
+  python3 generate_puzzle_csv.py 5M -o puzzles.csv.zst
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+import chess
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'puzzle_importer'))
+from theme_bits import LICHESS_THEMES  # noqa: E402
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+
+SEED = 2024
+POSITION_POOL = 4000
+MATE_SHARE = 0.2
+WRITE_CHUNK = 500_000
+
+ID_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+TACTICAL_THEMES = [theme for theme in LICHESS_THEMES if not theme.startswith('mate') and not theme.endswith('Mate')]
+PHASES = ('opening', 'middlegame', 'endgame')
+LENGTHS = ('oneMove', 'short', 'long', 'veryLong')
+OPENINGS = ('', '', '', 'Sicilian_Defense', 'French_Defense Advance_Variation', 'Italian_Game', 'Queens_Gambit_Declined')
+
+
+def parse_rows(text):
+    """'10k' / '1M' / '5000' -> int"""
+    text = text.strip().lower().replace('_', '').replace(',', '')
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def default_path(rows):
+    label = f"{rows // 1_000_000}M" if rows % 1_000_000 == 0 else f"{rows // 1000}k" if rows % 1000 == 0 else str(rows)
+    return DATA_DIR / f"synthetic_{label}.csv"
+
+
+def back_rank_mate(rng):
+    """(FEN, [opponent move, mating move]) for a random back-rank mate in 1, or None"""
+    king_file = rng.randrange(1, 7)
+    rook_file = rng.choice([f for f in range(8) if abs(f - king_file) > 1])
+    board = chess.Board(None)
+    board.set_piece_at(chess.square(king_file, 7), chess.Piece(chess.KING, chess.BLACK))
+    for file in (king_file - 1, king_file, king_file + 1):
+        board.set_piece_at(chess.square(file, 6), chess.Piece(chess.PAWN, chess.BLACK))
+    board.set_piece_at(chess.square(rook_file, 0), chess.Piece(chess.ROOK, chess.WHITE))
+    board.set_piece_at(chess.square(rng.choice([f for f in range(8) if f != rook_file]), 1 if rng.random() < 0.5 else 0),
+                       chess.Piece(chess.KING, chess.WHITE))
+    # A black piece on the queenside/kingside makes the opponent's first move
+    free = [s for s in chess.SQUARES if chess.square_rank(s) in (3, 4, 5) and board.piece_at(s) is None]
+    board.set_piece_at(rng.choice(free), chess.Piece(rng.choice([chess.KNIGHT, chess.BISHOP]), chess.BLACK))
+    board.turn = chess.BLACK
+    if rng.random() < 0.5:
+        board = board.mirror()
+    if not board.is_valid():
+        return None
+
+    first_moves = [move for move in board.legal_moves if board.piece_at(move.from_square).piece_type != chess.KING]
+    rng.shuffle(first_moves)
+    for first in first_moves:
+        board.push(first)
+        for reply in board.legal_moves:
+            if board.piece_at(reply.from_square).piece_type == chess.ROOK:
+                board.push(reply)
+                mate = board.is_checkmate()
+                board.pop()
+                if mate:
+                    board.pop()
+                    return board.fen(), [first.uci(), reply.uci()]
+        board.pop()
+    return None
+
+
+def random_lines(rng, samples=4):
+    """
+    [(FEN, moves), ...] of random legal lines branching off one random
+    game at `samples` points between plies 8 and 60
+    """
+    board = chess.Board()
+    cut_points = sorted(rng.sample(range(8, 60), samples))
+    lines = []
+    for ply in range(cut_points[-1] + 1):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        if ply in cut_points:
+            line = _branch(rng, board.copy(stack=False))
+            if line:
+                lines.append(line)
+        board.push(rng.choice(moves))
+    return lines
+
+
+def _branch(rng, board):
+    fen = board.fen()
+    line = []
+    for _ in range(rng.choice((2, 2, 4, 4, 6))):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        move = rng.choice(moves)
+        line.append(move.uci())
+        board.push(move)
+    return (fen, line) if len(line) >= 2 and len(line) % 2 == 0 else None
+
+
+def position_pool(rng, size=POSITION_POOL):
+    """[(fen, moves string, is_mate), ...] of legal lines"""
+    pool = []
+    mates = int(size * MATE_SHARE)
+    while len(pool) < mates:
+        line = back_rank_mate(rng)
+        if line:
+            pool.append((line[0], ' '.join(line[1]), True))
+    while len(pool) < size:
+        for fen, line in random_lines(rng):
+            pool.append((fen, ' '.join(line), False))
+    return pool[:size]
+
+
+def theme_pool(rng, size=1000):
+    """Theme strings for (non-mate, mate) lines"""
+    plain, mate = [], []
+    for _ in range(size):
+        themes = rng.sample(TACTICAL_THEMES, rng.randint(1, 3))
+        themes += [rng.choice(PHASES), rng.choice(LENGTHS), rng.choice(('advantage', 'crushing', 'equality'))]
+        plain.append(' '.join(sorted(set(themes))))
+        extra = rng.sample(('endgame', 'rookEndgame', 'kingsideAttack', 'oneMove', 'short'), rng.randint(0, 2))
+        mate.append(' '.join(sorted({'mate', 'mateIn1', 'backRankMate', *extra})))
+    return plain, mate
+
+
+def puzzle_ids(start, count):
+    ids = np.empty(count, dtype=object)
+    base = len(ID_ALPHABET)
+    for i in range(count):
+        n = start + i
+        chars = []
+        for _ in range(5):
+            n, digit = divmod(n, base)
+            chars.append(ID_ALPHABET[digit])
+        ids[i] = ''.join(reversed(chars))
+    return ids
+
+
+def generate_chunk(np_rng, start, count, pool, plain_themes, mate_themes):
+    """DataFrame of `count` synthetic rows starting at row number `start`"""
+    picks = np_rng.integers(0, len(pool), count)
+    fens = np.array([fen for fen, _, _ in pool], dtype=object)[picks]
+    moves = np.array([line for _, line, _ in pool], dtype=object)[picks]
+    is_mate = np.array([mate for _, _, mate in pool])[picks]
+
+    theme_picks = np_rng.integers(0, len(plain_themes), count)
+    themes = np.where(is_mate, np.array(mate_themes, dtype=object)[theme_picks],
+                      np.array(plain_themes, dtype=object)[theme_picks])
+
+    ids = puzzle_ids(start, count)
+    return pd.DataFrame({
+        'PuzzleId': ids,
+        'FEN': fens,
+        'Moves': moves,
+        'Rating': np.clip(np_rng.normal(1500, 500, count), 400, 3200).astype(np.int32),
+        'RatingDeviation': np_rng.integers(72, 110, count, dtype=np.int32),
+        'Popularity': np.clip(np_rng.normal(82, 18, count), -100, 100).astype(np.int32),
+        'NbPlays': np.minimum(np_rng.lognormal(6, 1.8, count), 500_000).astype(np.int32),
+        'Themes': themes,
+        'GameUrl': 'https://lichess.org/' + pd.Series(ids).str.lower() + '#' + pd.Series(np_rng.integers(10, 120, count)).astype(str),
+        'OpeningTags': np.array(OPENINGS, dtype=object)[np_rng.integers(0, len(OPENINGS), count)],
+    })
+
+
+def generate_csv(rows, path=None, seed=SEED, on_chunk=None):
+    """Write `rows` synthetic puzzles to `path` (.csv or .csv.zst); returns the path"""
+    path = Path(path) if path else default_path(rows)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    rng = random.Random(seed)
+    pool = position_pool(rng)
+    plain_themes, mate_themes = theme_pool(rng)
+    np_rng = np.random.default_rng(seed)
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    compression = 'zstd' if path.suffix == '.zst' else None
+    written = 0
+    with open(tmp_path, 'wb') as f:
+        while written < rows:
+            count = min(WRITE_CHUNK, rows - written)
+            chunk = generate_chunk(np_rng, written, count, pool, plain_themes, mate_themes)
+            chunk.to_csv(f, header=written == 0, index=False, compression=compression)
+            written += count
+            if on_chunk:
+                on_chunk(written)
+    tmp_path.replace(path)
+    return path
+
+
+def ensure_csv(rows, seed=SEED):
+    """Cached synthetic CSV for `rows` rows under data/, generated on first use"""
+    path = default_path(rows) if seed == SEED else DATA_DIR / f"synthetic_{rows}_seed{seed}.csv"
+    if not path.exists():
+        generate_csv(rows, path, seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Lichess-format puzzle CSV")
+    parser.add_argument('rows', help="row count, e.g. 10k, 1M, 5M")
+    parser.add_argument('-o', '--output', help="output path (.csv or .csv.zst; default: data/synthetic_<rows>.csv)")
+    parser.add_argument('--seed', type=int, default=SEED, help=f"random seed (default: {SEED})")
+    args = parser.parse_args()
+
+    rows = parse_rows(args.rows)
+    print(f"🎲 Generating {rows:,} synthetic puzzles (seed {args.seed})...")
+    path = generate_csv(
+        rows, args.output, args.seed,
+        on_chunk=lambda written: print(f"\r   Wrote {written:,} rows...", end="", flush=True),
+    )
+    print(f"\n✅ {path} ({path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+# tools/benchmarks/pipeline_stages.py
+"""
+Pipeline Stages
+---------------
+The import -> review -> convert pipeline split into separately timed
+stages, shared by the pytest-benchmark suite and bench_pipeline.py:
+
+  load                          stream the CSV in importer chunks
+  theme_filter                  theme bitset match (tokenizing included)
+  rating_filter                 rating range mask
+  top_n                         top TOP_N by popularity under both masks
+  convert_to_format             per-row candidate export, SAMPLE_ROWS rows
+  convert_puzzle_to_app_format  candidate -> app puzzle with solution
+                                tree, SAMPLE_ROWS puzzles
+  json_write                    candidates JSON for WRITE_ROWS rows
+
+Each stage's input is prepared outside the timed part, so timings
+measure only the stage itself. Peak RSS is the process high-water mark
+while the stage runs (see puzzle_importer/pipeline_trace.py): reset per
+stage on Linux, process-wide elsewhere.
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(TOOLS_DIR / 'puzzle_importer'))
+sys.path.insert(0, str(TOOLS_DIR / 'puzzle_reviewer'))
+
+from convert_puzzles import convert_puzzle_to_app_format  # noqa: E402
+from import_puzzles_interactive import convert_to_format, save_candidates  # noqa: E402
+from pipeline_trace import current_rss, peak_rss, reset_peak_rss  # noqa: E402
+from puzzle_db import match_themes, read_puzzle_chunks, top_by_popularity  # noqa: E402
+
+STAGES = (
+    'load', 'theme_filter', 'rating_filter', 'top_n',
+    'convert_to_format', 'convert_puzzle_to_app_format', 'json_write',
+)
+
+THEMES = ['mate', 'fork', 'pin']
+RATING_RANGE = (1000, 1600)
+TOP_N = 500
+SAMPLE_ROWS = 1000
+WRITE_ROWS = 10_000
+
+
+class PipelineData:
+    """A synthetic database loaded once, with every stage's inputs derived from it"""
+
+    def __init__(self, csv_path):
+        self.csv_path = Path(csv_path)
+        self.df = pd.concat(read_puzzle_chunks(self.csv_path), ignore_index=True)
+        self.rows = len(self.df)
+
+        self.theme_mask = match_themes(self.df, THEMES, 'any')
+        min_rating, max_rating = RATING_RANGE
+        self.rating_mask = (self.df['Rating'] >= min_rating) & (self.df['Rating'] <= max_rating)
+
+        self.sample = top_by_popularity(self.df, SAMPLE_ROWS)
+        self.exported = [convert_to_format(row) for _, row in self.sample.iterrows()]
+        self.write_rows = top_by_popularity(self.df, WRITE_ROWS)
+        self.output_dir = tempfile.mkdtemp(prefix='puzzle_bench_')
+
+    def stage(self, name):
+        """Zero-argument callable running one stage; returns the number of items it processed"""
+        return getattr(self, f'_{name}')
+
+    def _load(self):
+        rows = 0
+        for chunk in read_puzzle_chunks(self.csv_path):
+            rows += len(chunk)
+        return rows
+
+    def _theme_filter(self):
+        match_themes(self.df, THEMES, 'any')
+        return self.rows
+
+    def _rating_filter(self):
+        min_rating, max_rating = RATING_RANGE
+        (self.df['Rating'] >= min_rating) & (self.df['Rating'] <= max_rating)
+        return self.rows
+
+    def _top_n(self):
+        top_by_popularity(self.df, TOP_N, self.theme_mask & self.rating_mask)
+        return self.rows
+
+    def _convert_to_format(self):
+        for _, row in self.sample.iterrows():
+            convert_to_format(row)
+        return len(self.sample)
+
+    def _convert_puzzle_to_app_format(self):
+        for i, puzzle in enumerate(self.exported):
+            convert_puzzle_to_app_format(puzzle, i + 1)
+        return len(self.exported)
+
+    def _json_write(self):
+        save_candidates(self.write_rows, 'benchmark', output_dir=self.output_dir)
+        return len(self.write_rows)
+
+
+def measure(data, name, repeat=3):
+    """
+    Run one stage `repeat` times. Returns {seconds (best), mean_seconds,
+    items, items_per_second, peak_rss_mb, rss_growth_mb}.
+    """
+    run = data.stage(name)
+    timings = []
+    reset_peak_rss()
+    # Peak RSS reads as 0 where it can't be measured (Windows without psutil)
+    before = current_rss() or peak_rss() or 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = run()
+        timings.append(time.perf_counter() - start)
+    peak = peak_rss() or 0
+
+    best = min(timings)
+    return {
+        'seconds': best,
+        'mean_seconds': sum(timings) / len(timings),
+        'items': items,
+        'items_per_second': items / best if best else None,
+        'peak_rss_mb': peak / 1e6,
+        'rss_growth_mb': max(0, peak - before) / 1e6,
+    }
@@ -0,0 +1,30 @@
+# tools/benchmarks/test_pipeline_benchmarks.py
+"""
+Pipeline stage benchmarks (pytest-benchmark).
+
+  pytest test_pipeline_benchmarks.py                        # 10k rows
+  pytest test_pipeline_benchmarks.py --rows 10k 1M 5M
+  pytest test_pipeline_benchmarks.py --benchmark-autosave   # store a run
+  pytest test_pipeline_benchmarks.py --benchmark-compare --benchmark-compare-fail=mean:25%
+
+Peak RSS and RSS growth per stage are recorded in each benchmark's
+extra_info (shown in --benchmark-json output and saved runs).
+"""
+
+import pytest
+
+from pipeline_stages import STAGES, measure
+
+ROUNDS = 3
+
+
+@pytest.mark.parametrize('stage', STAGES)
+def test_stage(benchmark, pipeline_data, stage):
+    memory = measure(pipeline_data, stage, repeat=1)
+    benchmark.extra_info['rows'] = pipeline_data.rows
+    benchmark.extra_info['items'] = memory['items']
+    benchmark.extra_info['peak_rss_mb'] = round(memory['peak_rss_mb'], 1)
+    benchmark.extra_info['rss_growth_mb'] = round(memory['rss_growth_mb'], 1)
+
+    items = benchmark.pedantic(pipeline_data.stage(stage), rounds=ROUNDS, iterations=1)
+    assert items == memory['items']
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# tools/build_bot_books.py
+"""
+Bot Move Books
+--------------
+Precomputes each bot's replies for the positions it meets most often, so
+the app can look a move up instead of starting a Stockfish search:
+
+  openings    every position within `plies` half-moves of the bot's start
+              position (startingFen or the initial position), following
+              the engine's `branch` best moves at each step
+  training    the FENs in games/check_checkmate_positions.json and every
+              shipped puzzle set
+
+Every position is analysed once (MultiPV, on the local engine pool from
+puzzle_reviewer/engine_pool.py, cached in .analysis_cache.json) and the
+same analysis is weighted per bot from its bots.json engineSettings:
+
+  skillLevel           softmax over the engine's lines with a temperature
+                       of `temperature` cp at skill 0, doubling every
+                       `temperature_halving` levels weaker (clamped to the
+                       app's -20..20)
+  randomBlunderChance  kept as a '*' entry: play a uniformly random legal
+                       move, exactly as StockfishBot does live
+
+The book (assets/data/bots/bot_books.json) maps a 64-bit FNV-1a hash of
+each position (FEN placement, side to move and castling rights; the en
+passant field is left out because chess libraries write it differently)
+to [[uci, weight], ...] per bot. lib/core/game_logic/bot_book.dart picks
+a move by weight and falls back to the engine for positions not covered.
+
+Usage:
+  python3 build_bot_books.py
+  python3 build_bot_books.py --plies 10 --branch 4 --depth 14 --workers 8
+  python3 build_bot_books.py --bots bot_001 bot_002 -o /tmp/books.json
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from pathlib import Path
+
+import chess
+
+TOOLS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(TOOLS_DIR / 'puzzle_reviewer'))
+from engine_pool import DEFAULT_ANALYSIS_CACHE, EnginePool, analyse_positions, open_analysis_cache  # noqa: E402
+
+REPO_DIR = TOOLS_DIR.parent
+CONTENT_DIR = REPO_DIR / 'assets' / 'data'
+DEFAULT_BOTS_FILE = CONTENT_DIR / 'bots' / 'bots.json'
+DEFAULT_OUTPUT = CONTENT_DIR / 'bots' / 'bot_books.json'
+
+# Bump whenever the book format changes (bot_book.dart checks it)
+BOOK_VERSION = 1
+
+BOOK = {
+    "plies": 8,
+    "branch": 3,
+    "depth": 12,
+    "multipv": 5,
+    "scale": 1000,             # weights of an entry sum to about this
+    "min_weight": 10,          # engine moves below this are dropped
+    "temperature": 50,
+    "temperature_halving": 10,
+    "score_cap": 1500,         # mate scores count as this many centipawns
+}
+
+SKILL_RANGE = (-20, 20)
+
+FNV_OFFSET = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+MASK_64 = (1 << 64) - 1
+
+
+def position_key(fen):
+    """The part of a FEN a book entry depends on"""
+    return ' '.join(fen.split()[:3])
+
+
+def position_hash(fen):
+    """64-bit FNV-1a of position_key(), as 16 hex digits"""
+    value = FNV_OFFSET
+    for byte in position_key(fen).encode():
+        value = ((value ^ byte) * FNV_PRIME) & MASK_64
+    return f"{value:016x}"
+
+
+def load_bots(path=DEFAULT_BOTS_FILE):
+    """{bot id: profile} from bots.json"""
+    with open(path) as f:
+        data = json.load(f)
+    return {bot_id: bot for bot_id, bot in data.items() if not bot_id.startswith('$')}
+
+
+def training_fens(content_dir=CONTENT_DIR):
+    """FENs of the check/checkmate positions and of every shipped puzzle"""
+    fens = []
+    positions_file = content_dir / 'games' / 'check_checkmate_positions.json'
+    if positions_file.exists():
+        with open(positions_file) as f:
+            fens.extend(position['fen'] for position in json.load(f).get('positions', []) if 'fen' in position)
+    for set_file in sorted((content_dir / 'puzzles').glob('puzzle_set_*.json')):
+        with open(set_file) as f:
+            fens.extend(puzzle['fen'] for puzzle in json.load(f).get('puzzles', []) if 'fen' in puzzle)
+    return [fen for fen in fens if _valid(fen)]
+
+
+def _valid(fen):
+    try:
+        return chess.Board(fen).is_valid()
+    except ValueError:
+        return False
+
+
+def opening_fens(start_fens, pool, cache, settings, plies, branch):
+    """
+    Positions within `plies` half-moves of the start positions along the
+    engine's `branch` best moves, and their analyses ({fen: lines}).
+    """
+    seen = set()
+    level = []
+    for fen in start_fens:
+        if position_key(fen) not in seen:
+            seen.add(position_key(fen))
+            level.append(fen)
+
+    analyses = {}
+    for ply in range(plies + 1):
+        lines = analyse_positions(level, pool, cache, settings)
+        analyses.update(lines)
+        if ply == plies:
+            break
+        next_level = []
+        for fen in level:
+            for line in lines[fen][:branch]:
+                board = chess.Board(fen)
+                board.push_uci(line['move'])
+                child = board.fen()
+                if position_key(child) not in seen:
+                    seen.add(position_key(child))
+                    next_level.append(child)
+        level = next_level
+    return analyses
+
+
+def temperature(engine_settings, book=BOOK):
+    """Softmax temperature (cp) for a bot's skill level"""
+    skill = max(SKILL_RANGE[0], min(SKILL_RANGE[1], engine_settings.get('skillLevel', 0)))
+    return book['temperature'] * 2 ** (-skill / book['temperature_halving'])
+
+
+def weighted_moves(lines, engine_settings, book=BOOK):
+    """[[uci, weight], ...] for one bot from one position's analysis ('*' = random legal move)"""
+    if not lines:
+        return []
+    blunder = min(1.0, max(0.0, float(engine_settings.get('randomBlunderChance') or 0.0)))
+    cap = book['score_cap']
+    scores = [max(-cap, min(cap, line['score'])) for line in lines]
+    t = temperature(engine_settings, book)
+    odds = [math.exp((score - scores[0]) / t) for score in scores]
+    total = sum(odds)
+
+    engine_share = (1.0 - blunder) * book['scale']
+    moves = [[line['move'], round(engine_share * o / total)] for line, o in zip(lines, odds)]
+    moves = [move for move in moves if move[1] >= book['min_weight']]
+    if blunder:
+        moves.append(['*', round(blunder * book['scale'])])
+    return moves
+
+
+def build_books(bots, pool, cache, book=BOOK, content_dir=CONTENT_DIR):
+    """Book dict (see module docstring) for `bots`, plus (positions analysed, entries written)"""
+    settings = {"depth": book['depth'], "multipv": book['multipv']}
+    trees = {}
+    for bot in bots.values():
+        start = bot.get('startingFen') or chess.STARTING_FEN
+        if start not in trees:
+            trees[start] = opening_fens([start], pool, cache, settings, book['plies'], book['branch'])
+    training = analyse_positions(training_fens(content_dir), pool, cache, settings)
+
+    books = {}
+    analysed = set()
+    entries = 0
+    for bot_id, bot in bots.items():
+        engine_settings = bot.get('engineSettings') or {}
+        positions = {}
+        for analyses in (trees[bot.get('startingFen') or chess.STARTING_FEN], training):
+            for fen, lines in analyses.items():
+                key = position_hash(fen)
+                analysed.add(key)
+                moves = weighted_moves(lines, engine_settings, book) if key not in positions else None
+                if moves:
+                    positions[key] = moves
+        books[bot_id] = {"positions": positions}
+        entries += len(positions)
+
+    return {
+        "version": BOOK_VERSION,
+        "engine": pool.id,
+        "settings": {key: book[key] for key in ('plies', 'branch', 'depth', 'multipv')},
+        "bots": books,
+    }, len(analysed), entries
+
+
+def write_books(data, path):
+    """Write the book atomically (compact JSON)"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute per-bot move books with a local engine pool")
+    parser.add_argument('-o', '--output', default=str(DEFAULT_OUTPUT), help="book file (default: assets/data/bots/bot_books.json)")
+    parser.add_argument('--bots', nargs='+', metavar='ID', help="only these bots (default: all in bots.json)")
+    parser.add_argument('--plies', type=int, default=BOOK['plies'], help=f"opening depth in half-moves (default: {BOOK['plies']})")
+    parser.add_argument('--branch', type=int, default=BOOK['branch'], help=f"engine moves followed per position (default: {BOOK['branch']})")
+    parser.add_argument('--depth', type=int, default=BOOK['depth'], help=f"search depth (default: {BOOK['depth']})")
+    parser.add_argument('--multipv', type=int, default=BOOK['multipv'], help=f"candidate moves per position (default: {BOOK['multipv']})")
+    parser.add_argument('--engine', help="UCI engine binary (default: $STOCKFISH_PATH or stockfish on PATH)")
+    parser.add_argument('--workers', type=int, help="engine processes (default: all CPUs)")
+    parser.add_argument('--no-cache', action='store_true', help="don't read or write the analysis cache")
+    args = parser.parse_args()
+
+    bots = load_bots()
+    if args.bots:
+        unknown = sorted(set(args.bots) - set(bots))
+        if unknown:
+            print(f"❌ Unknown bots: {', '.join(unknown)}")
+            sys.exit(1)
+        bots = {bot_id: bots[bot_id] for bot_id in args.bots}
+
+    book = dict(BOOK, plies=args.plies, branch=args.branch, depth=args.depth, multipv=max(args.multipv, args.branch))
+    try:
+        pool = EnginePool(args.engine, args.workers)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    cache = open_analysis_cache(None if args.no_cache else DEFAULT_ANALYSIS_CACHE)
+
+    print(f"📚 Building move books for {len(bots)} bots with {Path(pool.path).name} x{pool.size}...")
+    start = time.perf_counter()
+    with pool:
+        data, positions, entries = build_books(bots, pool, cache, book)
+    cache.save()
+    write_books(data, args.output)
+
+    for bot_id, bot_book in data['bots'].items():
+        settings = bots[bot_id].get('engineSettings') or {}
+        print(f"   {bot_id:20} {len(bot_book['positions']):6} positions "
+              f"(skill {settings.get('skillLevel', 0)}, blunder {settings.get('randomBlunderChance') or 0:.0%})")
+    print(f"\n✅ {entries} entries over {positions} positions written to {args.output} "
+          f"({Path(args.output).stat().st_size / 1024:.0f} KB, {cache.misses} analysed, "
+          f"{cache.hits} from cache, {time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
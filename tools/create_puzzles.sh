@@ -1,7 +1,7 @@
 #!/bin/bash
 # Quick puzzle workflow launcher
 # Usage: ./create_puzzles.sh [workflow]
-#   workflow: lichess, custom, or convert
+#   workflow: lichess, custom, convert, convert-batch MANIFEST, serve, build-store, build-features, or delta
 
 set -e
 
@@ -96,6 +96,76 @@ run_convert_workflow() {
     echo ""
 }
 
+run_convert_batch() {
+    echo ""
+    echo "🔄 Converting every export in the manifest..."
+    echo ""
+
+    local manifest
+    manifest="$(cd "$(dirname "$1")" && pwd)/$(basename "$1")"
+    shift
+    cd "$SCRIPT_DIR/puzzle_reviewer"
+
+    # Sets, index.json and puzzles.bundle are written straight into assets/data/puzzles
+    python3 batch_convert.py "$manifest" "${@}"
+}
+
+run_serve() {
+    echo ""
+    echo "🌐 Starting the puzzle query server..."
+    echo ""
+
+    cd "$SCRIPT_DIR/puzzle_importer"
+
+    # Builds the puzzle store and index on first start; the review UI is served at /
+    python3 query_server.py "${@}"
+}
+
+run_build_store() {
+    echo ""
+    echo "📦 Building columnar puzzle store..."
+    echo ""
+
+    cd "$SCRIPT_DIR/puzzle_importer"
+
+    # One-time conversion of lichess_db_puzzle.csv; rebuilt automatically when the CSV changes
+    python3 puzzle_store.py "${@}"
+
+    echo ""
+    echo "💡 The Lichess importers now memory-map the store instead of parsing the CSV"
+    echo ""
+}
+
+run_build_features() {
+    echo ""
+    echo "🧮 Extracting per-puzzle features..."
+    echo ""
+
+    cd "$SCRIPT_DIR/puzzle_importer"
+
+    # One-time, multiprocess pass over lichess_db_puzzle.csv; rebuilt automatically when the CSV changes
+    python3 puzzle_features.py "${@}"
+
+    echo ""
+    echo "💡 Queries and level criteria can now filter on \"features\" (see puzzle_features.py)"
+    echo ""
+}
+
+run_delta() {
+    echo ""
+    echo "🔍 Comparing the Lichess dump with the last ingested one..."
+    echo ""
+
+    cd "$SCRIPT_DIR/puzzle_importer"
+
+    # First run records the baseline; later runs write output/delta_<date>.json
+    python3 puzzle_delta.py "${@}"
+
+    echo ""
+    echo "💡 Load output/delta_<date>_candidates.json in the review UI to re-check only added and changed puzzles"
+    echo ""
+}
+
 view_docs() {
     echo ""
     echo "📖 Opening documentation..."
@@ -124,6 +194,30 @@ elif [ "$1" == "custom" ]; then
 elif [ "$1" == "convert" ]; then
     run_convert_workflow
     exit 0
+elif [ "$1" == "convert-batch" ]; then
+    shift
+    if [ -z "$1" ]; then
+        echo "❌ Usage: ./create_puzzles.sh convert-batch MANIFEST [--workers N]"
+        exit 1
+    fi
+    run_convert_batch "$@"
+    exit 0
+elif [ "$1" == "serve" ]; then
+    shift
+    run_serve "$@"
+    exit 0
+elif [ "$1" == "build-store" ]; then
+    shift
+    run_build_store "$@"
+    exit 0
+elif [ "$1" == "build-features" ]; then
+    shift
+    run_build_features "$@"
+    exit 0
+elif [ "$1" == "delta" ]; then
+    shift
+    run_delta "$@"
+    exit 0
 elif [ "$1" == "docs" ]; then
     view_docs
     exit 0
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# tools/puzzle_importer/generate_check_positions.py
+"""
+Check/Checkmate Position Generator
+----------------------------------
+Mines labelled positions for the check/checkmate mini-game from the
+Lichess puzzle database instead of writing them by hand. Every puzzle's
+Moves are replayed with python-chess and each position along the line is
+labelled for the side to move:
+
+  checkmate   in check with no legal moves
+  stalemate   not in check with no legal moves
+  check       in check
+  neither     none of the above
+
+Puzzle lines rarely end in stalemate, so positions with at most
+`probe_pieces` pieces also try every legal move and keep the checkmates
+and stalemates they reach. Each puzzle contributes at most one position
+per class, positions are deduplicated by Zobrist hash (also against the
+positions already in the output file with --append), and every class gets
+an equal share of --count, interleaved so any prefix stays balanced.
+
+Chunks of the database are sharded across a process pool and reading
+stops as soon as every class is full, so a few thousand positions take
+seconds. Output uses the format of check_checkmate_positions.json, plus
+the source puzzle's lichess_url. The mini-game can only answer check and
+checkmate, so those are the only classes --append writes to the assets
+file.
+
+Usage:
+  python3 generate_check_positions.py --count 2000
+  python3 generate_check_positions.py --max-pieces 8 --classes check checkmate
+  python3 generate_check_positions.py --count 200 --append   # add to assets/data/games
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import chess
+import chess.polyglot
+
+from puzzle_db import find_database, read_puzzle_chunks
+
+POSITIONS_FILE = Path(__file__).resolve().parent.parent.parent / 'assets' / 'data' / 'games' / 'check_checkmate_positions.json'
+DEFAULT_OUTPUT = Path('output') / 'check_checkmate_positions.json'
+
+CLASSES = ['checkmate', 'check', 'neither', 'stalemate']
+# Answers check_checkmate_page.dart has buttons for
+APP_CLASSES = ['checkmate', 'check']
+
+GENERATOR = {
+    "count": 1000,
+    "min_pieces": 3,
+    "max_pieces": 32,
+    "probe_pieces": 7,     # try every legal move in positions this small
+}
+
+# Puzzles per pool task; chunks this size are read until every class is full
+SHARD_SIZE = 500
+SHARDS_PER_CHUNK = 16
+
+COLOUR_NAMES = {chess.WHITE: "White", chess.BLACK: "Black"}
+
+
+def classify(board):
+    """checkmate, stalemate, check or neither for the side to move"""
+    if board.is_check():
+        return 'checkmate' if not any(board.legal_moves) else 'check'
+    return 'stalemate' if not any(board.legal_moves) else 'neither'
+
+
+def describe(board, label):
+    """One-line explanation shown after the player answers"""
+    mover = COLOUR_NAMES[board.turn]
+    checkers = [
+        f"{chess.piece_name(board.piece_type_at(square))} on {chess.square_name(square)}"
+        for square in board.checkers()
+    ]
+    if label in ('check', 'checkmate'):
+        attacker = COLOUR_NAMES[not board.turn]
+        if len(checkers) == 1:
+            return f"{attacker} {checkers[0]} {'delivers checkmate' if label == 'checkmate' else 'gives check'}"
+        return f"Double check - {attacker} {' and '.join(checkers)} {'deliver checkmate' if label == 'checkmate' else 'give check'}"
+    if label == 'stalemate':
+        return f"Stalemate - {mover} is not in check but has no legal moves"
+    return f"No check - {mover} to move, the king is not attacked"
+
+
+def _position(board, label, puzzle_id):
+    return {
+        "hash": chess.polyglot.zobrist_hash(board),
+        "answer": label,
+        "fen": board.fen(),
+        "description": describe(board, label),
+        "lichess_url": f"https://lichess.org/training/{puzzle_id}",
+    }
+
+
+def puzzle_positions(puzzle_id, fen, moves, classes, settings=GENERATOR):
+    """Labelled positions from one puzzle line: at most one per class in `classes`"""
+    found = {}
+    try:
+        board = chess.Board(fen)
+    except ValueError:
+        return []
+
+    def keep(label):
+        if label in classes and label not in found:
+            found[label] = _position(board, label, puzzle_id)
+
+    for ply, uci in enumerate([None] + moves.split()):
+        if uci is not None:
+            try:
+                move = chess.Move.from_uci(uci)
+            except ValueError:
+                break
+            if not board.is_legal(move):
+                break
+            board.push(move)
+        pieces = chess.popcount(board.occupied)
+        if not settings['min_pieces'] <= pieces <= settings['max_pieces']:
+            continue
+        keep(classify(board))
+
+        probe = ({'checkmate', 'stalemate'} & set(classes)) - set(found)
+        if probe and pieces <= settings['probe_pieces'] and not board.is_game_over():
+            for move in list(board.legal_moves):
+                board.push(move)
+                label = classify(board)
+                if label in probe and chess.popcount(board.occupied) >= settings['min_pieces']:
+                    keep(label)
+                board.pop()
+    return list(found.values())
+
+
+def _mine_shard(shard):
+    ids, fens, moves, classes, settings = shard
+    return [
+        position
+        for puzzle_id, fen, line in zip(ids, fens, moves)
+        for position in puzzle_positions(puzzle_id, fen, line, classes, settings)
+    ]
+
+
+def load_positions(path):
+    """Positions already in a check_checkmate_positions.json, or [] if there is none"""
+    if not Path(path).exists():
+        return []
+    with open(path) as f:
+        return json.load(f).get('positions', [])
+
+
+def generate_positions(db_path, classes=CLASSES, settings=GENERATOR, workers=None, exclude=(), on_chunk=None):
+    """
+    Up to settings['count'] positions, an equal share per class, mined
+    from `db_path` on a process pool. Positions whose FEN is in `exclude`
+    are skipped. Returns ({class: [position, ...]}, puzzles read).
+    """
+    quota = -(-settings['count'] // len(classes))
+    picked = {label: [] for label in classes}
+    seen = {chess.polyglot.zobrist_hash(chess.Board(fen)) for fen in exclude}
+    workers = workers or os.cpu_count() or 1
+    read = 0
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for chunk in read_puzzle_chunks(db_path, chunksize=SHARD_SIZE * SHARDS_PER_CHUNK):
+            # Full classes are no longer looked for
+            wanted = [label for label in classes if len(picked[label]) < quota]
+            ids, fens, moves = chunk['PuzzleId'].tolist(), chunk['FEN'].tolist(), chunk['Moves'].tolist()
+            shards = [(ids[i:i + SHARD_SIZE], fens[i:i + SHARD_SIZE], moves[i:i + SHARD_SIZE], wanted, settings)
+                      for i in range(0, len(ids), SHARD_SIZE)]
+            results = pool.map(_mine_shard, shards) if pool is not None else map(_mine_shard, shards)
+            for positions in results:
+                for position in positions:
+                    if position['hash'] in seen or len(picked[position['answer']]) >= quota:
+                        continue
+                    seen.add(position['hash'])
+                    picked[position['answer']].append(position)
+
+            read += len(chunk)
+            if on_chunk:
+                on_chunk(read, {label: len(found) for label, found in picked.items()})
+            if all(len(found) >= quota for found in picked.values()):
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return picked, read
+
+
+def interleave(picked, count, first_id=1):
+    """Round-robin the classes into one list of at most `count` numbered positions"""
+    positions = []
+    for round_ in range(max((len(found) for found in picked.values()), default=0)):
+        for found in picked.values():
+            if round_ < len(found) and len(positions) < count:
+                position = {key: value for key, value in found[round_].items() if key != 'hash'}
+                positions.append({"id": first_id + len(positions), **position})
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mine labelled check/checkmate positions from the Lichess puzzle database")
+    parser.add_argument('db', nargs='?', help="path to lichess_db_puzzle.csv(.zst) (default: search here)")
+    parser.add_argument('-o', '--output', help=f"positions file (default: {DEFAULT_OUTPUT})")
+    parser.add_argument('--append', action='store_true',
+                        help="add to assets/data/games/check_checkmate_positions.json (or --output), continuing its ids")
+    parser.add_argument('--count', type=int, default=GENERATOR['count'], help=f"positions to generate (default: {GENERATOR['count']})")
+    parser.add_argument('--classes', nargs='+', choices=CLASSES,
+                        help="answers to generate (default: all, or check and checkmate with --append to assets)")
+    parser.add_argument('--min-pieces', type=int, default=GENERATOR['min_pieces'], help="fewest pieces on the board, kings included")
+    parser.add_argument('--max-pieces', type=int, default=GENERATOR['max_pieces'], help="most pieces on the board, e.g. 8 for beginners")
+    parser.add_argument('--probe-pieces', type=int, default=GENERATOR['probe_pieces'],
+                        help=f"try every legal move for mates/stalemates up to this many pieces (default: {GENERATOR['probe_pieces']})")
+    parser.add_argument('--workers', type=int, help="worker processes (default: all CPUs)")
+    args = parser.parse_args()
+
+    db_path = Path(args.db) if args.db else find_database()
+    if db_path is None or not db_path.exists():
+        print("❌ ERROR: lichess_db_puzzle.csv (or .csv.zst) not found!")
+        sys.exit(1)
+
+    output_file = Path(args.output) if args.output else POSITIONS_FILE if args.append else DEFAULT_OUTPUT
+    to_assets = output_file.resolve() == POSITIONS_FILE
+    classes = list(dict.fromkeys(args.classes or (APP_CLASSES if to_assets else CLASSES)))
+    if to_assets and set(classes) - set(APP_CLASSES):
+        print(f"❌ ERROR: the check/checkmate game can't answer {', '.join(sorted(set(classes) - set(APP_CLASSES)))} "
+              f"positions; write them to another file with -o")
+        sys.exit(1)
+    existing = load_positions(output_file) if args.append else []
+    settings = dict(GENERATOR, count=args.count, min_pieces=args.min_pieces, max_pieces=args.max_pieces,
+                    probe_pieces=args.probe_pieces)
+
+    print(f"♟️  Mining {args.count} positions ({', '.join(classes)}) from {db_path}...")
+    start = time.perf_counter()
+    picked, read = generate_positions(
+        db_path, classes, settings, args.workers, exclude=[position['fen'] for position in existing],
+        on_chunk=lambda rows, counts: print(
+            f"\r   {rows:,} puzzles read | " + ", ".join(f"{label} {n}" for label, n in counts.items()),
+            end="", flush=True),
+    )
+    print()
+
+    first_id = max((position['id'] for position in existing if isinstance(position.get('id'), int)), default=0) + 1
+    positions = interleave(picked, args.count, first_id)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = output_file.with_name(output_file.name + '.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump({"positions": existing + positions}, f, indent=2)
+    os.replace(tmp_file, output_file)
+
+    quota = -(-args.count // len(classes))
+    for label, found in picked.items():
+        print(f"   {label:10} {len(found):6}" + (f"  ⚠️  only {len(found)} of {quota} found" if len(found) < quota else ""))
+    print(f"\n✅ {len(positions)} positions from {read:,} puzzles written to {output_file} "
+          f"({time.perf_counter() - start:.1f}s)")
+    if args.append:
+        print(f"💡 New ids are {first_id}-{first_id + len(positions) - 1}: add them to a level's positionIds")
+
+
+if __name__ == '__main__':
+    main()
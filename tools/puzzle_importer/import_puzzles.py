@@ -1,9 +1,45 @@
 # tools/puzzle_importer/import_puzzles.py
-import pandas as pd
+"""
+Batch Level Importer
+--------------------
+Generates candidate files for many levels from a single pass over the
+Lichess database.
+
+Usage:
+  python3 import_puzzles.py              # levels from LEVEL_THEMES below
+  python3 import_puzzles.py --levels     # every assets/data/levels/level_*.json
+                                         # that has criteria in level_criteria.json
+  python3 import_puzzles.py --validate   # drop candidates that don't replay legally
+  python3 import_puzzles.py --compact    # unindented JSON (--ndjson: one puzzle per line)
+  python3 import_puzzles.py --dedupe     # skip positions already shipped or used by another level
+                                         # (--near also skips near-duplicates)
+  python3 import_puzzles.py --profile    # per-stage time, rows and peak memory
+                                         # (--trace FILE / --cprofile FILE, see pipeline_trace.py)
+"""
+
+import argparse
 import json
-import chess
+import numpy as np
 from pathlib import Path
 
+import pipeline_trace
+from json_stream import format_extension
+from pipeline_trace import ProgressBar, estimate_rows, stage
+from puzzle_db import (
+    candidate_columns, find_database, stream_selected, theme_view, top_by_popularity,
+    write_candidates_json,
+)
+from puzzle_dedup import DEDUPE_OVERSAMPLE, PositionIndex, dedupe_frame
+from puzzle_features import load_features, make_predicates
+from puzzle_store import load_store
+from selection import candidate_pool, make_selection, select
+from theme_bits import theme_mask
+from validate_candidates import validate_puzzles
+
+TOOLS_DIR = Path(__file__).resolve().parent
+LEVELS_DIR = TOOLS_DIR.parent.parent / 'assets' / 'data' / 'levels'
+CRITERIA_FILE = TOOLS_DIR / 'level_criteria.json'
+
 # Load your level themes mapping
 LEVEL_THEMES = {
     "level_0010": {
@@ -15,26 +51,96 @@ LEVEL_THEMES = {
     }
 }
 
-def filter_puzzles_for_level(df, level_id, level_config):
-    """Get candidate puzzles for a level"""
+def load_level_definitions(levels_dir=LEVELS_DIR, criteria_file=CRITERIA_FILE):
+    """
+    Build a LEVEL_THEMES-style mapping from the shipped level files plus the
+    sidecar criteria file (themes, theme_match, rating_range, max_candidates
+    and optionally selection, see selection.py, and features, see
+    puzzle_features.py). Levels without criteria are skipped.
+    """
+    with open(criteria_file) as f:
+        criteria = json.load(f)
+
+    levels = {}
+    skipped = []
+    for level_file in sorted(Path(levels_dir).glob('level_*.json')):
+        with open(level_file) as f:
+            level = json.load(f)
+        level_id = level.get('id', level_file.stem)
+        if level_id not in criteria:
+            skipped.append(level_id)
+            continue
+        levels[level_id] = {"title": level.get('title', level_id), **criteria[level_id]}
+
+    return levels, skipped
 
-    # Filter by themes
-    theme_mask = df['Themes'].str.contains('|'.join(level_config['themes']), na=False)
+def filter_levels(df, levels, pool=False, features=None):
+    """
+    Get candidate puzzles for every level in one pass over df (a DataFrame
+    chunk or a PuzzleStore): themes are tokenized and ratings read once,
+    then each level's predicate is a couple of vectorized mask ops.
 
-    # Filter by rating
-    min_rating, max_rating = level_config['rating_range']
-    rating_mask = (df['Rating'] >= min_rating) & (df['Rating'] <= max_rating)
+    pool=True keeps selection.candidate_pool() instead, for merging the
+    chunks of a stream (see finish_level_selection). Levels with a
+    "features" filter need the puzzle_features.FeatureTable as `features`.
+    """
+    bits, vocabulary = theme_view(df)
+    ratings = np.asarray(df['Rating'])
 
-    # Combine filters
-    candidates = df[theme_mask & rating_mask].copy()
+    results = {}
+    for level_id, level_config in levels.items():
+        with stage('filter', rows_in=len(df)) as s:
+            # Filter by themes
+            mask = theme_mask(bits, vocabulary, level_config['themes'], level_config.get('theme_match', 'any'))
 
-    # Sort by popularity (high quality puzzles)
-    candidates = candidates.sort_values('Popularity', ascending=False)
+            # Filter by rating
+            min_rating, max_rating = level_config['rating_range']
+            mask &= (ratings >= min_rating) & (ratings <= max_rating)
 
-    # Take top N candidates
-    candidates = candidates.head(level_config['max_candidates'])
+            # Filter by position features (piece counts, solution length, ...)
+            if level_config.get('features'):
+                if features is None:
+                    raise ValueError(f"{level_id} filters on puzzle features; build them with puzzle_features.py")
+                mask &= features.mask_for(df, make_predicates(level_config['features']))
+            s.add(rows_out=int(mask.sum()))
 
-    return candidates
+        selection = make_selection(level_config.get('selection'))
+        if pool:
+            with stage('top_n'):
+                results[level_id] = candidate_pool(
+                    df, level_config['max_candidates'], mask, selection, level_config['themes'], (bits, vocabulary))
+        elif selection is not None:
+            # Spread over rating bands and themes instead of pure popularity
+            with stage('stratify'):
+                results[level_id] = select(
+                    df, level_config['max_candidates'], mask, selection, level_config['themes'], (bits, vocabulary))
+        else:
+            # Take top N candidates by popularity (high quality puzzles)
+            results[level_id] = top_by_popularity(df, level_config['max_candidates'], mask)
+
+    return results
+
+def merge_level_pools(levels):
+    """stream_selected() reduce keeping each level's candidate pool"""
+    def merge(level_id, frame):
+        config = levels[level_id]
+        return candidate_pool(
+            frame, config['max_candidates'], None, make_selection(config.get('selection')), config['themes'])
+    return merge
+
+def finish_level_selection(results, levels):
+    """Final picks from streamed candidate pools (plain top-N pools are final already)"""
+    for level_id, config in levels.items():
+        selection = make_selection(config.get('selection'))
+        if selection is not None:
+            with stage('stratify'):
+                results[level_id] = select(
+                    results[level_id], config['max_candidates'], None, selection, config['themes'])
+    return results
+
+def filter_puzzles_for_level(df, level_id, level_config):
+    """Get candidate puzzles for a level (df may be a DataFrame or a PuzzleStore)"""
+    return filter_levels(df, {level_id: level_config})[level_id]
 
 def convert_to_your_format(puzzle_row):
     """Convert Lichess puzzle to your JSON format"""
@@ -52,46 +158,156 @@ def convert_to_your_format(puzzle_row):
         "hint": generate_hint(puzzle_row['Themes'])
     }
 
+THEME_HINTS = {
+    "fork": "Look for a move that attacks two pieces at once",
+    "pin": "Can you trap a piece against a more valuable one?",
+    "backRankMate": "The back rank looks vulnerable...",
+    "mate": "You can checkmate in this position!",
+    "mateIn1": "Checkmate in one move!",
+    "mateIn2": "Checkmate in two moves!",
+    "hangingPiece": "A piece is undefended...",
+    "promotion": "Can you promote a pawn?",
+    "exposedKing": "The enemy king is exposed!",
+    "kingSafety": "Think about king safety",
+    "defensiveMove": "How can you defend?",
+    "queenEndgame": "Use your queen effectively",
+    "rookEndgame": "Rook power!",
+    "bishopEndgame": "Control those diagonals",
+    "knightEndgame": "Knights are tricky!",
+}
+
 def generate_hint(themes_str):
     """Generate a hint based on puzzle themes"""
-    theme_hints = {
-        "fork": "Look for a move that attacks two pieces at once",
-        "pin": "Can you trap a piece against a more valuable one?",
-        "backRankMate": "The back rank looks vulnerable...",
-        "mate": "You can checkmate in this position!",
-        "mateIn1": "Checkmate in one move!",
-        "mateIn2": "Checkmate in two moves!",
-        "hangingPiece": "A piece is undefended...",
-        "promotion": "Can you promote a pawn?",
-        "exposedKing": "The enemy king is exposed!",
-        "kingSafety": "Think about king safety",
-        "defensiveMove": "How can you defend?",
-        "queenEndgame": "Use your queen effectively",
-        "rookEndgame": "Rook power!",
-        "bishopEndgame": "Control those diagonals",
-        "knightEndgame": "Knights are tricky!",
-    }
-
     themes = themes_str.split()
     for theme in themes:
-        if theme in theme_hints:
-            return theme_hints[theme]
+        if theme in THEME_HINTS:
+            return THEME_HINTS[theme]
 
     return "Find the best move"
 
+def drop_invalid(columns):
+    """Keep only candidates that replay legally (see validate_candidates.py)"""
+    keys = list(columns)
+    records = [dict(zip(keys, values)) for values in zip(*columns.values())]
+    results = validate_puzzles(records)
+
+    invalid = [result for result in results if not result['valid']]
+    for result in invalid:
+        codes = ', '.join(error['code'] for error in result['errors'])
+        print(f"  Dropping {result['id']}: {codes}")
+
+    keep = [result['valid'] for result in results]
+    return {key: [value for value, ok in zip(values, keep) if ok] for key, values in columns.items()}
+
 def main():
-    print("Loading Lichess puzzle database...")
-    df = pd.read_csv('lichess_db_puzzle.csv')
+    parser = argparse.ArgumentParser(description="Generate candidate puzzles for many levels in one pass")
+    parser.add_argument('--levels', nargs='?', const=str(LEVELS_DIR), metavar='DIR',
+                        help="read level_*.json from DIR (default: assets/data/levels) instead of LEVEL_THEMES")
+    parser.add_argument('--criteria', default=str(CRITERIA_FILE),
+                        help="sidecar criteria file for --levels (default: level_criteria.json)")
+    parser.add_argument('--validate', action='store_true',
+                        help="replay every candidate with python-chess and drop illegal ones")
+    parser.add_argument('--dedupe', action='store_true',
+                        help="drop positions already in a shipped puzzle set or another level's candidates")
+    parser.add_argument('--near', action='store_true',
+                        help="with --dedupe, also drop near-duplicates (same material, kings and move shape)")
+    output_format = parser.add_mutually_exclusive_group()
+    output_format.add_argument('--compact', dest='format', action='store_const', const='compact', default='pretty',
+                               help="write unindented JSON")
+    output_format.add_argument('--ndjson', dest='format', action='store_const', const='ndjson',
+                               help="write one puzzle per line (output/<level>_candidates.ndjson)")
+    pipeline_trace.add_arguments(parser)
+    args = parser.parse_args()
+
+    pipeline_trace.start_from_args(args)
+    try:
+        run(args)
+    finally:
+        pipeline_trace.finish()
+
+def run(args):
+    """Write candidate files for the levels selected on the command line"""
+    if args.levels:
+        levels, skipped = load_level_definitions(args.levels, args.criteria)
+        print(f"Loaded {len(levels)} level definitions from {args.levels}")
+        if skipped:
+            print(f"  (no criteria for: {', '.join(skipped)})")
+    else:
+        levels = LEVEL_THEMES
+
+    for level_id, config in levels.items():
+        try:
+            make_selection(config.get('selection'))
+            make_predicates(config.get('features'))
+        except ValueError as e:
+            print(f"ERROR: {level_id}: {e}")
+            return
 
-    print(f"Loaded {len(df)} puzzles")
+    db_path = find_database()
+    if db_path is None:
+        print("ERROR: lichess_db_puzzle.csv (or .csv.zst) not found!")
+        return
+
+    features = None
+    if any(config.get('features') for config in levels.values()):
+        features = load_features(db_path, on_rebuild=lambda path: print(f"Database changed, rebuilding {path}..."))
+        if features is None:
+            print("ERROR: these levels filter on puzzle features; run 'python3 puzzle_features.py' first")
+            return
+
+    limits = {level_id: config['max_candidates'] for level_id, config in levels.items()}
+    positions = None
+    if args.dedupe or args.near:
+        with stage('index_shipped'):
+            positions = PositionIndex.from_puzzle_sets()
+        print(f"Indexed {len(positions.positions)} shipped puzzle positions")
+        levels = {
+            level_id: dict(config, max_candidates=config['max_candidates'] * DEDUPE_OVERSAMPLE)
+            for level_id, config in levels.items()
+        }
+
+    with stage('load'):
+        store = load_store(db_path, on_rebuild=lambda path: print(f"Database changed, rebuilding {path}..."))
+
+    if store is not None:
+        # Memory-mapped columnar store (see puzzle_store.py)
+        print(f"Using puzzle store for {db_path} ({len(store)} puzzles)")
+        results = filter_levels(store, levels, pool=positions is not None, features=features)
+    else:
+        # Stream the database once, routing each chunk to every level
+        print(f"Streaming Lichess puzzle database from {db_path}...")
+        print("(Run 'python3 puzzle_store.py' once for much faster loads)")
+        progress = ProgressBar("Scanning", estimate_rows(db_path))
+        results, total_rows = stream_selected(
+            db_path, lambda chunk: filter_levels(chunk, levels, pool=True, features=features),
+            {level_id: config['max_candidates'] for level_id, config in levels.items()},
+            on_chunk=progress.update, reduce=merge_level_pools(levels),
+        )
+        progress.close()
+        if positions is None:
+            results = finish_level_selection(results, levels)
+
+        print(f"Scanned {total_rows} puzzles")
 
     output_dir = Path('output')
     output_dir.mkdir(exist_ok=True)
 
-    for level_id, config in LEVEL_THEMES.items():
+    for level_id, config in levels.items():
         print(f"\nProcessing {level_id}: {config['title']}...")
 
-        candidates = filter_puzzles_for_level(df, level_id, config)
+        candidates = results[level_id]
+
+        if positions is not None:
+            # Dedupe the oversampled pool, then pick from the survivors so quotas still hold
+            final = {level_id: dict(config, max_candidates=limits[level_id])}
+            pick = None
+            if config.get('selection') is not None:
+                pick = lambda survivors: finish_level_selection({level_id: survivors}, final)[level_id]
+            with stage('dedupe', rows_in=len(candidates)) as s:
+                candidates, duplicates = dedupe_frame(
+                    candidates, positions, f"{level_id}_candidates", args.near, limits[level_id], pick)
+                s.add(rows_out=len(candidates))
+            print(f"  Skipped {len(duplicates)} duplicate positions")
 
         print(f"  Found {len(candidates)} candidates")
 
@@ -99,13 +315,20 @@ def main():
             print(f"  WARNING: No puzzles found for {level_id}!")
             continue
 
-        # Convert to your format
-        puzzles = [convert_to_your_format(row) for _, row in candidates.iterrows()]
+        # Convert to your format (whole frame at once, same output as convert_to_your_format)
+        with stage('export', rows_in=len(candidates)):
+            columns = candidate_columns(candidates, THEME_HINTS)
+
+        if args.validate:
+            with stage('validate', rows_in=len(candidates)) as s:
+                columns = drop_invalid(columns)
+                s.add(rows_out=len(columns['id']))
 
         # Save to JSON
-        output_file = output_dir / f"{level_id}_candidates.json"
-        with open(output_file, 'w') as f:
-            json.dump(puzzles, f, indent=2)
+        with stage('write', rows_in=len(columns['id'])):
+            output_file = output_dir / f"{level_id}_candidates{format_extension(args.format)}"
+            with open(output_file, 'w') as f:
+                write_candidates_json(f, columns, args.format)
 
         print(f"  Saved to {output_file}")
 
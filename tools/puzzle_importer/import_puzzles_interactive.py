@@ -4,12 +4,65 @@ Interactive Puzzle Importer
 ----------------------------
 Import puzzles from Lichess database with custom parameters.
 No need to edit LEVEL_THEMES - just run and input your criteria!
+
+Run with --repl to query a warm rating/theme index over and over
+without reloading the database. Add --compact for unindented JSON or
+--ndjson for one puzzle per line, and --profile / --trace FILE /
+--cprofile FILE to see where the time goes (see pipeline_trace.py).
+
+Usage:
+  python3 import_puzzles_interactive.py                 # prompts
+  python3 import_puzzles_interactive.py --themes fork pin --match all \
+      --rating 800 1000 --min-popularity 80 --min-plays 500 --max 50 --output forks
+  python3 import_puzzles_interactive.py --queries specs.json   # many exports, one load
+  python3 import_puzzles_interactive.py ... --dedupe   # skip shipped/repeated positions (--near: near-duplicates too)
+  python3 import_puzzles_interactive.py --repl
+  python3 import_puzzles_interactive.py ... --profile  # per-stage time, rows and peak memory
+
+Library use (one database load/pass for all queries):
+
+  from import_puzzles_interactive import export_queries
+  export_queries([
+      {"themes": ["fork"], "rating_range": [800, 1000], "output_name": "forks"},
+      {"themes": "mate short", "theme_match": "all", "min_plays": 1000},
+  ])
 """
 
-import pandas as pd
+import argparse
 import json
+import pandas as pd
+import sys
+import time
 from pathlib import Path
 
+import pipeline_trace
+from json_stream import format_extension
+from pipeline_trace import ProgressBar, estimate_rows, stage
+from puzzle_db import (
+    candidate_columns, find_database, match_themes, stream_selected, theme_view, top_by_popularity,
+    write_candidates_json,
+)
+from puzzle_dedup import DEDUPE_OVERSAMPLE, PositionIndex, dedupe_frame
+from puzzle_features import load_features, make_predicates
+from puzzle_index import PuzzleIndex
+from puzzle_store import build_store, load_store, store_path_for
+from selection import candidate_pool, make_selection, select
+from theme_bits import MATCH_MODES
+
+DEFAULT_QUERY = {
+    "themes": ["mate"],
+    "theme_match": "any",
+    "rating_range": [600, 800],
+    "min_popularity": None,
+    "min_plays": None,
+    "max_candidates": 50,
+    "output_name": None,
+    # None: most popular first; true or {band, band_quota, ...}: stratified (see selection.py)
+    "selection": None,
+    # Position feature filter, e.g. {"pieces": [null, 6], "user_moves": 1} (see puzzle_features.py)
+    "features": None,
+}
+
 def get_user_input():
     """Get puzzle search parameters from user"""
     print("\n" + "="*60)
@@ -41,84 +94,207 @@ def get_user_input():
     # Max candidates
     max_candidates = int(input("\nMax puzzles to generate [50]: ").strip() or "50")
 
-    # Require ALL themes or ANY theme?
+    # Require ALL themes, ANY theme, or NONE of them?
     print("\n🔍 THEME MATCHING:")
-    print("  1. ANY - Puzzle has at least one of the themes (more results)")
-    print("  2. ALL - Puzzle has all the themes (fewer, more specific results)")
-    match_mode = input("\nMatch mode (1=ANY, 2=ALL) [1]: ").strip() or "1"
+    print("  1. ANY  - Puzzle has at least one of the themes (more results)")
+    print("  2. ALL  - Puzzle has all the themes (fewer, more specific results)")
+    print("  3. NONE - Puzzle has none of the themes (exclude them)")
+    match_mode = input("\nMatch mode (1=ANY, 2=ALL, 3=NONE) [1]: ").strip() or "1"
 
     return {
         "output_name": output_name,
         "themes": themes,
         "rating_range": [min_rating, max_rating],
         "max_candidates": max_candidates,
-        "match_all_themes": match_mode == "2"
+        "theme_match": {"2": "all", "3": "none"}.get(match_mode, "any")
     }
 
-def filter_puzzles(df, config):
-    """Filter puzzles based on user criteria"""
-    print(f"\n🔎 Searching {len(df)} puzzles...")
-
-    # Filter by rating
-    min_rating, max_rating = config['rating_range']
-    rating_mask = (df['Rating'] >= min_rating) & (df['Rating'] <= max_rating)
-
-    # Filter by themes
-    if config['match_all_themes']:
-        # ALL themes must be present
-        theme_mask = pd.Series([True] * len(df))
-        for theme in config['themes']:
-            theme_mask &= df['Themes'].str.contains(theme, na=False, regex=False)
-    else:
-        # ANY theme must be present
-        theme_pattern = '|'.join(config['themes'])
-        theme_mask = df['Themes'].str.contains(theme_pattern, na=False)
-
-    # Combine filters
-    candidates = df[theme_mask & rating_mask].copy()
-
-    # Sort by popularity (best quality first)
-    candidates = candidates.sort_values('Popularity', ascending=False)
-
-    # Take top N
-    candidates = candidates.head(config['max_candidates'])
-
-    return candidates
+def make_query(spec):
+    """
+    Fill a query spec (dict with any DEFAULT_QUERY keys) with defaults and
+    check it. Raises ValueError for an invalid spec.
+    """
+    unknown = set(spec) - set(DEFAULT_QUERY)
+    if unknown:
+        raise ValueError(f"Unknown query fields: {', '.join(sorted(unknown))}")
+
+    query = dict(DEFAULT_QUERY, **spec)
+    if isinstance(query['themes'], str):
+        query['themes'] = query['themes'].split()
+    query['themes'] = list(query['themes'])
+    if not query['themes']:
+        raise ValueError("A query needs at least one theme")
+    if query['theme_match'] not in MATCH_MODES:
+        raise ValueError(f"theme_match must be one of {', '.join(MATCH_MODES)}")
+
+    min_rating, max_rating = (int(value) for value in query['rating_range'])
+    if min_rating > max_rating:
+        raise ValueError(f"Invalid rating range {min_rating}-{max_rating}")
+    query['rating_range'] = [min_rating, max_rating]
+    query['max_candidates'] = int(query['max_candidates'])
+    query['selection'] = make_selection(query['selection'])
+    query['features'] = make_predicates(query['features'])
+
+    if not query['output_name']:
+        query['output_name'] = f"{'_'.join(query['themes'])}_{min_rating}-{max_rating}"
+    return query
+
+def filter_puzzles(df, config, view=None, pool=False, features=None):
+    """
+    Filter puzzles based on user criteria (df may be a DataFrame or a
+    PuzzleStore). Pass a `view` from theme_view() to share one theme
+    tokenization between several queries, and pool=True when filtering a
+    chunk of a stream (keeps selection.candidate_pool() for the merge).
+    Queries with a "features" filter need the puzzle_features.FeatureTable.
+    """
+    with stage('filter', rows_in=len(df)) as s:
+        # Filter by rating
+        min_rating, max_rating = config['rating_range']
+        mask = (df['Rating'] >= min_rating) & (df['Rating'] <= max_rating)
+
+        # Filter by themes (ANY of them, ALL of them, or NONE of them)
+        mask = mask & match_themes(df, config['themes'], config['theme_match'], view)
+
+        # Optional quality floors
+        if config.get('min_popularity') is not None:
+            mask = mask & (df['Popularity'] >= config['min_popularity'])
+        if config.get('min_plays') is not None:
+            mask = mask & (df['NbPlays'] >= config['min_plays'])
+        if config.get('features'):
+            if features is None:
+                raise ValueError("Feature filters need the feature table; run 'python3 puzzle_features.py' first")
+            mask = mask & features.mask_for(df, make_predicates(config['features']))
+        s.add(rows_out=int(mask.sum()))
+
+    selection = config.get('selection')
+    if pool:
+        with stage('top_n'):
+            return candidate_pool(df, config['max_candidates'], mask, selection, config['themes'], view)
+    if selection is not None:
+        # Spread over rating bands and themes (see selection.py)
+        with stage('stratify'):
+            return select(df, config['max_candidates'], mask, selection, config['themes'], view)
+
+    # Take top N by popularity (best quality first)
+    return top_by_popularity(df, config['max_candidates'], mask)
+
+def run_queries(specs, db_file=None, on_chunk=None, on_rebuild=None, pool=False):
+    """
+    Run many query specs over one loaded dataset: the puzzle store if one
+    has been built, otherwise a single streaming pass over the CSV.
+
+    Returns a list of (query, candidates DataFrame) in spec order; with
+    pool=True each query's selection.candidate_pool() instead of its final
+    picks (see finish_selection).
+    Raises FileNotFoundError if there is no database, ValueError if a
+    query filters on features and the feature table hasn't been built.
+    """
+    queries = [make_query(spec) for spec in specs]
+    db_file = db_file or find_database()
+    if db_file is None or not Path(db_file).exists():
+        raise FileNotFoundError("lichess_db_puzzle.csv (or .csv.zst) not found")
+
+    with stage('load'):
+        store = load_store(db_file, on_rebuild=on_rebuild)
+        features = None
+        if any(query['features'] for query in queries):
+            features = load_features(db_file, on_rebuild=on_rebuild)
+            if features is None:
+                raise ValueError("Feature filters need the feature table; run 'python3 puzzle_features.py' first")
+    if store is not None:
+        return [(query, filter_puzzles(store, query, pool=pool, features=features)) for query in queries]
+
+    def select_chunk(chunk):
+        view = theme_view(chunk)
+        return {
+            i: filter_puzzles(chunk, query, view, pool=True, features=features)
+            for i, query in enumerate(queries)
+        }
+
+    def merge(i, frame):
+        query = queries[i]
+        return candidate_pool(frame, query['max_candidates'], None, query['selection'], query['themes'])
+
+    limits = {i: query['max_candidates'] for i, query in enumerate(queries)}
+    results, _ = stream_selected(db_file, select_chunk, limits, on_chunk=on_chunk, reduce=merge)
+    if pool:
+        return [(query, results[i]) for i, query in enumerate(queries)]
+    return [(query, finish_selection(results[i], query)) for i, query in enumerate(queries)]
+
+def finish_selection(pool, query):
+    """Final picks from a merged candidate pool (a no-op for plain top-N)"""
+    if query.get('selection') is None:
+        return pool
+    with stage('stratify'):
+        return select(pool, query['max_candidates'], None, query['selection'], query['themes'])
+
+def export_queries(specs, db_file=None, fmt='pretty', output_dir='output', on_chunk=None,
+                   positions=None, near=False):
+    """
+    run_queries() and save every non-empty result to
+    <output_dir>/<output_name>_candidates.json. Returns a list of
+    (query, candidates, output path or None).
+
+    Pass a puzzle_dedup.PositionIndex as `positions` to skip positions it
+    already holds (and positions exported by earlier specs). Duplicates
+    are dropped from an oversampled candidate pool before the final
+    selection, so stratified quotas hold as if there were none.
+    """
+    queries = [make_query(spec) for spec in specs]
+    if positions is not None:
+        queries = [dict(query, max_candidates=query['max_candidates'] * DEDUPE_OVERSAMPLE) for query in queries]
+
+    exported = []
+    for query, candidates in run_queries(queries, db_file, on_chunk, pool=positions is not None):
+        if positions is not None:
+            query = dict(query, max_candidates=query['max_candidates'] // DEDUPE_OVERSAMPLE)
+            pick = None
+            if query['selection'] is not None:
+                pick = lambda survivors, query=query: finish_selection(survivors, query)
+            with stage('dedupe', rows_in=len(candidates)) as s:
+                candidates, _ = dedupe_frame(
+                    candidates, positions, query['output_name'], near, query['max_candidates'], pick)
+                s.add(rows_out=len(candidates))
+        output_file = None
+        if len(candidates):
+            output_file = save_candidates(candidates, query['output_name'], fmt, output_dir)
+        exported.append((query, candidates, output_file))
+    return exported
+
+THEME_HINTS = {
+    "fork": "Look for a move that attacks two pieces at once",
+    "pin": "Can you trap a piece against a more valuable one?",
+    "skewer": "Attack the valuable piece to win the one behind it",
+    "backRankMate": "The back rank looks vulnerable...",
+    "mate": "You can checkmate in this position!",
+    "mateIn1": "Checkmate in one move!",
+    "mateIn2": "Checkmate in two moves!",
+    "mateIn3": "Find the checkmate sequence!",
+    "hangingPiece": "A piece is undefended...",
+    "promotion": "Can you promote a pawn?",
+    "exposedKing": "The enemy king is exposed!",
+    "kingSafety": "Think about king safety",
+    "defensiveMove": "How can you defend?",
+    "discoveredAttack": "Move one piece to reveal another's attack",
+    "doubleCheck": "Give check with two pieces at once!",
+    "queenEndgame": "Use your queen effectively",
+    "rookEndgame": "Rook power!",
+    "bishopEndgame": "Control those diagonals",
+    "knightEndgame": "Knights are tricky!",
+    "sacrifice": "Sometimes you must give to receive",
+    "attackingF2F7": "The f2/f7 square is weak",
+    "attraction": "Lure the piece to a bad square",
+    "deflection": "Move the defender away",
+    "clearance": "Clear the path for your attack",
+    "interference": "Block the defender's line",
+}
 
 def generate_hint(themes_str):
     """Generate a hint based on puzzle themes"""
-    theme_hints = {
-        "fork": "Look for a move that attacks two pieces at once",
-        "pin": "Can you trap a piece against a more valuable one?",
-        "skewer": "Attack the valuable piece to win the one behind it",
-        "backRankMate": "The back rank looks vulnerable...",
-        "mate": "You can checkmate in this position!",
-        "mateIn1": "Checkmate in one move!",
-        "mateIn2": "Checkmate in two moves!",
-        "mateIn3": "Find the checkmate sequence!",
-        "hangingPiece": "A piece is undefended...",
-        "promotion": "Can you promote a pawn?",
-        "exposedKing": "The enemy king is exposed!",
-        "kingSafety": "Think about king safety",
-        "defensiveMove": "How can you defend?",
-        "discoveredAttack": "Move one piece to reveal another's attack",
-        "doubleCheck": "Give check with two pieces at once!",
-        "queenEndgame": "Use your queen effectively",
-        "rookEndgame": "Rook power!",
-        "bishopEndgame": "Control those diagonals",
-        "knightEndgame": "Knights are tricky!",
-        "sacrifice": "Sometimes you must give to receive",
-        "attackingF2F7": "The f2/f7 square is weak",
-        "attraction": "Lure the piece to a bad square",
-        "deflection": "Move the defender away",
-        "clearance": "Clear the path for your attack",
-        "interference": "Block the defender's line",
-    }
-
     themes = themes_str.split()
     for theme in themes:
-        if theme in theme_hints:
-            return theme_hints[theme]
+        if theme in THEME_HINTS:
+            return THEME_HINTS[theme]
 
     return "Find the best move"
 
@@ -137,48 +313,273 @@ def convert_to_format(puzzle_row):
         "hint": generate_hint(puzzle_row['Themes'])
     }
 
+def save_candidates(candidates, output_name, fmt='pretty', output_dir='output'):
+    """Convert candidates to export format and save to output/"""
+    with stage('write', rows_in=len(candidates)) as s:
+        # Whole frame at once, same output as convert_to_format per row
+        columns = candidate_columns(candidates, THEME_HINTS)
+
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        output_file = output_dir / f"{output_name}_candidates{format_extension(fmt)}"
+        with open(output_file, 'w') as f:
+            write_candidates_json(f, columns, fmt)
+        s.add(rows_out=len(candidates))
+
+    return output_file
+
+REPL_HELP = """
+Queries:   <themes> [any|all|none] [MIN-MAX] [top N]
+           e.g.  fork AND pin 800-1000 top 50
+                 mateIn1 mateIn2 600-800
+                 none mate short 1000-1400 top 20
+           AND = all, OR = any; rating range and top N carry over
+Commands:  save <name>   save the last results to output/<name>_candidates.json
+           help          show this help
+           quit          exit
+"""
+
+def parse_query(line, previous):
+    """Parse a REPL query line, starting from the previous query's settings"""
+    query = dict(previous, themes=[], theme_match='any')
+    words = line.split()
+    i = 0
+    while i < len(words):
+        word = words[i]
+        lowered = word.lower()
+        if lowered in ('any', 'or'):
+            query['theme_match'] = 'any'
+        elif lowered in ('all', 'and'):
+            query['theme_match'] = 'all'
+        elif lowered in ('none', 'not'):
+            query['theme_match'] = 'none'
+        elif lowered == 'top' and i + 1 < len(words):
+            query['max_candidates'] = int(words[i + 1])
+            i += 1
+        elif '-' in word and word.replace('-', '').isdigit():
+            low, high = word.split('-', 1)
+            query['rating_range'] = [int(low), int(high)]
+        else:
+            query['themes'].append(word)
+        i += 1
+
+    if not query['themes']:
+        query['themes'] = previous['themes']
+    return query
+
+def run_repl(db_file, fmt='pretty'):
+    """Answer many queries against a warm index without reloading"""
+    store = load_store(db_file, on_rebuild=lambda path: print(f"\n📦 Database changed, rebuilding {path}..."))
+    if store is None:
+        print(f"\n📦 Building puzzle store (one time)...")
+        build_store(db_file)
+        store = load_store(db_file)
+
+    start = time.perf_counter()
+    index = PuzzleIndex.load_or_build(store, persist=True)
+    print(f"\n📚 Index ready: {len(store):,} puzzles in {time.perf_counter() - start:.2f}s")
+    print(f"   (saved in {store_path_for(db_file)}/index)")
+    print(REPL_HELP)
+
+    query = {
+        "themes": ["mate"],
+        "theme_match": "any",
+        "rating_range": [600, 800],
+        "max_candidates": 50,
+    }
+    candidates = None
+
+    while True:
+        try:
+            line = input("🔎 query> ").strip()
+        except EOFError:
+            print()
+            break
+
+        if not line:
+            continue
+        command, _, argument = line.partition(' ')
+        if command in ('quit', 'exit', 'q'):
+            break
+        if command == 'help':
+            print(REPL_HELP)
+            continue
+        if command == 'save':
+            if candidates is None or len(candidates) == 0:
+                print("⚠️  Nothing to save - run a query first")
+            else:
+                output_name = argument.strip() or f"custom_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}"
+                print(f"✅ Saved {len(candidates)} puzzles to: {save_candidates(candidates, output_name, fmt)}")
+            continue
+
+        try:
+            query = parse_query(line, query)
+        except ValueError:
+            print("⚠️  Could not parse that query (type 'help')")
+            continue
+
+        start = time.perf_counter()
+        rows = index.query(query['themes'], query['theme_match'], query['rating_range'], query['max_candidates'])
+        elapsed = (time.perf_counter() - start) * 1000
+        candidates = store.take(rows)
+
+        min_rating, max_rating = query['rating_range']
+        print(f"   {len(candidates)} puzzles | {query['theme_match'].upper()} {' '.join(query['themes'])} | "
+              f"{min_rating}-{max_rating} | top {query['max_candidates']} | {elapsed:.2f} ms")
+        for _, row in candidates.head(5).iterrows():
+            print(f"     {row['PuzzleId']:8} rating {row['Rating']:4}  popularity {row['Popularity']:4}  {row['Themes']}")
+        if len(candidates) > 5:
+            print(f"     ... and {len(candidates) - 5} more ('save <name>' to export)")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Import Lichess puzzles by theme and rating (prompts when no query is given)")
+    parser.add_argument('--themes', nargs='+', metavar='THEME', help="themes to search for")
+    parser.add_argument('--match', choices=MATCH_MODES, default=DEFAULT_QUERY['theme_match'],
+                        help="theme matching: any (default), all or none")
+    parser.add_argument('--rating', nargs=2, type=int, metavar=('MIN', 'MAX'),
+                        default=DEFAULT_QUERY['rating_range'], help="rating range (default: 600 800)")
+    parser.add_argument('--min-popularity', type=int, help="minimum Popularity (-100 to 100)")
+    parser.add_argument('--min-plays', type=int, help="minimum NbPlays")
+    parser.add_argument('--max', type=int, default=DEFAULT_QUERY['max_candidates'], dest='max_candidates',
+                        help="max puzzles to export (default: 50)")
+    parser.add_argument('--where', nargs='+', metavar='PREDICATE',
+                        help="position feature filters, e.g. pieces<=6 user_moves=1 key_check (see puzzle_features.py)")
+    parser.add_argument('--stratify', action='store_true',
+                        help="spread picks over rating bands (and the query's themes) instead of pure popularity")
+    parser.add_argument('--band', type=int, help="with --stratify, rating band width (default: 100)")
+    parser.add_argument('--band-quota', type=float, help="with --stratify, max share of picks per band (default: 0.2)")
+    parser.add_argument('--theme-quota', type=float, help="with --stratify, max share of picks per theme")
+    parser.add_argument('--output', help="output name (output/<name>_candidates.json)")
+    parser.add_argument('--output-dir', default='output', help="output directory (default: output)")
+    parser.add_argument('--queries', metavar='FILE',
+                        help="JSON list of query specs to export in one pass (keys as in DEFAULT_QUERY)")
+    parser.add_argument('--dedupe', action='store_true',
+                        help="skip positions already in a shipped puzzle set or an earlier export")
+    parser.add_argument('--near', action='store_true',
+                        help="with --dedupe, also skip near-duplicates (same material, kings and move shape)")
+    parser.add_argument('--db', help="path to lichess_db_puzzle.csv(.zst) (default: search here)")
+    parser.add_argument('--repl', action='store_true', help="interactive query loop over a warm index")
+    output_format = parser.add_mutually_exclusive_group()
+    output_format.add_argument('--compact', dest='format', action='store_const', const='compact', default='pretty',
+                               help="write unindented JSON")
+    output_format.add_argument('--ndjson', dest='format', action='store_const', const='ndjson',
+                               help="write one puzzle per line")
+    pipeline_trace.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def print_no_results():
+    print("\n⚠️  No puzzles found! Try:")
+    print("  - Broadening theme list")
+    print("  - Widening rating range")
+    print("  - Using ANY match mode instead of ALL")
+
+def selection_from_args(args):
+    """Selection spec for --stratify / --band / --band-quota / --theme-quota"""
+    overrides = {
+        "band": args.band,
+        "band_quota": args.band_quota,
+        "theme_quota": args.theme_quota,
+    }
+    overrides = {key: value for key, value in overrides.items() if value is not None}
+    if not (args.stratify or overrides):
+        return None
+    return overrides
+
+def run_batch(args, db_file):
+    """Non-interactive mode: --themes or --queries"""
+    if args.queries:
+        with open(args.queries) as f:
+            specs = json.load(f)
+    else:
+        specs = [{
+            "themes": args.themes,
+            "theme_match": args.match,
+            "rating_range": args.rating,
+            "min_popularity": args.min_popularity,
+            "min_plays": args.min_plays,
+            "max_candidates": args.max_candidates,
+            "output_name": args.output,
+            "selection": selection_from_args(args),
+            "features": args.where,
+        }]
+
+    positions = None
+    if args.dedupe or args.near:
+        with stage('index_shipped'):
+            positions = PositionIndex.from_puzzle_sets()
+
+    progress = ProgressBar("🔎 Searched", estimate_rows(db_file))
+    try:
+        exported = export_queries(
+            specs, db_file, args.format, args.output_dir,
+            on_chunk=progress.update, positions=positions, near=args.near,
+        )
+    except ValueError as e:
+        print(f"\n❌ ERROR: {e}")
+        sys.exit(2)
+    progress.close()
+
+    for query, candidates, output_file in exported:
+        min_rating, max_rating = query['rating_range']
+        status = f"✅ {output_file}" if output_file else "⚠️  no puzzles found"
+        print(f"  {len(candidates):4} puzzles | {query['theme_match'].upper()} {' '.join(query['themes'])} | "
+              f"{min_rating}-{max_rating} | {status}")
+
 def main():
+    args = parse_args()
+    pipeline_trace.start_from_args(args)
+    try:
+        run(args)
+    finally:
+        pipeline_trace.finish()
+
+def run(args):
     # Check if database exists
-    db_file = Path('lichess_db_puzzle.csv')
-    if not db_file.exists():
-        print("\n❌ ERROR: lichess_db_puzzle.csv not found!")
+    db_file = Path(args.db) if args.db else find_database()
+    if db_file is None or not db_file.exists():
+        print("\n❌ ERROR: lichess_db_puzzle.csv (or .csv.zst) not found!")
         print("Please download the Lichess puzzle database first.")
         print("See README.md for instructions.")
+        sys.exit(1)
+
+    if args.repl:
+        run_repl(db_file, args.format)
+        return
+
+    if args.themes or args.queries:
+        run_batch(args, db_file)
         return
 
     # Get user input
     config = get_user_input()
 
-    # Load database
-    print(f"\n📚 Loading Lichess puzzle database...")
-    df = pd.read_csv('lichess_db_puzzle.csv')
-    print(f"✅ Loaded {len(df):,} puzzles")
+    with stage('load'):
+        store = load_store(db_file, on_rebuild=lambda path: print(f"\n📦 Database changed, rebuilding {path}..."))
 
-    # Filter puzzles
-    candidates = filter_puzzles(df, config)
+    if store is not None:
+        # Memory-mapped columnar store: no CSV parsing at all
+        print(f"\n📚 Using puzzle store ({len(store):,} puzzles)")
+        candidates = filter_puzzles(store, config)
+    else:
+        # Stream the database in chunks, keeping only the top candidates
+        print(f"\n📚 Streaming Lichess puzzle database ({db_file})...")
+        print("💡 Run 'python3 puzzle_store.py' once for instant loads")
+        progress = ProgressBar("🔎 Searched", estimate_rows(db_file))
+        [(_, candidates)] = run_queries([config], db_file, on_chunk=progress.update)
+        progress.close()
 
     print(f"\n📊 RESULTS:")
     print(f"  Found: {len(candidates)} puzzles")
-    print(f"  Themes: {', '.join(config['themes'])}")
+    print(f"  Themes: {', '.join(config['themes'])} ({config['theme_match'].upper()})")
     print(f"  Rating: {config['rating_range'][0]}-{config['rating_range'][1]}")
 
     if len(candidates) == 0:
-        print("\n⚠️  No puzzles found! Try:")
-        print("  - Broadening theme list")
-        print("  - Widening rating range")
-        print("  - Using ANY match mode instead of ALL")
+        print_no_results()
         return
 
-    # Convert to format
-    puzzles = [convert_to_format(row) for _, row in candidates.iterrows()]
-
-    # Save to output
-    output_dir = Path('output')
-    output_dir.mkdir(exist_ok=True)
-
-    output_file = output_dir / f"{config['output_name']}_candidates.json"
-    with open(output_file, 'w') as f:
-        json.dump(puzzles, f, indent=2)
+    output_file = save_candidates(candidates, config['output_name'], args.format)
 
     print(f"\n✅ Saved to: {output_file}")
     print("\n📋 NEXT STEPS:")
@@ -0,0 +1,234 @@
+# tools/puzzle_importer/json_stream.py
+"""
+Streaming JSON
+--------------
+Incremental writer and reader for large candidate and puzzle-set files,
+so memory stays flat no matter how many puzzles a file holds.
+
+Output formats:
+  pretty   - same bytes as json.dump(..., indent=2) (default)
+  compact  - no indentation or spaces
+  ndjson   - one puzzle per line (a puzzle set's header goes on line 1)
+
+Reading uses ijson when it is installed and falls back to incremental
+json.JSONDecoder.raw_decode parsing otherwise; neither loads the whole
+file at once.
+"""
+
+import json
+
+try:
+    import ijson
+except ImportError:  # optional dependency
+    ijson = None
+
+FORMATS = ('pretty', 'compact', 'ndjson')
+
+# Raised when a file is malformed or only partly written
+READ_ERRORS = (ValueError, ijson.JSONError) if ijson is not None else (ValueError,)
+
+READ_SIZE = 1 << 16
+
+
+def format_extension(fmt):
+    """File extension for an output format"""
+    return '.ndjson' if fmt == 'ndjson' else '.json'
+
+
+class JsonArrayWriter:
+    """
+    Write a JSON array item by item, either bare or as the `key` field of
+    an object whose other fields are `header`:
+
+        with JsonArrayWriter(f, header={"levelId": "0001"}, key="puzzles") as out:
+            for puzzle in puzzles:
+                out.write(puzzle)
+    """
+
+    def __init__(self, f, fmt='pretty', header=None, key=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown output format '{fmt}' (expected one of {FORMATS})")
+        self.f = f
+        self.fmt = fmt
+        self.header = header
+        self.key = key
+        self.count = 0
+        # Nesting depth of the items (pretty mode indents by 2 per level)
+        self.indent = '    ' if key else '  '
+
+    def __enter__(self):
+        self._open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+    def _open(self):
+        f, fmt = self.f, self.fmt
+        if fmt == 'ndjson':
+            if self.header is not None:
+                f.write(json.dumps(self.header, separators=(',', ':')) + '\n')
+            return
+
+        if self.key is None:
+            f.write('[')
+            return
+
+        if fmt == 'compact':
+            fields = [json.dumps(k) + ':' + json.dumps(v, separators=(',', ':')) for k, v in self.header.items()]
+            f.write('{' + ''.join(field + ',' for field in fields) + json.dumps(self.key) + ':[')
+        else:
+            f.write('{\n')
+            for k, v in self.header.items():
+                f.write('  ' + json.dumps(k) + ': ' + json.dumps(v, indent=2).replace('\n', '\n  ') + ',\n')
+            f.write('  ' + json.dumps(self.key) + ': [')
+
+    def write(self, item):
+        f, fmt = self.f, self.fmt
+        if fmt == 'ndjson':
+            f.write(json.dumps(item, separators=(',', ':')) + '\n')
+        elif fmt == 'compact':
+            f.write((',' if self.count else '') + json.dumps(item, separators=(',', ':')))
+        else:
+            encoded = json.dumps(item, indent=2).replace('\n', '\n' + self.indent)
+            f.write((',\n' if self.count else '\n') + self.indent + encoded)
+        self.count += 1
+
+    def close(self):
+        f, fmt = self.f, self.fmt
+        if fmt == 'ndjson':
+            return
+        if fmt == 'compact':
+            f.write(']' if self.key is None else ']}')
+            return
+
+        closing_indent = self.indent[:-2]
+        f.write(('\n' + closing_indent if self.count else '') + ']')
+        if self.key is not None:
+            f.write('\n}')
+
+
+class _JsonReader:
+    """Buffered reads of consecutive JSON values with json.JSONDecoder.raw_decode"""
+
+    def __init__(self, f):
+        self.f = f
+        self.decoder = json.JSONDecoder()
+        self.buf = f.read(READ_SIZE)
+        self.pos = 0
+        self.eof = False
+
+    def _read(self, size=READ_SIZE):
+        more = '' if self.eof else self.f.read(size)
+        self.eof = not more
+        self.buf = self.buf[self.pos:] + more
+        self.pos = 0
+        return more
+
+    def peek(self):
+        """Next character after whitespace and commas, or '' at the end of the file"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n,':
+                self.pos += 1
+            if self.eof or len(self.buf) - self.pos >= 64:
+                break
+            self._read()
+        return self.buf[self.pos] if self.pos < len(self.buf) else ''
+
+    def take(self):
+        """Consume the character peek() returned"""
+        self.pos += 1
+
+    def value(self):
+        """Decode the next value (growing reads for values bigger than the buffer)"""
+        self.peek()
+        read_size = READ_SIZE
+        while True:
+            try:
+                item, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number or literal cut off by the buffer still decodes; read on to be sure
+                if end < len(self.buf) or self.eof:
+                    break
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            read_size *= 2
+            self._read(read_size)
+        self.pos = end
+        if self.pos > READ_SIZE:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        return item
+
+
+def _iter_array(f, reader=None):
+    """Items of a top-level JSON array (or the array `reader` is at), decoded one at a time"""
+    reader = reader or _JsonReader(f)
+    if reader.peek() != '[':
+        raise ValueError("Expected a JSON array")
+    reader.take()
+    while True:
+        char = reader.peek()
+        if not char:
+            raise ValueError("Unexpected end of JSON array")
+        if char == ']':
+            reader.take()
+            return
+        yield reader.value()
+
+
+def _iter_field(f, key):
+    """Items of the `key` array of a top-level JSON object; other fields are skipped"""
+    reader = _JsonReader(f)
+    if reader.peek() != '{':
+        raise ValueError("Expected a JSON object")
+    reader.take()
+    while True:
+        char = reader.peek()
+        if not char:
+            raise ValueError("Unexpected end of JSON object")
+        if char == '}':
+            return
+        name = reader.value()
+        if reader.peek() != ':':
+            raise ValueError(f"Expected ':' after {json.dumps(name)}")
+        reader.take()
+        if name == key:
+            yield from _iter_array(f, reader)
+            return
+        reader.value()
+
+
+def _first_char(f):
+    while True:
+        char = f.read(1)
+        if not char or not char.isspace():
+            return char
+
+
+def iter_puzzles(path):
+    """
+    Yield puzzles from a candidate file (JSON array), a puzzle set
+    ({"puzzles": [...]}) or NDJSON, without loading the whole file.
+    """
+    path = str(path)
+    with open(path, 'r') as f:
+        if path.endswith(('.ndjson', '.jsonl')):
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    # Skip a puzzle set header line
+                    if 'fen' in item or 'moveSequence' in item:
+                        yield item
+            return
+
+        first = _first_char(f)
+        f.seek(0)
+        if ijson is not None:
+            prefix = 'item' if first == '[' else 'puzzles.item'
+            yield from ijson.items(f, prefix, use_float=True)
+        elif first == '[':
+            yield from _iter_array(f)
+        else:
+            yield from _iter_field(f, 'puzzles')
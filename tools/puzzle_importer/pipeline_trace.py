@@ -0,0 +1,382 @@
+# tools/puzzle_importer/pipeline_trace.py
+"""
+Pipeline Instrumentation
+------------------------
+Opt-in stage timing for the importers and the converter. Code marks its
+stages and the active tracer (if any) records, per stage name:
+
+  calls, wall time (total and self, i.e. minus nested stages), CPU time,
+  rows in/out, and peak RSS while the stage ran
+
+    with stage('filter', rows_in=len(chunk)) as s:
+        mask = ...
+        s.add(rows_out=int(mask.sum()))
+
+    for chunk in traced(read_puzzle_chunks(path), 'load'):
+        ...
+
+With no tracer started these are near-free no-ops, so library callers
+pay nothing. The CLIs start one with:
+
+  --profile        print a per-stage table at the end
+  --trace FILE     write a Chrome trace (chrome://tracing, ui.perfetto.dev)
+  --cprofile FILE  write cProfile stats (python3 -m pstats FILE)
+
+Peak RSS is exact per stage on Linux (the kernel's high-water mark is
+reset on stage entry); elsewhere it is the process peak so far, and on
+Windows it needs psutil (shown as unavailable without it).
+"""
+
+import cProfile
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:  # optional dependency
+    psutil = None
+
+MAX_EVENTS = 100_000
+
+PROGRESS_INTERVAL = 0.1
+PROGRESS_WIDTH = 24
+
+
+# === Memory ===
+
+def current_rss():
+    """Resident set size in bytes (Linux), or None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def reset_peak_rss():
+    """Reset the RSS high-water mark; False where the OS doesn't support it"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss():
+    """RSS high-water mark in bytes, or None where it can't be measured"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        # Peak working set on Windows
+        return getattr(info, 'peak_wset', info.rss)
+    return None
+
+
+# === Stages ===
+
+class StageStats:
+    """Totals for every run of one stage name"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall = 0.0
+        self.child_wall = 0.0
+        self.cpu = 0.0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.peak_rss = None
+
+    def add(self, rows_in=0, rows_out=0):
+        self.rows_in += rows_in
+        self.rows_out += rows_out
+
+    @property
+    def self_wall(self):
+        return self.wall - self.child_wall
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'wall_seconds': round(self.wall, 6),
+            'self_seconds': round(self.self_wall, 6),
+            'cpu_seconds': round(self.cpu, 6),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'peak_rss_mb': round(self.peak_rss / 1e6, 1) if self.peak_rss is not None else None,
+        }
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add(self, rows_in=0, rows_out=0):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Run:
+    """One entry into a stage (context manager returned by Tracer.stage)"""
+
+    def __init__(self, tracer, stats, rows_in):
+        self.tracer = tracer
+        self.stats = stats
+        self.rows_in = rows_in
+
+    def add(self, rows_in=0, rows_out=0):
+        self.stats.add(rows_in, rows_out)
+
+    def __enter__(self):
+        self.tracer._enter(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer._exit(self)
+        return False
+
+
+class Tracer:
+    """Collects stage statistics, trace events and (optionally) a cProfile"""
+
+    def __init__(self, trace_file=None, cprofile_file=None):
+        self.trace_file = trace_file
+        self.cprofile_file = cprofile_file
+        self.stages = {}
+        self.events = []
+        self.stack = []
+        # Whole-run RSS high-water mark (the kernel's is reset per stage)
+        self.peak_rss = None
+        self.origin = time.perf_counter()
+        self.profiler = None
+        if cprofile_file:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stage(self, name, rows_in=0):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats(name)
+        return _Run(self, stats, rows_in)
+
+    def _note_peak(self):
+        """Credit the high-water mark so far to every open stage and the run"""
+        peak = peak_rss()
+        if peak is None:
+            return
+        self.peak_rss = max(self.peak_rss or 0, peak)
+        for run in self.stack:
+            run.stats.peak_rss = max(run.stats.peak_rss or 0, peak)
+
+    def _enter(self, run):
+        self._note_peak()
+        reset_peak_rss()
+        run.stats.calls += 1
+        run.stats.add(rows_in=run.rows_in)
+        self.stack.append(run)
+        run.cpu_start = time.process_time()
+        run.start = time.perf_counter()
+
+    def _exit(self, run):
+        wall = time.perf_counter() - run.start
+        cpu = time.process_time() - run.cpu_start
+        self._note_peak()
+        self.stack.pop()
+        run.stats.wall += wall
+        run.stats.cpu += cpu
+        if self.stack:
+            self.stack[-1].stats.child_wall += wall
+        if len(self.events) < MAX_EVENTS:
+            self.events.append({
+                'name': run.stats.name, 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                'ts': round((run.start - self.origin) * 1e6, 1), 'dur': round(wall * 1e6, 1),
+                'args': {'cpu_ms': round(cpu * 1000, 3)},
+            })
+
+    def summary(self):
+        """{stage name: StageStats.as_dict()}, in first-seen order"""
+        return {name: stats.as_dict() for name, stats in self.stages.items()}
+
+    def print_summary(self):
+        total = time.perf_counter() - self.origin
+        self._note_peak()
+        peak = f"{self.peak_rss / 1e6:.0f} MB" if self.peak_rss is not None else "unavailable"
+        print(f"\n⏱️  STAGE TIMINGS ({total:.2f}s total, peak RSS {peak})")
+        print(f"   {'stage':<16} {'calls':>7} {'wall s':>9} {'self s':>9} {'cpu s':>9} "
+              f"{'rows in':>12} {'rows out':>12} {'rows/s':>12} {'peak MB':>9}")
+        for stats in self.stages.values():
+            rows = stats.rows_in or stats.rows_out
+            rate = f"{rows / stats.wall:,.0f}" if rows and stats.wall else '-'
+            peak = f"{stats.peak_rss / 1e6:.1f}" if stats.peak_rss is not None else '-'
+            print(f"   {stats.name:<16} {stats.calls:>7,} {stats.wall:>9.3f} {stats.self_wall:>9.3f} "
+                  f"{stats.cpu:>9.3f} {stats.rows_in:>12,} {stats.rows_out:>12,} {rate:>12} "
+                  f"{peak:>9}")
+
+    def write_files(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.cprofile_file)
+            print(f"📈 cProfile stats written to {self.cprofile_file} (python3 -m pstats {self.cprofile_file})")
+        if self.trace_file:
+            with open(self.trace_file, 'w') as f:
+                json.dump({
+                    'traceEvents': self.events,
+                    'displayTimeUnit': 'ms',
+                    'otherData': {'command': ' '.join(sys.argv), 'stages': self.summary()},
+                }, f)
+            print(f"🧭 Trace written to {self.trace_file} (open in chrome://tracing or ui.perfetto.dev)")
+
+
+_active = None
+_show_summary = False
+
+
+def start(profile=False, trace_file=None, cprofile_file=None):
+    """Start recording; returns the active Tracer (None if nothing was requested)"""
+    global _active, _show_summary
+    if not (profile or trace_file or cprofile_file):
+        return None
+    _active = Tracer(trace_file, cprofile_file)
+    _show_summary = profile
+    return _active
+
+
+def finish():
+    """Stop recording, print the table (--profile) and write trace/profile files"""
+    global _active
+    tracer, _active = _active, None
+    if tracer is None:
+        return None
+    if _show_summary:
+        tracer.print_summary()
+    tracer.write_files()
+    return tracer
+
+
+def active():
+    return _active
+
+
+def stage(name, rows_in=0):
+    """Context manager timing one run of stage `name` (a no-op when not tracing)"""
+    if _active is None:
+        return _NULL_STAGE
+    return _active.stage(name, rows_in)
+
+
+def traced(iterable, name, rows=len):
+    """
+    Iterate `iterable`, timing each step as stage `name` and counting
+    rows(item) as rows out (pass rows=None to count items).
+    """
+    iterator = iter(iterable)
+    while True:
+        with stage(name) as s:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            s.add(rows_out=1 if rows is None else rows(item))
+        yield item
+
+
+def add_arguments(parser):
+    """--profile / --trace / --cprofile on an argparse parser"""
+    group = parser.add_argument_group('instrumentation')
+    group.add_argument('--profile', action='store_true', help="print wall/CPU time, rows and peak memory per stage")
+    group.add_argument('--trace', metavar='FILE', help="write a per-stage Chrome trace (JSON)")
+    group.add_argument('--cprofile', metavar='FILE', help="write cProfile stats")
+
+
+def start_from_args(args):
+    return start(args.profile, args.trace, args.cprofile)
+
+
+# === Progress ===
+
+def estimate_rows(path):
+    """Rough row count of a plain CSV from its size and first lines, or None"""
+    path = Path(path)
+    if path.suffix != '.csv':
+        return None
+    try:
+        size = path.stat().st_size
+        with open(path, 'rb') as f:
+            sample = f.read(1 << 16)
+    except OSError:
+        return None
+    lines = sample.count(b'\n')
+    if lines < 2:
+        return None
+    return max(0, int(size / (len(sample) / lines)) - 1)
+
+
+class ProgressBar:
+    """
+    Live one-line progress: count, rate and (when the total is known) a
+    bar, percentage and ETA. Call update(done) as often as you like.
+    """
+
+    def __init__(self, label, total=None, unit='puzzles', stream=None):
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.stream = stream or sys.stdout
+        self.start = time.perf_counter()
+        self.last_draw = 0.0
+        self.done = 0
+
+    def update(self, done):
+        self.done = done
+        now = time.perf_counter()
+        if now - self.last_draw >= PROGRESS_INTERVAL:
+            self.last_draw = now
+            self._draw(now)
+
+    def _draw(self, now):
+        elapsed = max(now - self.start, 1e-9)
+        rate = self.done / elapsed
+        line = f"\r{self.label} {self.done:,} {self.unit} ({rate:,.0f}/s"
+        if self.total:
+            fraction = min(1.0, self.done / self.total)
+            filled = int(fraction * PROGRESS_WIDTH)
+            remaining = (self.total - self.done) / rate if rate and self.done < self.total else 0
+            line = (f"\r{self.label} [{'█' * filled}{'░' * (PROGRESS_WIDTH - filled)}] {fraction:4.0%} "
+                    f"{self.done:,} {self.unit} ({rate:,.0f}/s, ~{remaining:.0f}s left")
+        self.stream.write(line + ")   ")
+        self.stream.flush()
+
+    def close(self):
+        """Draw the final state and end the line (nothing if nothing was counted)"""
+        if not self.done:
+            return
+        if self.total:
+            # Totals are often estimates; finishing means 100%
+            self.total = self.done
+        self._draw(time.perf_counter())
+        self.stream.write('\n')
+        self.stream.flush()
@@ -0,0 +1,247 @@
+# tools/puzzle_importer/puzzle_db.py
+"""
+Lichess Puzzle Database Access
+------------------------------
+Shared loading helpers for the puzzle importers.
+
+The Lichess dump has 4M+ rows, so instead of reading it in one go with
+pd.read_csv we stream it in bounded chunks and only ever keep the best
+candidates for each query in memory.
+
+Filters work on either a pandas DataFrame (e.g. a streamed chunk) or a
+memory-mapped PuzzleStore (see puzzle_store.py); match_themes and
+top_by_popularity hide the difference.
+"""
+
+import json
+from json.encoder import encode_basestring_ascii
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from json_stream import JsonArrayWriter
+from pipeline_trace import stage, traced
+from selection import select as select_rows
+from theme_bits import encode_themes, known_vocabulary, theme_mask
+
+# Columns the importers actually use (GameUrl and OpeningTags are skipped)
+PUZZLE_COLUMNS = [
+    'PuzzleId', 'FEN', 'Moves', 'Rating', 'RatingDeviation',
+    'Popularity', 'NbPlays', 'Themes',
+]
+
+PUZZLE_DTYPES = {
+    'PuzzleId': 'str',
+    'FEN': 'str',
+    'Moves': 'str',
+    'Rating': 'int32',
+    'RatingDeviation': 'int32',
+    'Popularity': 'int32',
+    'NbPlays': 'int32',
+    'Themes': 'str',
+}
+
+# Lichess distributes the database zstd-compressed; pandas reads both
+DATABASE_FILES = ['lichess_db_puzzle.csv', 'lichess_db_puzzle.csv.zst']
+
+CHUNK_SIZE = 200_000
+
+
+def find_database(directory='.'):
+    """Return the path of the Lichess database in `directory`, or None"""
+    for name in DATABASE_FILES:
+        path = Path(directory) / name
+        if path.exists():
+            return path
+    return None
+
+
+def read_puzzle_chunks(db_path, chunksize=CHUNK_SIZE):
+    """Yield the puzzle database as DataFrames of at most `chunksize` rows"""
+    reader = pd.read_csv(
+        db_path,
+        usecols=PUZZLE_COLUMNS,
+        dtype=PUZZLE_DTYPES,
+        keep_default_na=False,
+        chunksize=chunksize,
+    )
+    with reader:
+        yield from reader
+
+
+def theme_view(source):
+    """(bits, vocabulary) for a DataFrame or PuzzleStore, tokenizing once"""
+    if not isinstance(source, pd.DataFrame):
+        return source.theme_bits, source.vocabulary
+
+    with stage('tokenize', rows_in=len(source)):
+        vocabulary = known_vocabulary()
+        return encode_themes(source['Themes'], vocabulary), vocabulary
+
+
+def match_themes(source, themes, mode='any', view=None):
+    """
+    Boolean mask of puzzles whose Themes include ANY/ALL/NONE of `themes`.
+
+    Themes are matched as whole tokens via the theme bitset, so `mate`
+    does not match `mateIn1`. Pass a `view` from theme_view() to reuse one
+    tokenization across several queries on the same source.
+    """
+    bits, vocabulary = view or theme_view(source)
+    mask = theme_mask(bits, vocabulary, themes, mode)
+    if isinstance(source, pd.DataFrame):
+        return pd.Series(mask, index=source.index)
+    return mask
+
+
+def top_by_popularity(source, limit, mask=None):
+    """
+    Most popular `limit` rows (optionally only where `mask` is set) as a
+    DataFrame, ties kept in database order. Uses a partial selection, so
+    it costs O(n) rather than a full sort (see selection.py).
+    """
+    with stage('top_n') as s:
+        top = select_rows(source, limit, mask)
+        s.add(rows_in=len(source) if mask is None else int(np.count_nonzero(mask)), rows_out=len(top))
+        return top
+
+
+def stream_selected(db_path, select, limits, chunksize=CHUNK_SIZE, on_chunk=None, reduce=None):
+    """
+    Single streaming pass routing every chunk to several bounded top-N lists.
+
+    `select(chunk)` returns {key: candidates DataFrame} for one chunk and
+    the best `limits[key]` rows by Popularity are kept per key, so peak
+    memory depends on chunksize and the limits rather than on the size
+    of the database. Pass `reduce(key, frame)` to keep something other
+    than the Popularity top-N (e.g. selection.candidate_pool).
+
+    Returns (results, total_rows) where results maps key -> DataFrame.
+    """
+    best = {key: None for key in limits}
+    total_rows = 0
+
+    for chunk in traced(read_puzzle_chunks(db_path, chunksize), 'load'):
+        total_rows += len(chunk)
+
+        with stage('select', rows_in=len(chunk)):
+            selected = select(chunk)
+
+        for key, matches in selected.items():
+            if len(matches) == 0:
+                continue
+            if best[key] is not None:
+                matches = pd.concat([best[key], matches])
+            if reduce is None:
+                best[key] = top_by_popularity(matches, limits[key])
+            else:
+                best[key] = reduce(key, matches)
+
+        if on_chunk:
+            on_chunk(total_rows)
+
+    results = {
+        key: frame if frame is not None else pd.DataFrame(columns=PUZZLE_COLUMNS)
+        for key, frame in best.items()
+    }
+    return results, total_rows
+
+
+def stream_candidates(db_path, queries, chunksize=CHUNK_SIZE, on_chunk=None):
+    """
+    Run several filters over the database in a single streaming pass.
+
+    `queries` maps a key (e.g. a level id) to a tuple of
+    (filter_fn, max_candidates); `filter_fn(chunk)` is applied to every
+    chunk. See stream_selected().
+    """
+    def select(chunk):
+        return {key: filter_fn(chunk) for key, (filter_fn, _) in queries.items()}
+
+    limits = {key: limit for key, (_, limit) in queries.items()}
+    return stream_selected(db_path, select, limits, chunksize, on_chunk)
+
+
+def first_hints(themes, theme_hints, default="Find the best move"):
+    """
+    Hint for each puzzle: the hint of its first theme found in
+    `theme_hints`, else `default`. `themes` is a Series of token lists.
+    """
+    tokens = themes.reset_index(drop=True).explode()
+    hints = tokens.map(theme_hints).dropna().groupby(level=0).first()
+    return hints.reindex(range(len(themes)), fill_value=default)
+
+
+def candidate_columns(candidates, theme_hints):
+    """
+    Columnar version of the importers' per-row convert_to_format: derive
+    every export field for the whole candidate frame at once.
+    Returns {field: list of values} in export key order.
+    """
+    puzzle_ids = candidates['PuzzleId']
+    themes = candidates['Themes'].str.split()
+
+    return {
+        "id": ('puzzle_' + puzzle_ids).tolist(),
+        "fen": candidates['FEN'].tolist(),
+        "moveSequence": candidates['Moves'].str.split().tolist(),
+        "themes": themes.tolist(),
+        "rating": candidates['Rating'].astype('int64').tolist(),
+        "popularity": candidates['Popularity'].astype('int64').tolist(),
+        "lichess_url": ('https://lichess.org/training/' + puzzle_ids).tolist(),
+        "hint": first_hints(themes, theme_hints).tolist(),
+    }
+
+
+def candidate_records(candidates, theme_hints):
+    """Export dicts for a candidate frame (see candidate_columns)"""
+    columns = candidate_columns(candidates, theme_hints)
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+def _encode_column(values):
+    # Pre-encode one column exactly as json.dump(..., indent=2) would
+    # inside a list of objects (values sit at indent level 2)
+    if values and isinstance(values[0], list):
+        return [
+            '[\n      ' + ',\n      '.join(map(encode_basestring_ascii, items)) + '\n    ]'
+            if items else '[]'
+            for items in values
+        ]
+    if values and isinstance(values[0], str):
+        return [encode_basestring_ascii(value) for value in values]
+    return [json.dumps(value) for value in values]
+
+
+def write_candidates_json(f, columns, fmt='pretty'):
+    """
+    Write a list of export records straight from candidate_columns(), one
+    record at a time. The default pretty format is byte-identical to
+    json.dump(candidate_records(...), f, indent=2) without going through
+    the slow pure-Python indent encoder; 'compact' and 'ndjson' go through
+    json_stream.JsonArrayWriter.
+    """
+    if fmt != 'pretty':
+        keys = list(columns)
+        with JsonArrayWriter(f, fmt) as out:
+            for values in zip(*columns.values()):
+                out.write(dict(zip(keys, values)))
+        return
+
+    if not columns or not next(iter(columns.values())):
+        f.write('[]')
+        return
+
+    prefixes = [f'    {encode_basestring_ascii(key)}: ' for key in columns]
+    encoded = [_encode_column(values) for values in columns.values()]
+
+    f.write('[\n')
+    for i, fields in enumerate(zip(*encoded)):
+        if i:
+            f.write(',\n')
+        f.write('  {\n')
+        f.write(',\n'.join(prefix + field for prefix, field in zip(prefixes, fields)))
+        f.write('\n  }')
+    f.write('\n]')
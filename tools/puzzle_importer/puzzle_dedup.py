@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# tools/puzzle_importer/puzzle_dedup.py
+"""
+Position Deduplication
+----------------------
+Keys every puzzle by the position the user actually sees - the FEN after
+the opponent's first move - so the same position can't ship twice:
+
+  position key   Zobrist hash of that position (same values as
+                 chess.polyglot.zobrist_hash, computed straight from the
+                 FEN string, several times faster than a chess.Board)
+  signature      looser near-duplicate key: material, both king squares
+                 and the shape of the solution moves (file/rank deltas),
+                 seen from the user's side so colour-reversed copies of a
+                 pattern collide too
+
+PositionIndex holds both keys for every shipped puzzle set (and anything
+added to it) in dicts, so each lookup is O(1) however many candidates
+are checked.
+
+Usage:
+  python3 puzzle_dedup.py                      # duplicates among shipped sets
+  python3 puzzle_dedup.py output/*.json        # candidates vs shipped sets and each other
+  python3 puzzle_dedup.py FILE... --near       # also report near-duplicates
+"""
+
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+
+from chess.polyglot import POLYGLOT_RANDOM_ARRAY
+
+from json_stream import iter_puzzles
+from validate_candidates import puzzle_moves
+
+PUZZLES_DIR = Path(__file__).resolve().parent.parent.parent / 'assets' / 'data' / 'puzzles'
+
+# Polyglot piece kinds: black pawn, white pawn, black knight, ...
+PIECE_KINDS = {piece: kind for kind, piece in enumerate('pPnNbBrRqQkK')}
+CASTLING_KEYS = {'K': 768, 'Q': 769, 'k': 770, 'q': 771}
+EN_PASSANT_KEY = 772
+TURN_KEY = 780
+
+# Castling rights lost when a piece moves from or to these squares
+CASTLING_SQUARES = {4: 'KQ', 7: 'K', 0: 'Q', 60: 'kq', 63: 'k', 56: 'q'}
+
+# Importers pool this many times max_candidates when deduplicating so
+# dropping duplicates still leaves a full candidate list
+DEDUPE_OVERSAMPLE = 2
+
+# Kinds of duplicate, strongest first
+EXACT = 'position'
+NEAR = 'near'
+
+
+def _square(name):
+    return (ord(name[0]) - ord('a')) + 8 * (int(name[1]) - 1)
+
+
+def parse_fen(fen):
+    """FEN -> ({square: piece letter}, white_to_move, castling, ep_square)"""
+    fields = fen.split()
+    board = {}
+    square = 56
+    for char in fields[0]:
+        if char == '/':
+            square -= 16
+        elif char.isdigit():
+            square += int(char)
+        else:
+            board[square] = char
+            square += 1
+
+    castling = fields[2] if len(fields) > 2 and fields[2] != '-' else ''
+    ep_square = _square(fields[3]) if len(fields) > 3 and fields[3] != '-' else None
+    return board, len(fields) < 2 or fields[1] == 'w', castling, ep_square
+
+
+def push_uci(board, castling, ep_square, uci):
+    """
+    Play a UCI move on a parse_fen() board in place (no legality check).
+    Returns (white_to_move, castling, ep_square) after the move.
+    """
+    start, target = _square(uci[:2]), _square(uci[2:4])
+    piece = board.pop(start, None)
+    if piece is None:
+        raise ValueError(f"No piece on {uci[:2]} for move {uci}")
+    white = piece.isupper()
+    kind = piece.lower()
+
+    captured = board.pop(target, None)
+    if kind == 'p' and target == ep_square and captured is None:
+        board.pop(target - 8 if white else target + 8, None)
+    if kind == 'k' and abs(target - start) == 2:
+        rook_from, rook_to = (start + 3, start + 1) if target > start else (start - 4, start - 1)
+        rook = board.pop(rook_from, None)
+        if rook:
+            board[rook_to] = rook
+    if len(uci) > 4:
+        piece = uci[4].upper() if white else uci[4].lower()
+    board[target] = piece
+
+    for square in (start, target):
+        for right in CASTLING_SQUARES.get(square, ''):
+            castling = castling.replace(right, '')
+
+    ep_square = None
+    if kind == 'p' and abs(target - start) == 16:
+        # Only hashed when an enemy pawn could capture (polyglot rule)
+        enemy = 'p' if white else 'P'
+        file = target % 8
+        if (file > 0 and board.get(target - 1) == enemy) or (file < 7 and board.get(target + 1) == enemy):
+            ep_square = (start + target) // 2
+
+    return not white, castling, ep_square
+
+
+def zobrist(board, white_to_move, castling, ep_square):
+    """Polyglot Zobrist hash of a parse_fen() position"""
+    key = 0
+    for square, piece in board.items():
+        key ^= POLYGLOT_RANDOM_ARRAY[64 * PIECE_KINDS[piece] + square]
+    for right in castling:
+        key ^= POLYGLOT_RANDOM_ARRAY[CASTLING_KEYS[right]]
+    if ep_square is not None:
+        key ^= POLYGLOT_RANDOM_ARRAY[EN_PASSANT_KEY + ep_square % 8]
+    if white_to_move:
+        key ^= POLYGLOT_RANDOM_ARRAY[TURN_KEY]
+    return key
+
+
+def _move_shape(uci, flip):
+    file_delta = ord(uci[2]) - ord(uci[0])
+    rank_delta = int(uci[3]) - int(uci[1])
+    return f"{file_delta:+d}{-rank_delta if flip else rank_delta:+d}{uci[4:]}"
+
+
+def position_keys(fen, moves):
+    """
+    (position key, near-duplicate signature) of the position after the
+    opponent's first move. Raises ValueError for unusable FENs/moves.
+    """
+    try:
+        board, white_to_move, castling, ep_square = parse_fen(fen)
+        if moves:
+            white_to_move, castling, ep_square = push_uci(board, castling, ep_square, moves[0])
+    except (IndexError, KeyError) as e:
+        raise ValueError(f"Unusable position: {fen} {moves[:1]}") from e
+
+    key = zobrist(board, white_to_move, castling, ep_square)
+
+    # Signature from the user's side: flip ranks and colours when the user is black
+    flip = not white_to_move
+    material = Counter(piece.swapcase() if flip else piece for piece in board.values())
+    kings = {
+        (piece.swapcase() if flip else piece): (square ^ 56 if flip else square)
+        for square, piece in board.items() if piece in 'Kk'
+    }
+    signature = '|'.join((
+        ''.join(f"{piece}{material[piece]}" for piece in 'KQRBNPkqrbnp' if material[piece]),
+        f"{kings.get('K', '-')},{kings.get('k', '-')}",
+        ' '.join(_move_shape(uci, flip) for uci in moves[1:]),
+    ))
+    return key, signature
+
+
+class PositionIndex:
+    """O(1) lookup of position keys and signatures -> (source, puzzle id)"""
+
+    def __init__(self):
+        self.positions = {}
+        self.signatures = {}
+
+    @classmethod
+    def from_puzzle_sets(cls, puzzles_dir=PUZZLES_DIR):
+        """Index every shipped puzzle_set_*.json"""
+        index = cls()
+        for path in sorted(Path(puzzles_dir).glob('puzzle_set_*.json')):
+            for puzzle in iter_puzzles(path):
+                index.check_puzzle(puzzle, path.name)
+        return index
+
+    def copy(self):
+        index = PositionIndex()
+        index.positions = dict(self.positions)
+        index.signatures = dict(self.signatures)
+        return index
+
+    def find(self, keys, near=False):
+        """(kind, source, puzzle id) of an indexed duplicate, or None"""
+        key, signature = keys
+        if key in self.positions:
+            return (EXACT, *self.positions[key])
+        if near and signature in self.signatures:
+            return (NEAR, *self.signatures[signature])
+        return None
+
+    def add(self, keys, source, puzzle_id):
+        key, signature = keys
+        self.positions.setdefault(key, (source, puzzle_id))
+        self.signatures.setdefault(signature, (source, puzzle_id))
+
+    def check(self, fen, moves, source, puzzle_id, near=False):
+        """
+        Look a puzzle up and index it if it is new. Returns the duplicate
+        found (see find()) or None. Unusable positions are never duplicates.
+        """
+        try:
+            keys = position_keys(fen, moves)
+        except ValueError:
+            return None
+        duplicate = self.find(keys, near)
+        if duplicate is None:
+            self.add(keys, source, puzzle_id)
+        return duplicate
+
+    def check_puzzle(self, puzzle, source, near=False):
+        """check() for a candidate or app-format puzzle dict"""
+        return self.check(puzzle['fen'], puzzle_moves(puzzle), source, puzzle.get('id'), near)
+
+
+def dedupe_frame(candidates, index, source, near=False, limit=None, pick=None):
+    """
+    Drop candidates (a DataFrame with PuzzleId/FEN/Moves, best first) whose
+    position is already in `index`, keeping the first `limit` survivors and
+    adding them to the index. Returns (kept, [(PuzzleId, duplicate), ...]).
+
+    With `pick` (e.g. a stratified select() of the real limit) the whole
+    candidate pool is deduplicated first and only the rows pick() returns
+    from the survivors are kept and indexed.
+    """
+    seen = index.copy() if pick is not None else index
+    keep = []
+    duplicates = []
+    for row, (puzzle_id, fen, moves) in enumerate(zip(candidates['PuzzleId'], candidates['FEN'], candidates['Moves'])):
+        if pick is None and limit is not None and len(keep) >= limit:
+            break
+        duplicate = seen.check(fen, moves.split(), source, f"puzzle_{puzzle_id}", near)
+        if duplicate is None:
+            keep.append(row)
+        else:
+            duplicates.append((puzzle_id, duplicate))
+    kept = candidates.iloc[keep]
+    if pick is None:
+        return kept, duplicates
+
+    kept = pick(kept)
+    for puzzle_id, fen, moves in zip(kept['PuzzleId'], kept['FEN'], kept['Moves']):
+        index.check(fen, moves.split(), source, f"puzzle_{puzzle_id}")
+    return kept, duplicates
+
+def main():
+    parser = argparse.ArgumentParser(description="Find repeated positions across puzzle sets and candidate files")
+    parser.add_argument('files', nargs='*', help="candidate files or puzzle sets to check (default: shipped sets only)")
+    parser.add_argument('--near', action='store_true', help="also report near-duplicates (same signature)")
+    parser.add_argument('--puzzles-dir', default=str(PUZZLES_DIR), help="shipped puzzle sets (default: assets/data/puzzles)")
+    args = parser.parse_args()
+
+    checked = {Path(file).resolve() for file in args.files}
+    shipped = [path for path in sorted(Path(args.puzzles_dir).glob('puzzle_set_*.json')) if path.resolve() not in checked]
+
+    index = PositionIndex()
+    found = 0
+    total = 0
+    for path in shipped + [Path(file) for file in args.files]:
+        for puzzle in iter_puzzles(path):
+            total += 1
+            duplicate = index.check_puzzle(puzzle, path.name, args.near)
+            if duplicate:
+                found += 1
+                kind, source, other_id = duplicate
+                print(f"🔁 {path.name}:{puzzle.get('id')} - {kind} duplicate of {source}:{other_id}")
+
+    status = "✅" if not found else "⚠️ "
+    print(f"\n{status} {found} duplicates in {total} puzzles")
+    sys.exit(1 if found else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# tools/puzzle_importer/puzzle_delta.py
+"""
+Incremental Dump Ingest
+-----------------------
+Lichess publishes a fresh lichess_db_puzzle.csv every month. Instead of
+re-importing and re-reviewing 4M puzzles, this compares the new dump with
+the one ingested last time and writes only what changed:
+
+  lichess_db_puzzle.ingest/        snapshot of the last ingested dump
+    meta.json                      source, size/mtime, rows, tolerances
+    puzzle_key.npy                 uint64 PuzzleId (8 ASCII bytes, big-endian), sorted
+    position.npy                   uint64 hash of FEN + Moves
+    themes.npy                     uint64 hash of Themes
+    rating.npy                     int16
+    popularity.npy                 int8
+
+The new dump is streamed in chunks. Each chunk is sorted by PuzzleId and
+merged against the sorted snapshot with binary searches, so nothing is
+joined in memory: a puzzle is `added` if its id isn't in the snapshot,
+`changed` if its position or themes hash differs or its rating/popularity
+moved by more than the tolerance, and every snapshot id never seen is
+`removed`. Only those rows are kept. Ratings and popularity within the
+tolerance keep their snapshot values, so slow drift still gets reported
+once it adds up.
+
+The delta (output/delta_<date>.json) holds added and changed puzzles in
+the importers' candidate format, removed ids, and which shipped
+puzzle_set_XXXX.json files contain changed or removed puzzles. Added and
+changed puzzles are also written as a plain candidates file
+(delta_<date>_candidates.json) for the review UI and validation. The
+first run only records the baseline.
+
+Usage:
+  python3 puzzle_delta.py                          # database found here
+  python3 puzzle_delta.py NEW_DUMP [-o delta.json]
+  python3 puzzle_delta.py --rating-tolerance 50 --popularity-tolerance 5
+  python3 puzzle_delta.py --dry-run                # don't advance the snapshot
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from import_puzzles_interactive import THEME_HINTS
+from puzzle_db import candidate_records, find_database, read_puzzle_chunks
+from puzzle_store import source_signature
+
+SNAPSHOT_VERSION = 1
+
+DELTA = {
+    "rating_tolerance": 0,
+    "popularity_tolerance": 0,
+}
+
+SNAPSHOT_COLUMNS = {
+    'puzzle_key': np.uint64,
+    'position': np.uint64,
+    'themes': np.uint64,
+    'rating': np.int16,
+    'popularity': np.int8,
+}
+
+KEY_BYTES = 8
+OUTPUT_DIR = Path('output')
+PUZZLES_DIR = Path(__file__).resolve().parent.parent.parent / 'assets' / 'data' / 'puzzles'
+
+
+def snapshot_path_for(db_path):
+    """lichess_db_puzzle.csv(.zst) -> lichess_db_puzzle.ingest"""
+    db_path = Path(db_path)
+    return db_path.parent / (db_path.name.split('.')[0] + '.ingest')
+
+
+def puzzle_keys(puzzle_ids):
+    """PuzzleIds as uint64 that sort like the ids; raises ValueError for ids longer than 8 bytes"""
+    ids = np.asarray(puzzle_ids, dtype=object).astype('S')
+    if ids.dtype.itemsize > KEY_BYTES:
+        raise ValueError(f"PuzzleId longer than {KEY_BYTES} characters")
+    return ids.astype(f'S{KEY_BYTES}').view('>u8').astype(np.uint64)
+
+
+def key_ids(keys):
+    """Inverse of puzzle_keys()"""
+    raw = np.asarray(keys, dtype=np.uint64).astype('>u8').view(f'S{KEY_BYTES}')
+    return [value.decode('ascii') for value in raw]
+
+
+def chunk_columns(chunk):
+    """Snapshot columns for one chunk of the dump, in chunk order"""
+    return {
+        'puzzle_key': puzzle_keys(chunk['PuzzleId']),
+        'position': pd.util.hash_pandas_object(chunk[['FEN', 'Moves']], index=False).to_numpy(),
+        'themes': pd.util.hash_pandas_object(chunk['Themes'], index=False).to_numpy(),
+        'rating': chunk['Rating'].to_numpy(dtype=np.int16),
+        'popularity': chunk['Popularity'].to_numpy(dtype=np.int8),
+    }
+
+
+def load_snapshot(snapshot_dir):
+    """(meta, {column: array}) of a snapshot, or None if there is none"""
+    snapshot_dir = Path(snapshot_dir)
+    meta_file = snapshot_dir / 'meta.json'
+    if not meta_file.exists():
+        return None
+    with open(meta_file) as f:
+        meta = json.load(f)
+    if meta.get('version') != SNAPSHOT_VERSION:
+        return None
+    return meta, {name: np.load(snapshot_dir / f"{name}.npy") for name in SNAPSHOT_COLUMNS}
+
+
+def write_snapshot(snapshot_dir, columns, meta):
+    """Write a snapshot (columns already sorted by puzzle_key) atomically"""
+    snapshot_dir = Path(snapshot_dir)
+    tmp_dir = snapshot_dir.with_name(snapshot_dir.name + '.tmp')
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+    for name, dtype in SNAPSHOT_COLUMNS.items():
+        np.save(tmp_dir / f"{name}.npy", np.asarray(columns[name], dtype=dtype))
+    with open(tmp_dir / 'meta.json', 'w') as f:
+        json.dump(dict(meta, version=SNAPSHOT_VERSION), f, indent=2)
+    if snapshot_dir.exists():
+        shutil.rmtree(snapshot_dir)
+    os.replace(tmp_dir, snapshot_dir)
+
+
+def diff_dump(db_path, snapshot=None, delta=DELTA, on_chunk=None):
+    """
+    Stream `db_path` and merge it against `snapshot` (a load_snapshot()
+    columns dict, or None for a first ingest). Returns a dict with:
+
+      added      DataFrame of new puzzles (dump columns)
+      changed    DataFrame of changed puzzles plus `changes` (list of
+                 position/themes/rating/popularity) and the snapshot's
+                 `previous_rating` / `previous_popularity`
+      removed    sorted uint64 keys of snapshot puzzles missing from the dump
+      columns    the next snapshot, sorted by puzzle_key
+      rows       puzzles in the dump
+      duplicates rows whose PuzzleId appeared earlier in the dump
+    """
+    old = snapshot
+    seen = np.zeros(len(old['puzzle_key']), dtype=bool) if old is not None else None
+    parts = {name: [] for name in SNAPSHOT_COLUMNS}
+    added, changed = [], []
+    rows = 0
+
+    for chunk in read_puzzle_chunks(db_path):
+        columns = chunk_columns(chunk)
+        order = np.argsort(columns['puzzle_key'], kind='stable')
+        columns = {name: values[order] for name, values in columns.items()}
+        chunk = chunk.iloc[order]
+        rows += len(chunk)
+
+        if old is not None:
+            # Sorted chunk against the sorted snapshot: one binary search per row
+            slots = np.searchsorted(old['puzzle_key'], columns['puzzle_key'])
+            found = slots < len(old['puzzle_key'])
+            found[found] = old['puzzle_key'][slots[found]] == columns['puzzle_key'][found]
+            hits = slots[found]
+            seen[hits] = True
+
+            position = old['position'][hits] != columns['position'][found]
+            themes = old['themes'][hits] != columns['themes'][found]
+            rating_drift = np.abs(old['rating'][hits].astype(np.int32) - columns['rating'][found])
+            popularity_drift = np.abs(old['popularity'][hits].astype(np.int32) - columns['popularity'][found])
+            rating = rating_drift > delta['rating_tolerance']
+            popularity = popularity_drift > delta['popularity_tolerance']
+            dirty = position | themes | rating | popularity
+
+            # Ratings/popularity within the tolerance keep their last ingested values
+            for name, moved in (('rating', rating), ('popularity', popularity)):
+                kept = columns[name][found]
+                kept[~moved] = old[name][hits][~moved]
+                columns[name][found] = kept
+
+            if (~found).any():
+                added.append(chunk[~found])
+            if dirty.any():
+                frame = chunk[found][dirty].copy()
+                flags = zip(position[dirty], themes[dirty], rating[dirty], popularity[dirty])
+                frame['changes'] = [
+                    [name for name, flag in zip(('position', 'themes', 'rating', 'popularity'), row) if flag]
+                    for row in flags
+                ]
+                frame['previous_rating'] = old['rating'][hits][dirty].astype(np.int64)
+                frame['previous_popularity'] = old['popularity'][hits][dirty].astype(np.int64)
+                changed.append(frame)
+
+        for name in SNAPSHOT_COLUMNS:
+            parts[name].append(columns[name])
+        if on_chunk:
+            on_chunk(rows)
+
+    columns = {
+        name: np.concatenate(values) if values else np.zeros(0, dtype=SNAPSHOT_COLUMNS[name])
+        for name, values in parts.items()
+    }
+    order = np.argsort(columns['puzzle_key'], kind='stable')
+    keys = columns['puzzle_key'][order]
+    # A PuzzleId listed twice keeps its first row, so every key is unique
+    unique = np.ones(len(keys), dtype=bool)
+    unique[1:] = keys[1:] != keys[:-1]
+    columns = {name: values[order][unique] for name, values in columns.items()}
+
+    return {
+        "added": pd.concat(added) if added else None,
+        "changed": pd.concat(changed) if changed else None,
+        "removed": old['puzzle_key'][~seen] if old is not None else np.zeros(0, dtype=np.uint64),
+        "columns": columns,
+        "rows": rows,
+        "duplicates": int((~unique).sum()),
+    }
+
+
+def shipped_sets(puzzles_dir=PUZZLES_DIR):
+    """{puzzle id: set file name} for the shipped sets (index.json, else the sets themselves)"""
+    index_file = Path(puzzles_dir) / 'index.json'
+    if index_file.exists():
+        with open(index_file) as f:
+            return json.load(f)
+    index = {}
+    for set_file in sorted(Path(puzzles_dir).glob('puzzle_set_*.json')):
+        with open(set_file) as f:
+            for puzzle in json.load(f).get('puzzles', []):
+                index.setdefault(puzzle.get('id'), set_file.name)
+    return index
+
+
+def affected_sets(changed, removed, index):
+    """{set file: [{id, change, ...}]} for shipped puzzles that changed or disappeared"""
+    affected = {}
+    for puzzle in changed:
+        if puzzle['id'] in index:
+            affected.setdefault(index[puzzle['id']], []).append({
+                "id": puzzle['id'],
+                "change": "changed",
+                "fields": puzzle['changes'],
+                "rating": [puzzle['previous']['rating'], puzzle['rating']],
+                "popularity": [puzzle['previous']['popularity'], puzzle['popularity']],
+            })
+    for puzzle_id in removed:
+        if puzzle_id in index:
+            affected.setdefault(index[puzzle_id], []).append({"id": puzzle_id, "change": "removed"})
+    return dict(sorted(affected.items()))
+
+
+def delta_records(result):
+    """(added, changed, removed) in candidate format from a diff_dump() result"""
+    added = candidate_records(result['added'], THEME_HINTS) if result['added'] is not None else []
+    changed = []
+    if result['changed'] is not None:
+        frame = result['changed']
+        for record, changes, rating, popularity in zip(
+                candidate_records(frame, THEME_HINTS), frame['changes'],
+                frame['previous_rating'].tolist(), frame['previous_popularity'].tolist()):
+            record['changes'] = changes
+            record['previous'] = {"rating": rating, "popularity": popularity}
+            changed.append(record)
+    removed = ['puzzle_' + puzzle_id for puzzle_id in key_ids(result['removed'])]
+    return added, changed, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest only what changed in a new Lichess puzzle dump")
+    parser.add_argument('db', nargs='?', metavar='NEW_DUMP', help="lichess_db_puzzle.csv(.zst) (default: the one found here)")
+    parser.add_argument('-o', '--output', help="delta file (default: output/delta_<date>.json)")
+    parser.add_argument('--snapshot', help="snapshot directory (default: next to the dump, *.ingest)")
+    parser.add_argument('--rating-tolerance', type=int, default=DELTA['rating_tolerance'],
+                        help=f"rating change reported as a change (default: more than {DELTA['rating_tolerance']})")
+    parser.add_argument('--popularity-tolerance', type=int, default=DELTA['popularity_tolerance'],
+                        help=f"popularity change reported as a change (default: more than {DELTA['popularity_tolerance']})")
+    parser.add_argument('--dry-run', action='store_true', help="write the delta but keep the previous snapshot")
+    args = parser.parse_args()
+
+    db_path = Path(args.db) if args.db else find_database()
+    if db_path is None or not db_path.exists():
+        print("❌ ERROR: lichess_db_puzzle.csv (or .csv.zst) not found!")
+        sys.exit(1)
+
+    snapshot_dir = Path(args.snapshot) if args.snapshot else snapshot_path_for(db_path)
+    delta = dict(DELTA, rating_tolerance=args.rating_tolerance, popularity_tolerance=args.popularity_tolerance)
+    signature = source_signature(db_path)
+    snapshot = load_snapshot(snapshot_dir)
+
+    if snapshot is not None:
+        meta = snapshot[0]
+        if all(meta.get(key) == value for key, value in signature.items()) and meta.get('delta') == delta:
+            print(f"✅ {db_path} is the dump ingested on {meta['ingested']}: nothing to do")
+            return
+        print(f"🔍 Comparing {db_path} with the dump ingested on {meta['ingested']} ({meta['rows']:,} puzzles)...")
+    else:
+        print(f"📸 No snapshot in {snapshot_dir}: recording {db_path} as the baseline...")
+
+    start = time.perf_counter()
+    try:
+        result = diff_dump(
+            db_path, snapshot[1] if snapshot else None, delta,
+            on_chunk=lambda rows: print(f"\r   Compared {rows:,} puzzles...", end="", flush=True),
+        )
+    except ValueError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    print()
+    if result['duplicates']:
+        print(f"⚠️  {result['duplicates']:,} repeated PuzzleIds: only the first row of each is kept")
+
+    new_meta = {
+        "source": db_path.name,
+        **signature,
+        "rows": result['rows'],
+        "ingested": date.today().isoformat(),
+        "delta": delta,
+    }
+
+    if snapshot is None:
+        write_snapshot(snapshot_dir, result['columns'], new_meta)
+        print(f"✅ Baseline of {result['rows']:,} puzzles written to {snapshot_dir} ({elapsed:.1f}s)")
+        return
+
+    added, changed, removed = delta_records(result)
+    affected = affected_sets(changed, removed, shipped_sets())
+
+    output_file = Path(args.output) if args.output else OUTPUT_DIR / f"delta_{date.today().isoformat()}.json"
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w') as f:
+        json.dump({
+            "source": db_path.name,
+            "baseline": {key: snapshot[0][key] for key in ('source', 'rows', 'ingested')},
+            "rows": result['rows'],
+            "delta": delta,
+            "affected": affected,
+            "added": added,
+            "changed": changed,
+            "removed": removed,
+        }, f, indent=2)
+
+    candidates_file = output_file.with_name(f"{output_file.stem}_candidates.json")
+    with open(candidates_file, 'w') as f:
+        json.dump(added + changed, f, indent=2)
+
+    if not args.dry_run:
+        write_snapshot(snapshot_dir, result['columns'], new_meta)
+
+    print("\n📊 DELTA")
+    print(f"   Added:   {len(added):,}")
+    print(f"   Changed: {len(changed):,}")
+    print(f"   Removed: {len(removed):,}")
+    print(f"   Unchanged: {result['rows'] - len(added) - len(changed):,} of {result['rows']:,} ({elapsed:.1f}s)")
+    if affected:
+        print("\n⚠️  Shipped sets affected:")
+        for set_file, puzzles in affected.items():
+            print(f"   {set_file}: {', '.join(puzzle['id'] + ' (' + puzzle['change'] + ')' for puzzle in puzzles)}")
+    else:
+        print("\n✅ No shipped puzzle set is affected")
+    print(f"\n✅ Delta written to {output_file} (candidates: {candidates_file.name})"
+          + (" (snapshot not advanced: --dry-run)" if args.dry_run else f", snapshot advanced in {snapshot_dir}"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# tools/puzzle_importer/puzzle_features.py
+"""
+Puzzle Feature Table
+--------------------
+One-time, multiprocess extraction of per-puzzle position features into a
+columnar side table next to the database, row-aligned with the CSV and
+the puzzle store:
+
+  lichess_db_puzzle.features/
+    meta.json        source size/mtime, row count, columns
+    <column>.npy     one small int/bool array per feature
+
+Features describe the puzzle position, i.e. after the opponent's first
+move in Moves, with the user to move:
+
+  valid                    FEN and first two moves parse and are legal
+  white_to_move            side to move (= the user's colour)
+  white_pawns ... black_queens   piece counts by colour and type
+  pieces                   all pieces on the board, kings included
+  material_white/_black    material (P=1 N=B=3 R=5 Q=9)
+  material_balance         user material minus opponent material
+  user_moves / plies       user moves / plies in the solution
+  key_piece                piece type of the key (first user) move, 1-6
+  key_check, key_capture, key_promotion, key_mate   key move flags
+  king_zone_attacks        squares around the opponent king (and its own
+                           square) attacked by the user
+  king_escapes             free squares next to the opponent king the
+                           user doesn't attack
+  king_shield              opponent pawns next to the opponent king
+  user_king_zone_attacks   squares around the user's king attacked by
+                           the opponent
+
+Filters join against the table with vectorized predicates, e.g. rook
+endgames with at most 6 pieces solved by exactly one user move:
+
+  "features": {"pieces": [null, 6], "user_moves": 1}
+  --where 'pieces<=6' user_moves=1 key_check
+
+Usage:
+  python3 puzzle_features.py                     # build for the database found here
+  python3 puzzle_features.py PATH [--workers N]  # build for a specific CSV/.csv.zst
+  python3 puzzle_features.py --force             # rebuild even if current
+  python3 puzzle_features.py --where 'pieces<=6' user_moves=1   # count matches
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import chess
+import numpy as np
+
+from pipeline_trace import ProgressBar, estimate_rows
+from puzzle_db import find_database, read_puzzle_chunks
+from puzzle_store import source_signature
+
+FEATURES_VERSION = 1
+
+PIECE_NAMES = {chess.PAWN: 'pawns', chess.KNIGHT: 'knights', chess.BISHOP: 'bishops',
+               chess.ROOK: 'rooks', chess.QUEEN: 'queens'}
+PIECE_VALUES = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 9}
+
+# name -> dtype, in extraction order
+FEATURE_COLUMNS = {
+    'valid': np.bool_,
+    'white_to_move': np.bool_,
+    **{f"{colour}_{name}": np.int8 for colour in ('white', 'black') for name in PIECE_NAMES.values()},
+    'pieces': np.int8,
+    'material_white': np.int16,
+    'material_black': np.int16,
+    'material_balance': np.int16,
+    'user_moves': np.int16,
+    'plies': np.int16,
+    'key_piece': np.int8,
+    'key_check': np.bool_,
+    'key_capture': np.bool_,
+    'key_promotion': np.bool_,
+    'key_mate': np.bool_,
+    'king_zone_attacks': np.int8,
+    'king_escapes': np.int8,
+    'king_shield': np.int8,
+    'user_king_zone_attacks': np.int8,
+}
+COLUMN_INDEX = {name: i for i, name in enumerate(FEATURE_COLUMNS)}
+
+OPERATORS = {
+    '==': np.equal, '!=': np.not_equal,
+    '<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+}
+PREDICATE_RE = re.compile(r'^\s*(!|not\s+)?(\w+)\s*(?:(==|=|!=|<=|>=|<|>)\s*(-?\d+|true|false))?\s*$', re.I)
+
+SHARDS_PER_WORKER = 4
+
+
+# === Extraction ===
+
+def features_path_for(db_path):
+    """lichess_db_puzzle.csv(.zst) -> lichess_db_puzzle.features"""
+    db_path = Path(db_path)
+    return db_path.parent / (db_path.name.split('.')[0] + '.features')
+
+
+def _zone_attacks(board, king_square, attacker):
+    zone = chess.BB_KING_ATTACKS[king_square] | chess.BB_SQUARES[king_square]
+    return sum(1 for square in chess.scan_forward(zone) if board.is_attacked_by(attacker, square))
+
+
+def puzzle_features(fen, moves):
+    """Feature row (list in FEATURE_COLUMNS order) for one puzzle; all zero if invalid"""
+    row = [0] * len(FEATURE_COLUMNS)
+    moves = moves.split()
+    try:
+        board = chess.Board(fen)
+        setup = chess.Move.from_uci(moves[0])
+        key = chess.Move.from_uci(moves[1])
+    except (ValueError, IndexError):
+        return row
+    if not board.is_legal(setup):
+        return row
+    board.push(setup)
+    if not board.is_legal(key):
+        return row
+
+    user = board.turn
+    opponent = not user
+    row[COLUMN_INDEX['valid']] = 1
+    row[COLUMN_INDEX['white_to_move']] = int(user == chess.WHITE)
+
+    material = {}
+    for colour, colour_name in ((chess.WHITE, 'white'), (chess.BLACK, 'black')):
+        material[colour] = 0
+        for piece_type, name in PIECE_NAMES.items():
+            count = chess.popcount(board.pieces_mask(piece_type, colour))
+            row[COLUMN_INDEX[f"{colour_name}_{name}"]] = count
+            material[colour] += count * PIECE_VALUES[piece_type]
+    row[COLUMN_INDEX['pieces']] = chess.popcount(board.occupied)
+    row[COLUMN_INDEX['material_white']] = material[chess.WHITE]
+    row[COLUMN_INDEX['material_black']] = material[chess.BLACK]
+    row[COLUMN_INDEX['material_balance']] = material[user] - material[opponent]
+
+    row[COLUMN_INDEX['user_moves']] = len(moves) // 2
+    row[COLUMN_INDEX['plies']] = len(moves) - 1
+
+    row[COLUMN_INDEX['key_piece']] = board.piece_type_at(key.from_square)
+    row[COLUMN_INDEX['key_check']] = int(board.gives_check(key))
+    row[COLUMN_INDEX['key_capture']] = int(board.is_capture(key))
+    row[COLUMN_INDEX['key_promotion']] = int(key.promotion is not None)
+
+    king = board.king(opponent)
+    user_king = board.king(user)
+    if king is not None:
+        row[COLUMN_INDEX['king_zone_attacks']] = _zone_attacks(board, king, user)
+        free = chess.BB_KING_ATTACKS[king] & ~board.occupied_co[opponent]
+        row[COLUMN_INDEX['king_escapes']] = sum(
+            1 for square in chess.scan_forward(free) if not board.is_attacked_by(user, square))
+        row[COLUMN_INDEX['king_shield']] = chess.popcount(
+            chess.BB_KING_ATTACKS[king] & board.pieces_mask(chess.PAWN, opponent))
+    if user_king is not None:
+        row[COLUMN_INDEX['user_king_zone_attacks']] = _zone_attacks(board, user_king, opponent)
+
+    board.push(key)
+    row[COLUMN_INDEX['key_mate']] = int(board.is_checkmate())
+    return row
+
+
+def _extract_shard(shard):
+    fens, moves = shard
+    return np.array([puzzle_features(fen, line) for fen, line in zip(fens, moves)],
+                    dtype=np.int16).reshape(-1, len(FEATURE_COLUMNS))
+
+
+def extract_features(fens, moves, pool=None, workers=1):
+    """(rows, columns) int16 feature matrix, on `pool` when given"""
+    fens, moves = list(fens), list(moves)
+    if pool is None or workers == 1 or len(fens) < 1000:
+        return _extract_shard((fens, moves))
+
+    shard_size = max(1, -(-len(fens) // (workers * SHARDS_PER_WORKER)))
+    shards = [(fens[i:i + shard_size], moves[i:i + shard_size]) for i in range(0, len(fens), shard_size)]
+    return np.concatenate(list(pool.map(_extract_shard, shards)))
+
+
+def is_current(features_dir, db_path):
+    """True if the table exists and was built from the current CSV"""
+    meta_file = Path(features_dir) / 'meta.json'
+    if not meta_file.exists():
+        return False
+    with open(meta_file) as f:
+        meta = json.load(f)
+    signature = source_signature(db_path)
+    return (
+        meta.get('version') == FEATURES_VERSION
+        and meta.get('source_size') == signature['source_size']
+        and meta.get('source_mtime_ns') == signature['source_mtime_ns']
+    )
+
+
+def build_features(db_path, features_dir=None, workers=None, on_chunk=None):
+    """Extract features for every puzzle (one streaming pass, chunks fanned out to a process pool)"""
+    db_path = Path(db_path)
+    features_dir = Path(features_dir) if features_dir else features_path_for(db_path)
+    tmp_dir = features_dir.with_name(features_dir.name + '.tmp')
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    signature = source_signature(db_path)
+    workers = workers or os.cpu_count() or 1
+    parts = {name: [] for name in FEATURE_COLUMNS}
+    rows = 0
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for chunk in read_puzzle_chunks(db_path):
+            matrix = extract_features(chunk['FEN'], chunk['Moves'], pool, workers)
+            for name, dtype in FEATURE_COLUMNS.items():
+                parts[name].append(matrix[:, COLUMN_INDEX[name]].astype(dtype))
+            rows += len(chunk)
+            if on_chunk:
+                on_chunk(rows)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    for name, dtype in FEATURE_COLUMNS.items():
+        np.save(tmp_dir / f"{name}.npy", np.concatenate(parts[name]) if parts[name] else np.zeros(0, dtype=dtype))
+
+    meta = {
+        "version": FEATURES_VERSION,
+        "source": db_path.name,
+        **signature,
+        "rows": rows,
+        "columns": list(FEATURE_COLUMNS),
+    }
+    with open(tmp_dir / 'meta.json', 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    if features_dir.exists():
+        shutil.rmtree(features_dir)
+    os.replace(tmp_dir, features_dir)
+    return features_dir
+
+
+def load_features(db_path, on_rebuild=None):
+    """
+    Open the feature table next to `db_path` if one has been built,
+    rebuilding it first when the CSV has changed since. Returns None if
+    there is no table.
+    """
+    features_dir = features_path_for(db_path)
+    if not features_dir.exists():
+        return None
+    if not is_current(features_dir, db_path):
+        if on_rebuild:
+            on_rebuild(features_dir)
+        build_features(db_path, features_dir)
+    return FeatureTable(features_dir)
+
+
+# === Predicates ===
+
+def _parse_predicate(text):
+    match = PREDICATE_RE.match(text)
+    if not match:
+        raise ValueError(f"Can't parse feature predicate '{text}' (e.g. pieces<=6, key_check, !key_capture)")
+    negate, column, op, value = match.groups()
+    if op is None:
+        # Bare flag: key_check / !key_check
+        return [(column, '==', 0 if negate else 1)]
+    if negate:
+        raise ValueError(f"Use != instead of negating a comparison: '{text}'")
+    value = {'true': 1, 'false': 0}.get(value.lower(), value)
+    return [(column, '==' if op == '=' else op, int(value))]
+
+
+def make_predicates(spec):
+    """
+    Normalize a feature filter to a list of (column, operator, value).
+
+    Accepts None, a dict ({"pieces": [null, 6], "user_moves": 1,
+    "key_check": true}: a [min, max] pair is an inclusive range, either end
+    may be null), or a list of strings like "pieces<=6", "key_check",
+    "!key_capture". Raises ValueError for unknown columns or bad syntax.
+    """
+    if not spec:
+        return []
+
+    predicates = []
+    if isinstance(spec, dict):
+        for column, value in spec.items():
+            if isinstance(value, (list, tuple)):
+                if len(value) != 2:
+                    raise ValueError(f"Feature range for {column} must be [min, max]")
+                low, high = value
+                if low is not None:
+                    predicates.append((column, '>=', int(low)))
+                if high is not None:
+                    predicates.append((column, '<=', int(high)))
+            else:
+                predicates.append((column, '==', int(value)))
+    else:
+        for item in ([spec] if isinstance(spec, str) else spec):
+            if isinstance(item, str):
+                predicates.extend(_parse_predicate(item))
+            else:
+                column, op, value = item
+                predicates.append((column, op, int(value)))
+
+    for column, op, _ in predicates:
+        if column not in FEATURE_COLUMNS:
+            raise ValueError(f"Unknown puzzle feature '{column}' (known: {', '.join(FEATURE_COLUMNS)})")
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown feature operator '{op}'")
+    return predicates
+
+
+class FeatureTable:
+    """Memory-mapped, read-only view of a built feature table"""
+
+    def __init__(self, features_dir):
+        self.features_dir = Path(features_dir)
+        with open(self.features_dir / 'meta.json') as f:
+            self.meta = json.load(f)
+        self.columns = {
+            name: np.load(self.features_dir / f"{name}.npy", mmap_mode='r')
+            for name in self.meta['columns']
+        }
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def mask(self, predicates, rows=None):
+        """
+        Boolean mask of puzzles matching every predicate (see
+        make_predicates), for all rows or only the given row numbers.
+        Puzzles whose features couldn't be extracted never match.
+        """
+        def column(name):
+            values = self.columns[name]
+            return values if rows is None else values[rows]
+
+        mask = np.array(column('valid'), dtype=bool)
+        for name, op, value in predicates:
+            mask &= OPERATORS[op](column(name), value)
+        return mask
+
+    def mask_for(self, source, predicates):
+        """
+        mask() aligned with `source`: a PuzzleStore (every row) or a
+        DataFrame read from the same database (its index = row numbers).
+        """
+        if hasattr(source, 'index'):
+            return self.mask(predicates, np.asarray(source.index, dtype=np.int64))
+        return self.mask(predicates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the per-puzzle feature table")
+    parser.add_argument('db', nargs='?', help="path to lichess_db_puzzle.csv(.zst) (default: search here)")
+    parser.add_argument('--force', action='store_true', help="rebuild even if the table is current")
+    parser.add_argument('--workers', type=int, help="worker processes (default: all CPUs)")
+    parser.add_argument('--where', nargs='+', metavar='PREDICATE',
+                        help="count puzzles matching predicates like pieces<=6 user_moves=1 key_check")
+    args = parser.parse_args()
+
+    db_path = Path(args.db) if args.db else find_database()
+    if db_path is None or not db_path.exists():
+        print("❌ ERROR: lichess_db_puzzle.csv (or .csv.zst) not found!")
+        sys.exit(1)
+
+    features_dir = features_path_for(db_path)
+    if not args.force and is_current(features_dir, db_path):
+        print(f"✅ Feature table is up to date: {features_dir}")
+    else:
+        print(f"🧮 Extracting puzzle features from {db_path}...")
+        progress = ProgressBar("   Extracted", estimate_rows(db_path))
+        build_features(db_path, features_dir, args.workers, on_chunk=progress.update)
+        progress.close()
+        print(f"✅ Feature table written to {features_dir}")
+
+    if args.where:
+        try:
+            predicates = make_predicates(args.where)
+        except ValueError as e:
+            print(f"❌ ERROR: {e}")
+            sys.exit(2)
+        table = FeatureTable(features_dir)
+        matches = int(table.mask(predicates).sum())
+        print(f"🔎 {matches:,} of {len(table):,} puzzles match {' '.join(args.where)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+# tools/puzzle_importer/puzzle_index.py
+"""
+Rating/Theme Inverted Index
+---------------------------
+Built once per session on top of a PuzzleStore (and optionally saved
+inside it) so interactive queries don't re-scan the database.
+
+Every row is sorted once by (rating bucket, -Popularity, row). Each theme's
+posting list is that global order restricted to the puzzles carrying the
+theme, so within a theme puzzles are grouped by rating bucket and each
+bucket run is already in popularity order. A query like
+"fork AND pin, 800-1000, top 50" then:
+
+  1. slices the rating buckets it needs out of the shortest posting list,
+  2. walks each bucket run in popularity order, checking the remaining
+     themes and the exact rating bounds on the theme bitset, until it has
+     `limit` hits, and
+  3. merges the per-bucket hits (at most buckets x limit rows).
+
+Results are identical to a full scan ordered by Popularity, ties in
+database order. Because every run is in that order, a minimum popularity
+and a keyset cursor (`after`: the last row of the previous page) are two
+binary searches per run, so deep pages cost no more than the first one.
+"""
+
+import json
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from theme_bits import theme_mask
+
+INDEX_VERSION = 1
+BUCKET_WIDTH = 50
+
+# Posting list id used for "every puzzle" (NONE queries, no themes)
+ALL_PUZZLES = '*'
+
+
+def _bucket_of(ratings):
+    return np.maximum(np.asarray(ratings, dtype=np.int32), 0) // BUCKET_WIDTH
+
+
+class PuzzleIndex:
+    """Theme -> rating-bucketed, popularity-ordered posting lists"""
+
+    def __init__(self, store, postings, theme_offsets, bucket_offsets):
+        self.store = store
+        self.postings = postings
+        self.theme_offsets = theme_offsets
+        self.bucket_offsets = bucket_offsets
+        self.lists = {theme: code for code, theme in enumerate(store.meta['themes'])}
+        self.lists[ALL_PUZZLES] = len(store.meta['themes'])
+        self.bits = np.asarray(store.theme_bits)
+        self.ratings = np.asarray(store['Rating'])
+        self.popularity = np.asarray(store['Popularity'])
+
+    @classmethod
+    def build(cls, store):
+        """Build the index from a PuzzleStore (one sort + one pass per theme)"""
+        ratings = np.asarray(store['Rating'])
+        popularity = np.asarray(store['Popularity']).astype(np.int32)
+        bits = np.asarray(store.theme_bits)
+
+        rows = np.arange(len(store), dtype=np.int32)
+        order = np.lexsort((rows, -popularity, _bucket_of(ratings))).astype(np.int32)
+        sorted_bits = bits[:, order]
+        sorted_buckets = _bucket_of(ratings)[order]
+        n_buckets = int(sorted_buckets.max()) + 2 if len(order) else 1
+
+        postings = []
+        theme_offsets = [0]
+        bucket_offsets = []
+        for code in range(len(store.meta['themes']) + 1):
+            if code < len(store.meta['themes']):
+                word, bit = divmod(code, 64)
+                selected = np.flatnonzero(sorted_bits[word] & (np.uint64(1) << np.uint64(bit)))
+                posting = order[selected]
+                buckets = sorted_buckets[selected]
+            else:
+                posting, buckets = order, sorted_buckets
+            postings.append(posting)
+            bucket_offsets.append(theme_offsets[-1] + np.searchsorted(buckets, np.arange(n_buckets + 1)))
+            theme_offsets.append(theme_offsets[-1] + len(posting))
+
+        return cls(
+            store,
+            np.concatenate(postings).astype(np.int32),
+            np.asarray(theme_offsets, dtype=np.int64),
+            np.vstack(bucket_offsets).astype(np.int64),
+        )
+
+    @classmethod
+    def load_or_build(cls, store, persist=False):
+        """Load the index saved in the store, or build it (and save if `persist`)"""
+        index_dir = store.store_dir / 'index'
+        meta_file = index_dir / 'meta.json'
+        if meta_file.exists():
+            with open(meta_file) as f:
+                meta = json.load(f)
+            if meta.get('version') == INDEX_VERSION and meta.get('bucket_width') == BUCKET_WIDTH:
+                return cls(
+                    store,
+                    np.load(index_dir / 'postings.npy', mmap_mode='r'),
+                    np.load(index_dir / 'theme_offsets.npy'),
+                    np.load(index_dir / 'bucket_offsets.npy'),
+                )
+
+        index = cls.build(store)
+        if persist:
+            index.save()
+        return index
+
+    def save(self):
+        """Persist inside the store directory (dropped when the store rebuilds)"""
+        index_dir = self.store.store_dir / 'index'
+        index_dir.mkdir(exist_ok=True)
+        np.save(index_dir / 'postings.npy', self.postings)
+        np.save(index_dir / 'theme_offsets.npy', self.theme_offsets)
+        np.save(index_dir / 'bucket_offsets.npy', self.bucket_offsets)
+        with open(index_dir / 'meta.json', 'w') as f:
+            json.dump({"version": INDEX_VERSION, "bucket_width": BUCKET_WIDTH}, f, indent=2)
+
+    def _runs(self, name, min_rating, max_rating):
+        """Per-bucket slices of a posting list covering the rating range"""
+        offsets = self.bucket_offsets[self.lists[name]]
+        last = len(offsets) - 2
+        first_bucket = min(int(_bucket_of(min_rating)), last + 1)
+        last_bucket = min(int(_bucket_of(max_rating)), last)
+        return [
+            self.postings[offsets[bucket]:offsets[bucket + 1]]
+            for bucket in range(first_bucket, last_bucket + 1)
+            if offsets[bucket + 1] > offsets[bucket]
+        ]
+
+    def _run_length(self, name, min_rating, max_rating):
+        return sum(len(run) for run in self._runs(name, min_rating, max_rating))
+
+    def _window(self, run, min_popularity, after):
+        """The part of a popularity-ordered run past `after` with popularity >= min_popularity"""
+        popularity = self.popularity
+        start = 0
+        if after is not None:
+            after_popularity, after_row = after
+            start = bisect_right(range(len(run)), (-after_popularity, after_row),
+                                 key=lambda i: (-int(popularity[run[i]]), int(run[i])))
+        end = len(run)
+        if min_popularity is not None:
+            end = bisect_left(range(len(run)), -min_popularity + 1, key=lambda i: -int(popularity[run[i]]))
+        return run[start:max(start, end)]
+
+    def _top_in_run(self, run, accept, limit):
+        """First `limit` accepted rows of a popularity-ordered run"""
+        found = []
+        count = 0
+        start = 0
+        block = max(limit * 4, 256)
+        while start < len(run) and count < limit:
+            rows = np.asarray(run[start:start + block])
+            hits = rows[accept(rows)]
+            found.append(hits)
+            count += len(hits)
+            start += block
+            block *= 2
+        return np.concatenate(found)[:limit] if found else np.zeros(0, dtype=np.int32)
+
+    def query(self, themes, mode='any', rating_range=(0, 10_000), limit=50, min_popularity=None, after=None):
+        """
+        Row numbers of the top `limit` puzzles by Popularity that match the
+        theme query (ANY/ALL/NONE, as in theme_bits.theme_mask) within the
+        rating range, optionally only those with Popularity >= min_popularity
+        and ranked after the (popularity, row) key `after`.
+        """
+        min_rating, max_rating = rating_range
+        known = [theme for theme in themes if theme in self.lists]
+
+        if mode == 'all':
+            if len(known) < len(set(themes)):
+                return np.zeros(0, dtype=np.int64)
+            # Intersect by walking the shortest posting list
+            lists = [min(known, key=lambda theme: self._run_length(theme, min_rating, max_rating))] if known else [ALL_PUZZLES]
+        elif mode == 'any':
+            lists = known
+        else:
+            lists = [ALL_PUZZLES]
+
+        vocabulary = self.store.vocabulary
+
+        def accept(rows):
+            ratings = self.ratings[rows]
+            keep = (ratings >= min_rating) & (ratings <= max_rating)
+            return keep & theme_mask(self.bits[:, rows], vocabulary, themes, mode)
+
+        hits = [
+            self._top_in_run(self._window(run, min_popularity, after), accept, limit)
+            for name in lists
+            for run in self._runs(name, min_rating, max_rating)
+        ]
+        if not hits:
+            return np.zeros(0, dtype=np.int64)
+
+        # Bounded merge of the per-bucket winners
+        rows = np.unique(np.concatenate(hits)).astype(np.int64)
+        order = np.lexsort((rows, -self.popularity[rows].astype(np.int32)))
+        return rows[order[:limit]]
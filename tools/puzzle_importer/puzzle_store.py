@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# tools/puzzle_importer/puzzle_store.py
+"""
+Columnar Puzzle Store
+---------------------
+Converts lichess_db_puzzle.csv once into a compact on-disk store that the
+importers memory-map instead of re-parsing the CSV on every run:
+
+  lichess_db_puzzle.store/
+    meta.json               source size/mtime, row count, theme vocabulary
+    rating.npy              int16
+    rating_deviation.npy    int16
+    popularity.npy          int8
+    nb_plays.npy            int32
+    theme_bits.npy          (THEME_WORDS, rows) uint64 theme bitset
+    <column>.bin            UTF-8 string blob (puzzle_id, fen, moves, themes)
+    <column>.offsets.npy    int64 start offsets into the blob (rows + 1)
+
+The store rebuilds itself when the source CSV's size or mtime changes.
+
+Usage:
+  python3 puzzle_store.py            # build-store for the database found here
+  python3 puzzle_store.py PATH       # build-store for a specific CSV/.csv.zst
+  python3 puzzle_store.py --force    # rebuild even if the store is current
+"""
+
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from puzzle_db import PUZZLE_COLUMNS, find_database, read_puzzle_chunks
+from theme_bits import THEME_WORDS, encode_themes, known_vocabulary, theme_mask
+
+STORE_VERSION = 2
+
+INT_COLUMNS = {
+    'Rating': ('rating', np.int16),
+    'RatingDeviation': ('rating_deviation', np.int16),
+    'Popularity': ('popularity', np.int8),
+    'NbPlays': ('nb_plays', np.int32),
+}
+
+STRING_COLUMNS = {
+    'PuzzleId': 'puzzle_id',
+    'FEN': 'fen',
+    'Moves': 'moves',
+    'Themes': 'themes',
+}
+
+
+def store_path_for(db_path):
+    """lichess_db_puzzle.csv(.zst) -> lichess_db_puzzle.store"""
+    db_path = Path(db_path)
+    return db_path.parent / (db_path.name.split('.')[0] + '.store')
+
+
+def source_signature(db_path):
+    """Size and mtime of the source CSV, used to detect a stale store"""
+    stat = os.stat(db_path)
+    return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+
+def is_current(store_dir, db_path):
+    """True if the store exists and was built from the current CSV"""
+    meta_file = Path(store_dir) / 'meta.json'
+    if not meta_file.exists():
+        return False
+    with open(meta_file) as f:
+        meta = json.load(f)
+    signature = source_signature(db_path)
+    return (
+        meta.get('version') == STORE_VERSION
+        and meta.get('source_size') == signature['source_size']
+        and meta.get('source_mtime_ns') == signature['source_mtime_ns']
+    )
+
+
+def build_store(db_path, store_dir=None, on_chunk=None):
+    """Convert the CSV into a columnar store (one streaming pass)"""
+    db_path = Path(db_path)
+    store_dir = Path(store_dir) if store_dir else store_path_for(db_path)
+    tmp_dir = store_dir.with_name(store_dir.name + '.tmp')
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    signature = source_signature(db_path)
+    vocabulary = known_vocabulary()
+    int_parts = {column: [] for column in INT_COLUMNS}
+    theme_parts = []
+    offsets = {column: [np.zeros(1, dtype=np.int64)] for column in STRING_COLUMNS}
+    blob_sizes = {column: 0 for column in STRING_COLUMNS}
+    blobs = {column: open(tmp_dir / f"{name}.bin", 'wb') for column, name in STRING_COLUMNS.items()}
+    rows = 0
+
+    try:
+        for chunk in read_puzzle_chunks(db_path):
+            for column, (_, dtype) in INT_COLUMNS.items():
+                int_parts[column].append(chunk[column].to_numpy(dtype=dtype))
+
+            theme_parts.append(encode_themes(chunk['Themes'], vocabulary))
+
+            for column in STRING_COLUMNS:
+                encoded = [value.encode('utf-8') for value in chunk[column]]
+                lengths = np.fromiter((len(value) for value in encoded), dtype=np.int64, count=len(encoded))
+                offsets[column].append(blob_sizes[column] + np.cumsum(lengths))
+                blob_sizes[column] += int(lengths.sum())
+                blobs[column].write(b''.join(encoded))
+
+            rows += len(chunk)
+            if on_chunk:
+                on_chunk(rows)
+    finally:
+        for blob in blobs.values():
+            blob.close()
+
+    for column, (name, dtype) in INT_COLUMNS.items():
+        parts = int_parts[column] or [np.zeros(0, dtype=dtype)]
+        np.save(tmp_dir / f"{name}.npy", np.concatenate(parts))
+
+    theme_bits = np.concatenate(theme_parts, axis=1) if theme_parts else np.zeros((THEME_WORDS, 0), dtype=np.uint64)
+    np.save(tmp_dir / 'theme_bits.npy', theme_bits)
+
+    for column, name in STRING_COLUMNS.items():
+        np.save(tmp_dir / f"{name}.offsets.npy", np.concatenate(offsets[column]))
+
+    meta = {
+        "version": STORE_VERSION,
+        "source": db_path.name,
+        **signature,
+        "rows": rows,
+        "themes": sorted(vocabulary, key=vocabulary.get),
+    }
+    with open(tmp_dir / 'meta.json', 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    if store_dir.exists():
+        shutil.rmtree(store_dir)
+    os.replace(tmp_dir, store_dir)
+    return store_dir
+
+
+def load_store(db_path, on_rebuild=None):
+    """
+    Open the store next to `db_path` if one has been built, rebuilding it
+    first when the CSV has changed since. Returns None if there is no store.
+    """
+    store_dir = store_path_for(db_path)
+    if not store_dir.exists():
+        return None
+    if not is_current(store_dir, db_path):
+        if on_rebuild:
+            on_rebuild(store_dir)
+        build_store(db_path, store_dir)
+    return PuzzleStore(store_dir)
+
+
+def _memmap_blob(path):
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode='r')
+
+
+class PuzzleStore:
+    """Memory-mapped, read-only view of a built puzzle store"""
+
+    def __init__(self, store_dir):
+        self.store_dir = Path(store_dir)
+        with open(self.store_dir / 'meta.json') as f:
+            self.meta = json.load(f)
+
+        self.columns = {
+            column: np.load(self.store_dir / f"{name}.npy", mmap_mode='r')
+            for column, (name, _) in INT_COLUMNS.items()
+        }
+        self.theme_bits = np.load(self.store_dir / 'theme_bits.npy', mmap_mode='r')
+        self.vocabulary = {theme: code for code, theme in enumerate(self.meta['themes'])}
+
+        self.blobs = {}
+        for column, name in STRING_COLUMNS.items():
+            self.blobs[column] = (
+                _memmap_blob(self.store_dir / f"{name}.bin"),
+                np.load(self.store_dir / f"{name}.offsets.npy", mmap_mode='r'),
+            )
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def theme_mask(self, themes, mode='any'):
+        """Boolean mask of puzzles matching ANY/ALL/NONE of `themes`"""
+        return theme_mask(self.theme_bits, self.vocabulary, themes, mode)
+
+    def strings(self, column, indices):
+        """Decode a string column for the given rows only"""
+        blob, offsets = self.blobs[column]
+        indices = np.asarray(indices, dtype=np.int64)
+        starts = offsets[indices].tolist()
+        ends = offsets[indices + 1].tolist()
+        # Slicing a memoryview avoids numpy's per-slice memmap overhead
+        data = memoryview(blob)
+        return [str(data[start:end], 'utf-8') for start, end in zip(starts, ends)]
+
+    def take(self, indices):
+        """Materialize the given rows as a DataFrame (index = row number)"""
+        indices = np.asarray(indices, dtype=np.int64)
+        data = {}
+        for column in PUZZLE_COLUMNS:
+            if column in self.columns:
+                data[column] = self.columns[column][indices].astype(np.int32)
+            else:
+                data[column] = self.strings(column, indices)
+        return pd.DataFrame(data, index=indices)
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    force = '--force' in sys.argv
+
+    db_path = Path(args[0]) if args else find_database()
+    if db_path is None or not db_path.exists():
+        print("❌ ERROR: lichess_db_puzzle.csv (or .csv.zst) not found!")
+        sys.exit(1)
+
+    store_dir = store_path_for(db_path)
+    if not force and is_current(store_dir, db_path):
+        print(f"✅ Store is up to date: {store_dir}")
+        return
+
+    print(f"📦 Building puzzle store from {db_path}...")
+    build_store(
+        db_path, store_dir,
+        on_chunk=lambda rows: print(f"\r   Converted {rows:,} puzzles...", end="", flush=True),
+    )
+    print(f"\n✅ Store written to {store_dir}")
+
+
+if __name__ == '__main__':
+    main()
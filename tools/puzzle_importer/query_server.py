@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# tools/puzzle_importer/query_server.py
+"""
+Puzzle Query Server
+-------------------
+A small asyncio HTTP server over the puzzle store and its rating/theme
+index (see puzzle_store.py, puzzle_index.py), so the review UI can page
+through query results instead of loading a giant *_candidates.json:
+
+  GET /                     review_ui_with_editor.html
+  GET /api/themes           {"themes": [...], "puzzles": N}
+  GET /api/puzzles?themes=fork,pin&match=any&min_rating=800&max_rating=1200
+                  &min_popularity=80&limit=50&cursor=...
+                            {"puzzles": [...], "next": cursor or null}
+
+Puzzles come in the importers' candidate format, most popular first (ties
+in database order). `next` is an opaque keyset cursor (the last row's
+popularity and row number), so every page is a couple of binary searches
+per rating bucket however deep it is, and pages stay stable while you
+scroll. Responses carry an ETag derived from the store and the request,
+so a repeat request is answered 304 without touching the index, and are
+gzipped when the client accepts it. Recent pages are kept in memory.
+
+The index and the numeric columns are loaded into memory at startup
+(--no-preload keeps them memory-mapped); queries run on worker threads so
+the event loop keeps serving.
+
+Usage:
+  python3 query_server.py [DB] [--host 127.0.0.1] [--port 8765]
+  ./create_puzzles.sh serve
+"""
+
+import argparse
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from import_puzzles_interactive import THEME_HINTS
+from puzzle_db import candidate_records, find_database
+from puzzle_index import PuzzleIndex
+from puzzle_store import build_store, load_store, store_path_for
+from theme_bits import MATCH_MODES
+
+UI_FILE = Path(__file__).resolve().parent.parent / 'puzzle_reviewer' / 'review_ui_with_editor.html'
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Bump whenever the response format changes, to invalidate client caches
+API_VERSION = 1
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+GZIP_MIN_BYTES = 1024
+CACHED_PAGES = 512
+MAX_REQUEST_LINE = 8192
+
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _int_param(params, name, default):
+    values = params.get(name)
+    if not values or values[-1] == '':
+        return default
+    try:
+        return int(values[-1])
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+
+
+def parse_query(query_string):
+    """Normalized query dict from a /api/puzzles query string; raises BadRequest"""
+    params = parse_qs(query_string, keep_blank_values=True)
+    themes = sorted({theme for value in params.get('themes', []) for theme in value.replace(',', ' ').split()})
+    match = (params.get('match') or ['any'])[-1].lower()
+    if match not in MATCH_MODES:
+        raise BadRequest(f"match must be one of {', '.join(MATCH_MODES)}")
+    if not themes:
+        # No themes: every puzzle (NONE of nothing)
+        match = 'none'
+    query = {
+        "themes": themes,
+        "match": match,
+        "min_rating": _int_param(params, 'min_rating', 0),
+        "max_rating": _int_param(params, 'max_rating', 10_000),
+        "min_popularity": _int_param(params, 'min_popularity', None),
+        "limit": _int_param(params, 'limit', PAGE_SIZE),
+    }
+    if not 1 <= query['limit'] <= MAX_PAGE_SIZE:
+        raise BadRequest(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    if query['min_rating'] > query['max_rating']:
+        raise BadRequest("min_rating is above max_rating")
+    query['cursor'] = (params.get('cursor') or [''])[-1] or None
+    return query
+
+
+def query_fingerprint(query):
+    """Short hash of everything that defines a result list (not the page)"""
+    key = json.dumps({name: query[name] for name in ('themes', 'match', 'min_rating', 'max_rating',
+                                                      'min_popularity')}, sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def encode_cursor(query, popularity, row):
+    text = f"{query_fingerprint(query)}:{popularity}:{row}"
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip('=')
+
+
+def decode_cursor(query, cursor):
+    """(popularity, row) from a cursor issued for the same query; raises BadRequest"""
+    try:
+        text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        fingerprint, popularity, row = text.split(':')
+        popularity, row = int(popularity), int(row)
+    except ValueError:
+        raise BadRequest("invalid cursor")
+    if fingerprint != query_fingerprint(query):
+        raise BadRequest("cursor belongs to a different query")
+    return popularity, row
+
+
+class PuzzleService:
+    """The store, its index and a cache of recently served pages"""
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+        self.signature = hashlib.sha1(json.dumps(
+            [API_VERSION, store.meta.get('source'), store.meta.get('source_size'),
+             store.meta.get('source_mtime_ns'), store.meta['rows']]).encode()).hexdigest()[:12]
+        self.pages = OrderedDict()
+        self.lock = threading.Lock()
+
+    def preload(self):
+        """Copy the index and the columns queries touch into memory"""
+        index = self.index
+        index.postings = np.array(index.postings)
+        index.bits = np.array(index.bits)
+        index.ratings = np.array(index.ratings)
+        index.popularity = np.array(index.popularity)
+
+    def etag(self, kind, key):
+        return '"' + hashlib.sha1(f"{self.signature}\0{kind}\0{key}".encode()).hexdigest()[:20] + '"'
+
+    def themes(self):
+        return {"themes": sorted(self.store.meta['themes']), "puzzles": len(self.store)}
+
+    def page(self, query):
+        """One page of results as a JSON-able dict"""
+        after = decode_cursor(query, query['cursor']) if query['cursor'] else None
+        rows = self.index.query(
+            query['themes'], query['match'], (query['min_rating'], query['max_rating']),
+            query['limit'], query['min_popularity'], after,
+        )
+        puzzles = candidate_records(self.store.take(rows), THEME_HINTS) if len(rows) else []
+        next_cursor = None
+        if len(rows) == query['limit']:
+            last = int(rows[-1])
+            next_cursor = encode_cursor(query, int(self.index.popularity[last]), last)
+        return {"puzzles": puzzles, "next": next_cursor}
+
+    def cached(self, etag, build):
+        """(body, gzipped body or None) for an ETag, building and caching it on a miss"""
+        with self.lock:
+            if etag in self.pages:
+                self.pages.move_to_end(etag)
+                return self.pages[etag]
+        body = json.dumps(build(), separators=(',', ':')).encode()
+        compressed = gzip.compress(body, compresslevel=5) if len(body) >= GZIP_MIN_BYTES else None
+        with self.lock:
+            self.pages[etag] = (body, compressed)
+            while len(self.pages) > CACHED_PAGES:
+                self.pages.popitem(last=False)
+        return body, compressed
+
+
+def _response(status, headers=(), body=b'', send_body=True):
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}"]
+    lines.extend(f"{name}: {value}" for name, value in headers)
+    lines.append(f"Content-Length: {len(body)}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode() + (body if send_body else b'')
+
+
+COMMON_HEADERS = [
+    ("Access-Control-Allow-Origin", "*"),
+    ("Access-Control-Expose-Headers", "ETag"),
+    ("Vary", "Accept-Encoding"),
+]
+
+
+async def _read_request(reader):
+    """(method, target, headers) or None when the client is done"""
+    request_line = await reader.readline()
+    if not request_line or len(request_line) > MAX_REQUEST_LINE:
+        return None
+    parts = request_line.decode('latin-1').split()
+    if len(parts) != 3:
+        return None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return parts[0], parts[1], headers
+
+
+class QueryServer:
+    """HTTP/1.1 (keep-alive) front end for a PuzzleService"""
+
+    def __init__(self, service, log=True):
+        self.service = service
+        self.log = log
+
+    async def respond(self, method, target, headers):
+        url = urlsplit(target)
+        if method == 'OPTIONS':
+            return 200, COMMON_HEADERS + [("Access-Control-Allow-Methods", "GET, HEAD")], b''
+        if method not in ('GET', 'HEAD'):
+            return 405, COMMON_HEADERS, b''
+
+        if url.path in ('/', '/index.html'):
+            return 200, [("Content-Type", "text/html; charset=utf-8"), ("Cache-Control", "no-cache")], \
+                UI_FILE.read_bytes()
+
+        service = self.service
+        if url.path == '/api/themes':
+            etag = service.etag('themes', '')
+            build = service.themes
+        elif url.path == '/api/puzzles':
+            try:
+                query = parse_query(url.query)
+                if query['cursor']:
+                    decode_cursor(query, query['cursor'])
+            except BadRequest as e:
+                return 400, COMMON_HEADERS + [("Content-Type", "application/json")], \
+                    json.dumps({"error": str(e)}).encode()
+            etag = service.etag('puzzles', json.dumps(query, sort_keys=True))
+            build = lambda: service.page(query)  # noqa: E731
+        else:
+            return 404, COMMON_HEADERS, b''
+
+        cache_headers = COMMON_HEADERS + [("ETag", etag), ("Cache-Control", "no-cache")]
+        if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            return 304, cache_headers, b''
+
+        body, compressed = await asyncio.get_running_loop().run_in_executor(None, service.cached, etag, build)
+        response_headers = cache_headers + [("Content-Type", "application/json")]
+        if compressed is not None and 'gzip' in headers.get('accept-encoding', ''):
+            response_headers.append(("Content-Encoding", "gzip"))
+            body = compressed
+        return 200, response_headers, body
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers = request
+                start = time.perf_counter()
+                status, response_headers, body = await self.respond(method, target, headers)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                response_headers = list(response_headers) + [("Connection", "keep-alive" if keep_alive else "close")]
+                writer.write(_response(status, response_headers, body, send_body=method != 'HEAD'))
+                await writer.drain()
+                if self.log:
+                    print(f"   {method} {target} -> {status} ({len(body):,} bytes, "
+                          f"{(time.perf_counter() - start) * 1000:.1f} ms)")
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def open_service(db_file, preload=True):
+    """PuzzleService for a database, building the store and index if needed"""
+    store = load_store(db_file, on_rebuild=lambda path: print(f"📦 Database changed, rebuilding {path}..."))
+    if store is None:
+        print("📦 Building puzzle store (one time)...")
+        build_store(db_file)
+        store = load_store(db_file)
+    service = PuzzleService(store, PuzzleIndex.load_or_build(store, persist=True))
+    if preload:
+        service.preload()
+    return service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve paginated puzzle queries to the review UI")
+    parser.add_argument('db', nargs='?', metavar='DB', help="lichess_db_puzzle.csv(.zst) (default: found here)")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    parser.add_argument('--no-preload', action='store_true', help="keep the index memory-mapped instead of in RAM")
+    parser.add_argument('--quiet', action='store_true', help="don't log requests")
+    args = parser.parse_args()
+
+    db_file = Path(args.db) if args.db else find_database()
+    if db_file is None or not db_file.exists():
+        print("❌ ERROR: lichess_db_puzzle.csv (or .csv.zst) not found!")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    service = open_service(db_file, preload=not args.no_preload)
+    print(f"📚 {len(service.store):,} puzzles ready in {time.perf_counter() - start:.2f}s "
+          f"(index in {store_path_for(db_file)}/index)")
+    print(f"🌐 Review UI: http://{args.host}:{args.port}/  (Ctrl+C to stop)")
+    try:
+        asyncio.run(QueryServer(service, log=not args.quiet).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+# tools/puzzle_importer/selection.py
+"""
+Candidate Selection
+-------------------
+Picks the best `limit` puzzles out of a filtered set without sorting it.
+
+Plain selection (the default) is the importers' old Popularity top-N:
+a partial selection (np.partition, O(n)) finds the cut-off value and
+only the chosen rows are sorted. Ties keep database order, so the
+result matches a stable full sort exactly.
+
+Stratified selection spreads the picks out instead of bunching them at
+one end of the rating range or in one theme:
+
+  score          Popularity, minus rd_weight points per RatingDeviation
+                 above rd_ok, minus plays_weight points per halving of
+                 NbPlays below plays_ok (unreliable ratings and barely
+                 played puzzles drop down the list)
+  rating bands   no `band`-point band (e.g. 800-899) gets more than
+                 band_quota of the picks
+  theme mix      no theme in mix_themes (default: the query's themes for
+                 an ANY query with several themes, puzzles with none of
+                 them counting as one more group) gets more than
+                 theme_quota of the picks
+
+Picks are taken best score first subject to both quotas; if the quotas
+leave slots empty because the filtered set is too narrow, the best
+remaining puzzles fill them. Everything is a few vectorized passes over
+the filtered arrays plus work proportional to the number of bands.
+
+Streaming callers keep candidate_pool() per chunk, a small superset
+that is guaranteed to contain the final picks, and select from the
+merged pools at the end.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from theme_bits import encode_themes, known_vocabulary, theme_mask
+
+DEFAULT_SELECTION = {
+    "band": 100,
+    "band_quota": 0.2,
+    "mix_themes": None,
+    "theme_quota": None,
+    "rd_ok": 80,
+    "rd_weight": 0.5,
+    "plays_ok": 500,
+    "plays_weight": 5.0,
+}
+
+
+def make_selection(spec):
+    """
+    Selection settings from a query/level spec value: None or False for
+    plain Popularity top-N, True for the stratified defaults, or a dict of
+    DEFAULT_SELECTION overrides. Raises ValueError for invalid settings.
+    """
+    if spec is None or spec is False:
+        return None
+    if spec is True:
+        spec = {}
+    if not isinstance(spec, dict):
+        raise ValueError("selection must be true, false/null or an object")
+
+    unknown = set(spec) - set(DEFAULT_SELECTION)
+    if unknown:
+        raise ValueError(f"Unknown selection fields: {', '.join(sorted(unknown))}")
+
+    selection = dict(DEFAULT_SELECTION, **spec)
+    if int(selection['band']) <= 0:
+        raise ValueError("selection band must be a positive number of rating points")
+    selection['band'] = int(selection['band'])
+    for key in ('band_quota', 'theme_quota'):
+        value = selection[key]
+        if value is not None and not 0 < float(value) <= 1:
+            raise ValueError(f"selection {key} must be between 0 and 1")
+    if isinstance(selection['mix_themes'], str):
+        selection['mix_themes'] = selection['mix_themes'].split()
+    return selection
+
+
+def top_k_indices(scores, k):
+    """
+    Positions of the `k` highest scores, best first, ties in position
+    order (same as a stable descending sort, but O(n)).
+    """
+    scores = np.asarray(scores)
+    if scores.dtype.kind in 'iub':
+        scores = scores.astype(np.int64)
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < n:
+        cutoff = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > cutoff)
+        ties = np.flatnonzero(scores == cutoff)[:k - len(above)]
+        chosen = np.concatenate([above, ties])
+    else:
+        chosen = np.arange(n)
+    return chosen[np.lexsort((chosen, -scores[chosen]))]
+
+
+def quality_scores(popularity, rating_deviation, nb_plays, selection):
+    """Popularity with penalties for high RatingDeviation and low NbPlays"""
+    scores = np.asarray(popularity, dtype=np.float64).copy()
+    deviation = np.asarray(rating_deviation, dtype=np.float64)
+    scores -= selection['rd_weight'] * np.maximum(0.0, deviation - selection['rd_ok'])
+    plays = np.maximum(np.asarray(nb_plays, dtype=np.float64), 1.0)
+    scores -= selection['plays_weight'] * np.maximum(0.0, np.log2(selection['plays_ok'] / plays))
+    return scores
+
+
+def _take(source, indices):
+    if isinstance(source, pd.DataFrame):
+        return source.iloc[indices]
+    return source.take(indices)
+
+
+def _theme_groups(source, rows, mix_themes, view):
+    """Index of the first mix theme each row has (len(mix_themes) if none)"""
+    if view is not None:
+        bits, vocabulary = view
+        bits = bits[:, rows]
+    elif isinstance(source, pd.DataFrame):
+        vocabulary = known_vocabulary()
+        bits = encode_themes(source['Themes'].iloc[rows], vocabulary)
+    else:
+        bits, vocabulary = source.theme_bits[:, rows], source.vocabulary
+
+    groups = np.full(len(rows), len(mix_themes), dtype=np.int64)
+    for group in range(len(mix_themes) - 1, -1, -1):
+        groups[theme_mask(bits, vocabulary, [mix_themes[group]], 'any')] = group
+    return groups
+
+
+def _strata(source, rows, limit, selection, themes, view):
+    """(scores, bands, groups, band cap, group cap) for the rows considered"""
+    scores = quality_scores(
+        np.asarray(source['Popularity'])[rows],
+        np.asarray(source['RatingDeviation'])[rows],
+        np.asarray(source['NbPlays'])[rows],
+        selection,
+    )
+    bands = np.asarray(source['Rating'])[rows].astype(np.int64) // selection['band']
+
+    mix_themes = selection['mix_themes'] or (themes if themes and len(themes) > 1 else None)
+    if mix_themes and selection['theme_quota']:
+        groups = _theme_groups(source, rows, list(mix_themes), view)
+        group_cap = max(1, math.ceil(limit * selection['theme_quota']))
+    else:
+        groups = np.zeros(len(rows), dtype=np.int64)
+        group_cap = limit
+
+    band_cap = max(1, math.ceil(limit * selection['band_quota'])) if selection['band_quota'] else limit
+    return scores, bands, groups, band_cap, group_cap
+
+
+def _pool(scores, bands, groups, limit, cell_cap):
+    """
+    Positions that can end up selected: the best cell_cap of every
+    (band, group) cell plus the best 2 x limit overall for quota relief.
+    """
+    cells = bands * (int(groups.max()) + 1 if len(groups) else 1) + groups
+    order = np.argsort(cells, kind='stable')
+    starts = np.flatnonzero(np.diff(cells[order])) + 1
+    parts = [segment[top_k_indices(scores[segment], cell_cap)] for segment in np.split(order, starts)]
+    parts.append(top_k_indices(scores, 2 * limit))
+    return np.unique(np.concatenate(parts))
+
+
+def _indices(source, mask):
+    if mask is None:
+        return np.arange(len(source))
+    return np.flatnonzero(np.asarray(mask))
+
+
+def candidate_pool(source, limit, mask=None, selection=None, themes=None, view=None):
+    """
+    Rows (as a DataFrame) that select() could pick, for merging streamed
+    chunks: selecting from the concatenated pools gives the same result
+    as selecting from all chunks at once.
+    """
+    rows = _indices(source, mask)
+    if selection is None:
+        popularity = np.asarray(source['Popularity'])[rows]
+        return _take(source, rows[top_k_indices(popularity, limit)])
+
+    scores, bands, groups, band_cap, group_cap = _strata(source, rows, limit, selection, themes, view)
+    pool = _pool(scores, bands, groups, limit, min(band_cap, group_cap))
+    return _take(source, rows[pool[np.lexsort((pool, -scores[pool]))]])
+
+
+def select(source, limit, mask=None, selection=None, themes=None, view=None):
+    """
+    Best `limit` rows of `source` (a DataFrame or PuzzleStore), optionally
+    only where `mask` is set, as a DataFrame in selection order.
+
+    `selection` is None for plain Popularity top-N or a make_selection()
+    dict for stratified selection; `themes` is the query's theme list
+    (the default theme mix) and `view` an optional theme_view() of source.
+    """
+    rows = _indices(source, mask)
+    if selection is None:
+        popularity = np.asarray(source['Popularity'])[rows]
+        return _take(source, rows[top_k_indices(popularity, limit)])
+
+    scores, bands, groups, band_cap, group_cap = _strata(source, rows, limit, selection, themes, view)
+    pool = _pool(scores, bands, groups, limit, min(band_cap, group_cap))
+    ranked = pool[np.lexsort((pool, -scores[pool]))]
+
+    chosen = []
+    band_counts = {}
+    group_counts = {}
+    for position, band, group in zip(ranked.tolist(), bands[ranked].tolist(), groups[ranked].tolist()):
+        if len(chosen) == limit:
+            break
+        if band_counts.get(band, 0) < band_cap and group_counts.get(group, 0) < group_cap:
+            chosen.append(position)
+            band_counts[band] = band_counts.get(band, 0) + 1
+            group_counts[group] = group_counts.get(group, 0) + 1
+
+    if len(chosen) < limit:
+        # Quotas can't be met from this set; fill up with the best of the rest
+        taken = set(chosen)
+        chosen.extend([position for position in ranked.tolist() if position not in taken][:limit - len(chosen)])
+
+    chosen = np.array(chosen, dtype=np.int64)
+    chosen = chosen[np.lexsort((chosen, -scores[chosen]))]
+    return _take(source, rows[chosen])
@@ -0,0 +1,98 @@
+# tools/puzzle_importer/test_selection.py
+"""
+--dedupe must not change stratified picks when nothing is a duplicate:
+both importers, streamed and from the puzzle store.
+
+  python3 -m pytest test_selection.py
+"""
+
+import argparse
+import csv
+import json
+import random
+from collections import Counter
+
+import chess
+import pytest
+
+import import_puzzles
+from import_puzzles_interactive import export_queries
+from puzzle_db import PUZZLE_COLUMNS
+from puzzle_dedup import PositionIndex
+from puzzle_store import build_store
+
+QUERY = {
+    "themes": ["fork"],
+    "rating_range": [1400, 1899],
+    "max_candidates": 50,
+    "selection": True,
+    "output_name": "stratified",
+}
+
+
+def write_database(path, seed=7):
+    """A small lichess_db_puzzle.csv where every puzzle has its own position"""
+    rng = random.Random(seed)
+    rows = []
+    for king in range(chess.A6, chess.H8 + 1):
+        for rook in range(chess.A2, chess.H4 + 1):
+            board = chess.Board(None)
+            board.set_piece_at(chess.A1, chess.Piece(chess.KING, chess.WHITE))
+            board.set_piece_at(king, chess.Piece(chess.KING, chess.BLACK))
+            board.set_piece_at(rook, chess.Piece(chess.ROOK, chess.WHITE))
+            board.turn = chess.BLACK
+            first = chess.Move(king, king - 8).uci()
+            rows.append({
+                'PuzzleId': f"t{len(rows):05d}",
+                'FEN': board.fen(),
+                'Moves': f"{first} a1b1",
+                'Rating': rng.randint(1300, 2000),
+                'RatingDeviation': rng.randint(60, 120),
+                'Popularity': rng.randint(-20, 100),
+                'NbPlays': rng.randint(50, 5000),
+                'Themes': rng.choice(['fork', 'fork short', 'pin', 'fork middlegame']),
+            })
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=PUZZLE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.fixture(params=['stream', 'store'])
+def db_file(request, tmp_path):
+    db_file = tmp_path / 'lichess_db_puzzle.csv'
+    write_database(db_file)
+    if request.param == 'store':
+        build_store(db_file)
+    return db_file
+
+
+def bands(ratings):
+    return sorted(Counter(rating // 100 for rating in ratings).items())
+
+
+def test_interactive_dedupe_keeps_bands(db_file, tmp_path):
+    (_, plain, _), = export_queries([QUERY], db_file, output_dir=tmp_path / 'plain')
+    (_, deduped, _), = export_queries([QUERY], db_file, output_dir=tmp_path / 'deduped', positions=PositionIndex())
+
+    assert len(plain) == QUERY['max_candidates']
+    assert bands(deduped['Rating']) == bands(plain['Rating'])
+    assert deduped['PuzzleId'].tolist() == plain['PuzzleId'].tolist()
+
+
+def test_levels_dedupe_keeps_bands(db_file, monkeypatch):
+    level = dict(QUERY, title="stratified forks")
+    monkeypatch.setattr(import_puzzles, 'LEVEL_THEMES', {"level_test": level})
+    monkeypatch.setattr(PositionIndex, 'from_puzzle_sets', classmethod(lambda cls: cls()))
+    monkeypatch.chdir(db_file.parent)
+
+    picks = {}
+    for dedupe in (False, True):
+        args = argparse.Namespace(levels=None, criteria=None, validate=False, dedupe=dedupe, near=False, format='pretty')
+        import_puzzles.run(args)
+        with open('output/level_test_candidates.json') as f:
+            picks[dedupe] = [puzzle['rating'] for puzzle in json.load(f)]
+
+    assert len(picks[False]) == QUERY['max_candidates']
+    assert bands(picks[True]) == bands(picks[False])
+    assert picks[True] == picks[False]
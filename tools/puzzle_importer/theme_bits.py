@@ -0,0 +1,183 @@
+# tools/puzzle_importer/theme_bits.py
+"""
+Theme Bitsets
+-------------
+Dictionary-encodes the space-separated Lichess `Themes` column into a
+fixed-width bitset per puzzle (THEME_WORDS x 64 bits), so theme filters
+become bitwise operations instead of string scans.
+
+Themes are matched as whole tokens: `mate` does not match `mateIn1`.
+The known vocabulary (LICHESS_THEMES.md) gets the first bits; themes not
+listed there are appended as they are seen.
+
+Usage:
+  python3 theme_bits.py [PATH]   # benchmark + oracle check on the database
+"""
+
+import sys
+import time
+
+import numpy as np
+
+THEME_WORDS = 2
+MAX_THEMES = THEME_WORDS * 64
+
+MATCH_MODES = ('any', 'all', 'none')
+
+# Keep in sync with LICHESS_THEMES.md
+LICHESS_THEMES = (
+    # Checkmate patterns
+    'mate', 'mateIn1', 'mateIn2', 'mateIn3', 'mateIn4', 'mateIn5',
+    'anastasiaMate', 'arabianMate', 'backRankMate', 'bodenMate',
+    'doubleBishopMate', 'dovetailMate', 'hookMate', 'killBoxMate',
+    'smotheredMate', 'vukovicMate',
+    # Tactical motifs
+    'fork', 'pin', 'skewer', 'discoveredAttack', 'doubleCheck', 'xRayAttack',
+    'attraction', 'deflection', 'clearance', 'interference', 'intermezzo',
+    'sacrifice', 'trappedPiece', 'zugzwang',
+    # Piece-specific
+    'advancedPawn', 'promotion', 'underPromotion', 'enPassant', 'castling',
+    'quietMove',
+    # Defenders & defense
+    'capturingDefender', 'defensiveMove', 'hangingPiece', 'exposedKing',
+    'kingSafety',
+    # Endgame types
+    'endgame', 'pawnEndgame', 'queenEndgame', 'rookEndgame', 'bishopEndgame',
+    'knightEndgame', 'queenRookEndgame',
+    # Attack targets
+    'attackingF2F7', 'kingsideAttack', 'queensideAttack',
+    # Game phase
+    'opening', 'middlegame',
+    # Difficulty/quality
+    'oneMove', 'short', 'long', 'veryLong', 'master', 'masterVsMaster',
+    'superGM',
+    # Result/evaluation
+    'advantage', 'crushing', 'equality',
+)
+
+
+def known_vocabulary():
+    """Fresh theme -> bit number mapping seeded with LICHESS_THEMES"""
+    return {theme: code for code, theme in enumerate(LICHESS_THEMES)}
+
+
+def encode_themes(themes, vocabulary):
+    """
+    Encode a Series of theme strings as a (THEME_WORDS, rows) uint64 array.
+
+    Word-major layout keeps each 64-bit word contiguous so the mask ops
+    below stream through memory. `vocabulary` maps theme name -> bit number
+    and is extended in place with any theme seen for the first time.
+    """
+    bits = np.zeros((THEME_WORDS, len(themes)), dtype=np.uint64)
+
+    tokens = themes.reset_index(drop=True).str.split().explode().dropna()
+    tokens = tokens[tokens != '']
+    if len(tokens) == 0:
+        return bits
+
+    for theme in tokens.unique():
+        if theme not in vocabulary:
+            if len(vocabulary) >= MAX_THEMES:
+                raise ValueError(f"More than {MAX_THEMES} distinct themes, cannot encode '{theme}'")
+            vocabulary[theme] = len(vocabulary)
+
+    codes = tokens.map(vocabulary).to_numpy(dtype=np.int64)
+    rows = tokens.index.to_numpy()
+    np.bitwise_or.at(
+        bits,
+        (codes // 64, rows),
+        np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64)),
+    )
+    return bits
+
+
+def query_bits(codes):
+    """Bitset with the given bit numbers set"""
+    query = np.zeros(THEME_WORDS, dtype=np.uint64)
+    for code in codes:
+        query[code // 64] |= np.uint64(1) << np.uint64(code % 64)
+    return query
+
+
+def has_any(bits, query):
+    """Rows sharing at least one bit with `query`"""
+    mask = np.zeros(bits.shape[1], dtype=bool)
+    for word, wanted in enumerate(query):
+        if wanted:
+            mask |= (bits[word] & wanted) != 0
+    return mask
+
+
+def has_all(bits, query):
+    """Rows with every bit of `query` set"""
+    mask = np.ones(bits.shape[1], dtype=bool)
+    for word, wanted in enumerate(query):
+        if wanted:
+            mask &= (bits[word] & wanted) == wanted
+    return mask
+
+
+def theme_mask(bits, vocabulary, themes, mode='any'):
+    """
+    Boolean mask over `bits` for a theme query.
+
+    any  - puzzle has at least one of `themes`
+    all  - puzzle has every one of `themes`
+    none - puzzle has none of `themes` (exclude)
+    """
+    if mode not in MATCH_MODES:
+        raise ValueError(f"Unknown theme match mode '{mode}' (expected one of {MATCH_MODES})")
+
+    known = [vocabulary[theme] for theme in themes if theme in vocabulary]
+
+    if mode == 'all':
+        if len(known) < len(set(themes)):
+            # A theme nobody has can't be matched
+            return np.zeros(bits.shape[1], dtype=bool)
+        return has_all(bits, query_bits(known))
+
+    matches = has_any(bits, query_bits(known))
+    return ~matches if mode == 'none' else matches
+
+
+def oracle_match(themes_str, themes, mode='any'):
+    """Reference tokenized set-membership match for a single puzzle"""
+    tokens = set(themes_str.split())
+    wanted = set(themes)
+    if mode == 'all':
+        return wanted <= tokens
+    if mode == 'none':
+        return not (wanted & tokens)
+    return bool(wanted & tokens)
+
+
+def main():
+    # Imported here: both modules import theme_bits themselves
+    from puzzle_db import find_database
+    from puzzle_store import load_store, store_path_for
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else find_database()
+    store = load_store(db_path) if db_path else None
+    if store is None:
+        print("❌ No puzzle store found - run 'python3 puzzle_store.py' first")
+        sys.exit(1)
+
+    print(f"📦 {store_path_for(db_path)}: {len(store):,} puzzles")
+    bits = np.asarray(store.theme_bits)
+    sample = np.arange(min(len(store), 100_000))
+    themes_column = store.strings('Themes', sample)
+
+    queries = [(['fork', 'pin'], mode) for mode in MATCH_MODES] + [(['mate'], 'any')]
+    for themes, mode in queries:
+        start = time.perf_counter()
+        mask = theme_mask(bits, store.vocabulary, themes, mode)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        expected = np.array([oracle_match(value, themes, mode) for value in themes_column], dtype=bool)
+        status = "✅" if np.array_equal(mask[sample], expected) else "❌ MISMATCH"
+        print(f"  {mode.upper():4} {' '.join(themes):10} {int(mask.sum()):>9,} matches  {elapsed:7.2f} ms  {status}")
+
+
+if __name__ == '__main__':
+    main()
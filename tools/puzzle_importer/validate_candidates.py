@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# tools/puzzle_importer/validate_candidates.py
+"""
+Candidate Puzzle Validator
+--------------------------
+Replays every puzzle's moveSequence from its FEN with python-chess and
+reports, per puzzle:
+
+  invalid_fen        FEN can't be parsed
+  no_moves           empty moveSequence
+  invalid_uci        a move isn't UCI notation
+  illegal_move       a move is illegal in the position it is played in
+  not_checkmate      a mate-themed puzzle doesn't end in checkmate
+  to_move_mismatch   convert_puzzle_to_app_format would give the wrong toMove
+
+Validation is sharded across a process pool.
+
+Usage:
+  python3 validate_candidates.py output/*_candidates.json
+  python3 validate_candidates.py FILE... --report report.json [--workers N]
+
+Accepts candidate files (list of puzzles with fen/moveSequence) and app
+puzzle sets ({"puzzles": [...]} with solutionSequence). Exits with status 1
+if any puzzle fails.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import chess
+
+from json_stream import iter_puzzles
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'puzzle_reviewer'))
+from convert_puzzles import determine_user_color  # noqa: E402
+
+SHARDS_PER_WORKER = 4
+
+
+def is_mate_theme(theme):
+    """mate, mateIn1..5 and named patterns like backRankMate"""
+    return theme == 'mate' or theme.startswith('mateIn') or theme.endswith('Mate')
+
+
+def puzzle_moves(puzzle):
+    """UCI moves of a candidate (moveSequence) or app puzzle (solutionSequence)"""
+    if 'moveSequence' in puzzle:
+        return list(puzzle['moveSequence'])
+    return [step['move'] for step in puzzle.get('solutionSequence', [])]
+
+
+def validate_puzzle(puzzle):
+    """Validate one puzzle; returns a JSON-serializable result dict"""
+    moves = puzzle_moves(puzzle)
+    result = {"id": puzzle.get('id'), "valid": True, "errors": []}
+
+    def fail(code, **details):
+        result['valid'] = False
+        result['errors'].append({"code": code, **details})
+
+    try:
+        board = chess.Board(puzzle['fen'])
+    except (KeyError, ValueError) as e:
+        fail('invalid_fen', message=str(e))
+        return result
+
+    if not moves:
+        fail('no_moves')
+        return result
+
+    user_color = None
+    for index, uci in enumerate(moves):
+        try:
+            move = chess.Move.from_uci(uci)
+        except ValueError:
+            fail('invalid_uci', index=index, move=uci)
+            return result
+
+        if not board.is_legal(move):
+            fail('illegal_move', index=index, move=uci, fen=board.fen())
+            return result
+
+        board.push(move)
+        if index == 0:
+            # The user answers the opponent's first move
+            user_color = "white" if board.turn == chess.WHITE else "black"
+
+    themes = puzzle.get('themes', [])
+    if any(is_mate_theme(theme) for theme in themes) and not board.is_checkmate():
+        fail('not_checkmate', final_fen=board.fen())
+
+    derived = determine_user_color(puzzle['fen'], moves)
+    if user_color and derived != user_color:
+        fail('to_move_mismatch', derived=derived, expected=user_color)
+
+    return result
+
+
+def _validate_shard(puzzles):
+    return [validate_puzzle(puzzle) for puzzle in puzzles]
+
+
+def validate_puzzles(puzzles, workers=None):
+    """Validate puzzles on a process pool, results in input order"""
+    if not puzzles:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(puzzles) < 200:
+        return _validate_shard(puzzles)
+
+    shard_size = max(1, -(-len(puzzles) // (workers * SHARDS_PER_WORKER)))
+    shards = [puzzles[i:i + shard_size] for i in range(0, len(puzzles), shard_size)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for shard_results in pool.map(_validate_shard, shards):
+            results.extend(shard_results)
+    return results
+
+
+def load_puzzles(path):
+    """Puzzles from a candidate file (JSON or NDJSON) or an app puzzle set"""
+    return list(iter_puzzles(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate puzzle moves with python-chess")
+    parser.add_argument('files', nargs='+', help="candidate JSON files or puzzle sets")
+    parser.add_argument('--report', help="write per-puzzle results as JSON to this file")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    report = {}
+    failures = 0
+    total = 0
+    for file in args.files:
+        puzzles = load_puzzles(file)
+        results = validate_puzzles(puzzles, args.workers)
+        report[file] = results
+
+        bad = [result for result in results if not result['valid']]
+        failures += len(bad)
+        total += len(results)
+
+        status = "✅" if not bad else "❌"
+        print(f"{status} {file}: {len(results) - len(bad)}/{len(results)} valid")
+        for result in bad[:10]:
+            codes = ', '.join(error['code'] for error in result['errors'])
+            print(f"     {result['id']}: {codes}")
+        if len(bad) > 10:
+            print(f"     ... and {len(bad) - 10} more")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({"total": total, "failures": failures, "files": report}, f, indent=2)
+        print(f"\n📄 Report written to {args.report}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# tools/puzzle_reviewer/batch_convert.py
+"""
+Batch Puzzle Conversion
+-----------------------
+Converts many review/creator exports into puzzle sets in one run, from a
+manifest instead of one convert_puzzles.py call per file:
+
+  {
+    "output_dir": "../../assets/data/puzzles",
+    "sets": [
+      {"input": "../puzzle_reference/unconverted/all_puzzles_edited.json",
+       "level_id": "0003", "title": "Mate in One", "description": "...",
+       "output": "puzzle_set_0003.json"}
+    ]
+  }
+
+Paths are relative to the manifest. `output_dir` defaults to
+assets/data/puzzles, `output` to puzzle_set_<level_id>.json, and title and
+description to the converter's defaults.
+
+Files are converted on a process pool, one file per task (big single
+files get the solution-tree pool instead). Every set is written
+atomically, so a failed file leaves any previous version in place, and
+index.json and puzzles.bundle are rebuilt from the sets actually on disk
+in assets/data/puzzles afterwards. Conversions are cached as usual:
+workers read the shared cache and the new entries are merged and saved
+once at the end.
+
+Usage:
+  python3 batch_convert.py MANIFEST [--workers N] [--no-cache] [--compact]
+  python3 convert_puzzles.py --manifest MANIFEST      # same
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_cache import DEFAULT_CACHE_FILE, ConversionCache
+from convert_puzzles import DEFAULT_DESCRIPTION, DEFAULT_TITLE, convert_file, print_unreadable, update_bundle
+from puzzle_bundle import PUZZLES_DIR
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'puzzle_importer'))
+import pipeline_trace  # noqa: E402
+from pipeline_trace import stage  # noqa: E402
+
+MANIFEST_FIELDS = {"input", "level_id", "title", "description", "output"}
+
+_worker_cache = None
+
+
+def load_manifest(path):
+    """make_config()-style dicts for every set in a manifest; raises ValueError for invalid manifests"""
+    path = Path(path)
+    with open(path) as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('sets'), list):
+        raise ValueError("manifest must be an object with a \"sets\" list")
+
+    base = path.resolve().parent
+    output_dir = base / manifest['output_dir'] if manifest.get('output_dir') else PUZZLES_DIR
+
+    configs = []
+    outputs = {}
+    for number, entry in enumerate(manifest['sets'], 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"set {number}: must be an object")
+        unknown = set(entry) - MANIFEST_FIELDS
+        if unknown:
+            raise ValueError(f"set {number}: unknown fields: {', '.join(sorted(unknown))}")
+        for field in ('input', 'level_id'):
+            if not entry.get(field):
+                raise ValueError(f"set {number}: missing \"{field}\"")
+
+        level_id = str(entry['level_id'])
+        output = output_dir / (entry.get('output') or f"puzzle_set_{level_id}.json")
+        if output.resolve() in outputs:
+            raise ValueError(f"set {number}: writes {output.name} like set {outputs[output.resolve()]}")
+        outputs[output.resolve()] = number
+
+        configs.append({
+            "input_file": base / entry['input'],
+            "level_id": level_id,
+            "title": entry.get('title') or DEFAULT_TITLE,
+            "description": entry.get('description') or DEFAULT_DESCRIPTION,
+            "output_file": output,
+        })
+    return configs
+
+
+def _init_worker(cache_path):
+    global _worker_cache
+    _worker_cache = ConversionCache(cache_path) if cache_path is not None else None
+
+
+def convert_one(config, fmt='pretty', workers=1):
+    """
+    Convert one manifest entry with the worker's cache. Returns a result
+    dict: output, count, errors (strings), seconds, failure (or None) and
+    the cache entries it added.
+    """
+    cache = _worker_cache
+    known = set(cache.entries) if cache is not None else set()
+    start = time.perf_counter()
+    result = {"input": str(config['input_file']), "output": str(config['output_file']),
+              "count": 0, "errors": [], "failure": None, "new_entries": {}}
+    try:
+        output_path, count, errors = convert_file(**config, cache=cache, fmt=fmt, workers=workers)
+        result['count'] = count
+        result['errors'] = [f"puzzle {i} ({puzzle.get('id', '?')}): {e}" for i, puzzle, e in errors]
+    except Exception as e:
+        result['failure'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - start
+    if cache is not None:
+        result['hits'], result['misses'] = cache.hits, cache.misses
+        cache.hits = cache.misses = 0
+        result['new_entries'] = {key: cache.entries[key] for key in cache.entries.keys() - known}
+    return result
+
+
+def convert_all(configs, cache_path, fmt='pretty', workers=None):
+    """Convert every manifest entry (on a process pool); results in manifest order"""
+    workers = workers or os.cpu_count() or 1
+    processes = min(workers, len(configs))
+    # Leftover CPUs go to each file's solution-tree pool
+    tree_workers = max(1, workers // max(processes, 1))
+
+    if processes <= 1:
+        _init_worker(cache_path)
+        return [convert_one(config, fmt, tree_workers) for config in configs]
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(cache_path,)) as pool:
+        return list(pool.map(convert_one, configs, [fmt] * len(configs), [tree_workers] * len(configs)))
+
+
+def run_manifest(manifest_path, fmt='pretty', use_cache=True, workers=None, bundle=False):
+    """Convert a manifest, rebuild index/bundle and print a summary; returns the number of failed files"""
+    try:
+        configs = load_manifest(manifest_path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Invalid manifest {manifest_path}: {e}")
+        return 1
+    if not configs:
+        print(f"⚠️  {manifest_path} lists no sets")
+        return 0
+    if fmt == 'ndjson':
+        # The app (and the bundle rebuild) only read JSON sets
+        in_assets = [Path(config['output_file']).name for config in configs
+                     if Path(config['output_file']).resolve().parent == PUZZLES_DIR]
+        if in_assets:
+            print(f"❌ --ndjson can't write into assets/data/puzzles ({', '.join(in_assets)}); "
+                  f"set the manifest's output_dir elsewhere")
+            return len(in_assets)
+
+    cache_path = DEFAULT_CACHE_FILE if use_cache else None
+    print(f"\n📖 Converting {len(configs)} files from {manifest_path}...")
+    start = time.perf_counter()
+    with stage('batch', rows_in=len(configs)) as s:
+        results = convert_all(configs, cache_path, fmt, workers)
+        s.add(rows_out=sum(1 for result in results if result['failure'] is None))
+    elapsed = time.perf_counter() - start
+
+    if use_cache:
+        cache = ConversionCache(cache_path)
+        for result in results:
+            for key, value in result['new_entries'].items():
+                cache.put(key, value)
+        cache.save()
+
+    print("\n📊 SUMMARY")
+    for result in results:
+        name = Path(result['output']).name
+        if result['failure']:
+            print(f"   ❌ {name:24} {result['failure']}")
+            continue
+        cached = f", {result['hits']} cached" if 'hits' in result else ""
+        print(f"   ✅ {name:24} {result['count']:6} puzzles in {result['seconds']:.2f}s{cached}")
+        for error in result['errors']:
+            print(f"      ⚠️  {error}")
+
+    failed = [result for result in results if result['failure']]
+    total = sum(result['count'] for result in results)
+    print(f"\n   Files: {len(results) - len(failed)} converted, {len(failed)} failed")
+    print(f"   Puzzles: {total} in {elapsed:.2f}s ({total / elapsed if elapsed else 0:,.0f} puzzles/s)")
+    skipped = sum(len(result['errors']) for result in results)
+    if skipped:
+        print(f"   Skipped puzzles: {skipped}")
+
+    # index.json and puzzles.bundle list what is on disk now, once per run
+    written = [Path(result['output']).resolve() for result in results if not result['failure']]
+    if written and (bundle or any(path.parent == PUZZLES_DIR for path in written)):
+        bundle_path, set_count, index, repeated, unreadable = update_bundle(written[0], force=True)
+        print(f"   Bundle: {bundle_path} ({len(index)} puzzles from {set_count} sets, index.json regenerated)")
+        for puzzle_id, file_name in repeated:
+            print(f"⚠️  {puzzle_id} in {file_name} repeats an id from {index[puzzle_id]}")
+        print_unreadable(unreadable)
+    return len(failed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert every export listed in a manifest into puzzle sets")
+    parser.add_argument('manifest', metavar='MANIFEST', help="JSON manifest (see batch_convert.py)")
+    parser.add_argument('--workers', type=int, help="processes (default: all CPUs)")
+    parser.add_argument('--no-cache', action='store_true', help="convert everything from scratch")
+    parser.add_argument('--compact', dest='format', action='store_const', const='compact', default='pretty',
+                        help="write unindented JSON")
+    parser.add_argument('--bundle', action='store_true',
+                        help="rebuild assets/data/puzzles/puzzles.bundle and index.json even if no set was written there")
+    pipeline_trace.add_arguments(parser)
+    args = parser.parse_args()
+
+    pipeline_trace.start_from_args(args)
+    try:
+        failed = run_manifest(args.manifest, args.format, not args.no_cache, args.workers, args.bundle)
+    finally:
+        pipeline_trace.finish()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
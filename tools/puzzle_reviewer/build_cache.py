@@ -0,0 +1,71 @@
+# tools/puzzle_reviewer/build_cache.py
+"""
+Conversion Cache
+----------------
+Content-addressed on-disk cache for convert_puzzles.py. Each input puzzle
+is keyed by a hash of its canonical JSON plus the converter version, so
+re-running the converter while curating a set only converts puzzles that
+are new or were edited. Bump CONVERTER_VERSION in convert_puzzles.py
+whenever the conversion output changes.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+DEFAULT_CACHE_FILE = Path(__file__).resolve().parent / '.convert_cache.json'
+MAX_ENTRIES = 100_000
+
+
+def puzzle_key(puzzle, converter_version):
+    """Hash of the puzzle's content and the converter version"""
+    canonical = json.dumps(puzzle, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    digest = hashlib.sha256(f"{converter_version}\0{canonical}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """key -> converted puzzle, persisted as one JSON file (in memory only if path is None)"""
+
+    def __init__(self, path=DEFAULT_CACHE_FILE):
+        self.path = Path(path) if path is not None else None
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        if self.path is not None and self.path.exists():
+            try:
+                with open(self.path) as f:
+                    self.entries = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                # A corrupt cache is just an empty cache
+                self.entries = {}
+
+    def get(self, key):
+        value = self.entries.pop(key, None)
+        if value is None:
+            self.misses += 1
+            return None
+        # Re-insert so the most recently used entries survive trimming
+        self.entries[key] = value
+        self.hits += 1
+        return dict(value)
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.dirty = True
+
+    def save(self):
+        """Write the cache atomically, dropping the least recently used entries"""
+        if self.path is None or not self.dirty:
+            return
+        if len(self.entries) > MAX_ENTRIES:
+            for key in list(self.entries)[:len(self.entries) - MAX_ENTRIES]:
+                del self.entries[key]
+
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
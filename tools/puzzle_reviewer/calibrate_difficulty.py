@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# tools/puzzle_reviewer/calibrate_difficulty.py
+"""
+Engine Difficulty Calibration
+-----------------------------
+Custom puzzles have no real rating (the creator defaults them to 800, so
+they all come out as difficulty 1). This stage analyses each puzzle with
+a pool of local Stockfish processes (see engine_pool.py) and replaces the
+rating with an estimate built from:
+
+  alternatives   moves within near_cp of the engine's best move in the
+                 puzzle position (an only-move puzzle is harder to find)
+  depth          user moves in the solution, or the mate distance if the
+                 engine finds a longer forced mate
+  swing          how far the evaluation moves in the user's favour from
+                 before the opponent's first move to the puzzle position
+                 (small swings are subtle, huge ones jump out)
+
+Both positions of every puzzle are analysed once per engine and search
+limit and cached (.analysis_cache.json), so re-runs cost nothing. The
+converter then maps the rating to difficulty as usual.
+
+Usage:
+  python3 calibrate_difficulty.py INPUT [-o OUTPUT]      # unrated/custom puzzles only
+  python3 calibrate_difficulty.py INPUT --all            # re-rate every puzzle
+  python3 calibrate_difficulty.py INPUT --depth 22 --multipv 6 --workers 8
+  python3 convert_puzzles.py INPUT ... --calibrate       # same, while converting
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import chess
+
+from convert_puzzles import rating_to_difficulty
+from engine_pool import DEFAULT_ANALYSIS_CACHE, DEFAULT_LIMITS, EnginePool, analyse_positions, open_analysis_cache
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'puzzle_importer'))
+from json_stream import JsonArrayWriter, iter_puzzles  # noqa: E402
+from pipeline_trace import stage  # noqa: E402
+
+CALIBRATION = {
+    "base": 700,
+    "per_depth": 250,          # each solution move beyond the first
+    "only_move": 250,          # no alternative within near_cp of the best move
+    "per_alternative": -75,    # each alternative within near_cp
+    "forced": -300,            # the best move is the only legal one
+    "near_cp": 50,
+    "subtle_swing": 200,       # bonus for a swing of 0, fading out at swing_cap
+    "swing_cap": 1000,
+    "min_rating": 400,
+    "max_rating": 2400,
+}
+
+# Puzzles analysed per batch (both positions of each spread over the pool)
+CALIBRATE_BATCH = 64
+
+
+def needs_calibration(puzzle):
+    """Custom and unrated puzzles have no real rating to keep"""
+    return puzzle.get('custom') or 'rating' not in puzzle
+
+
+def puzzle_positions(puzzle):
+    """(FEN before the opponent's first move, FEN of the puzzle position, key move) or raises ValueError"""
+    moves = puzzle.get('moveSequence') or []
+    if len(moves) < 2:
+        raise ValueError("needs the opponent's move and at least one user move")
+    board = chess.Board(puzzle['fen'])
+    for index, uci in enumerate(moves[:2]):
+        move = chess.Move.from_uci(uci)
+        if not board.is_legal(move):
+            raise ValueError(f"illegal move {uci}")
+        if index == 0:
+            board.push(move)
+    return puzzle['fen'], board.fen(), moves[1]
+
+
+def _capped(score, cap):
+    return max(-cap, min(cap, score))
+
+
+def measure(puzzle, before_lines, after_lines, after_fen, calibration=CALIBRATION):
+    """Calibration metrics and rating for one puzzle from its two analyses"""
+    moves = puzzle['moveSequence']
+    user_moves = len(moves) // 2
+    best = after_lines[0] if after_lines else None
+    board = chess.Board(after_fen)
+
+    alternatives = 0
+    if best is not None:
+        alternatives = sum(1 for line in after_lines[1:] if best['score'] - line['score'] <= calibration['near_cp'])
+    mate_in = best['mate'] if best is not None and best['mate'] and best['mate'] > 0 else None
+    depth = max(user_moves, mate_in or 0)
+
+    cap = calibration['swing_cap']
+    before = -before_lines[0]['score'] if before_lines else 0  # from the user's side
+    after = best['score'] if best is not None else 0
+    swing = max(0, _capped(after, cap) - _capped(before, cap))
+
+    key_rank = next((i + 1 for i, line in enumerate(after_lines) if line['move'] == moves[1]), None)
+
+    rating = calibration['base'] + calibration['per_depth'] * (depth - 1)
+    if board.legal_moves.count() == 1:
+        rating += calibration['forced']
+    elif alternatives == 0:
+        rating += calibration['only_move']
+    else:
+        rating += calibration['per_alternative'] * alternatives
+    rating += round(calibration['subtle_swing'] * (1 - min(swing, cap) / cap))
+    rating = int(max(calibration['min_rating'], min(calibration['max_rating'], rating)))
+
+    return {
+        "rating": rating,
+        "alternatives": alternatives,
+        "depth": depth,
+        "mateIn": mate_in,
+        "swing": swing,
+        # None when the puzzle's key move isn't among the engine's top lines
+        "keyRank": key_rank,
+    }
+
+
+def iter_calibrated(puzzles, pool, cache=None, settings=None, every=False, errors=None,
+                    calibration=CALIBRATION, batch=CALIBRATE_BATCH):
+    """
+    Yield puzzles with engine-calibrated `rating` and a `calibration`
+    block (only unrated/custom ones unless every=True). Puzzles that can't
+    be replayed pass through unchanged and are appended to `errors` as
+    (index, puzzle, exception).
+    """
+    settings = dict(DEFAULT_LIMITS, **(settings or {}))
+    chunk = []
+    for index, puzzle in enumerate(puzzles, 1):
+        chunk.append((index, puzzle))
+        if len(chunk) == batch:
+            yield from _calibrate_batch(chunk, pool, cache, settings, every, errors, calibration)
+            chunk = []
+    if chunk:
+        yield from _calibrate_batch(chunk, pool, cache, settings, every, errors, calibration)
+
+
+def _calibrate_batch(chunk, pool, cache, settings, every, errors, calibration):
+    positions = {}
+    for index, puzzle in chunk:
+        if not (every or needs_calibration(puzzle)):
+            continue
+        try:
+            positions[index] = puzzle_positions(puzzle)
+        except (KeyError, ValueError, TypeError) as e:
+            if errors is not None:
+                errors.append((index, puzzle, e))
+
+    with stage('calibrate', rows_in=len(positions)) as s:
+        fens = [fen for before, after, _ in positions.values() for fen in (before, after)]
+        lines = analyse_positions(fens, pool, cache, settings) if fens else {}
+        s.add(rows_out=len(positions))
+
+    for index, puzzle in chunk:
+        if index not in positions:
+            yield puzzle
+            continue
+        before, after, _ = positions[index]
+        metrics = measure(puzzle, lines[before], lines[after], after, calibration)
+        calibrated = dict(puzzle, rating=metrics['rating'])
+        calibrated['calibration'] = dict(metrics, previousRating=puzzle.get('rating'))
+        yield calibrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate puzzles with a local engine pool")
+    parser.add_argument('input_file', metavar='INPUT', help="puzzles JSON from the review UI or creator")
+    parser.add_argument('-o', '--output', help="output file (default: INPUT with _calibrated suffix)")
+    parser.add_argument('--all', action='store_true', help="re-rate every puzzle, not just custom/unrated ones")
+    parser.add_argument('--engine', help="UCI engine binary (default: $STOCKFISH_PATH or stockfish on PATH)")
+    parser.add_argument('--workers', type=int, help="engine processes (default: all CPUs)")
+    limits = parser.add_mutually_exclusive_group()
+    limits.add_argument('--depth', type=int, help=f"search depth (default: {DEFAULT_LIMITS['depth']})")
+    limits.add_argument('--nodes', type=int, help="nodes per position")
+    limits.add_argument('--movetime', type=int, help="milliseconds per position")
+    parser.add_argument('--multipv', type=int, default=DEFAULT_LIMITS['multipv'],
+                        help=f"lines per position (default: {DEFAULT_LIMITS['multipv']})")
+    parser.add_argument('--no-cache', action='store_true', help="don't read or write .analysis_cache.json")
+    args = parser.parse_args()
+
+    input_file = Path(args.input_file)
+    if not input_file.exists():
+        print(f"❌ File not found: {input_file}")
+        sys.exit(1)
+    output_file = Path(args.output) if args.output else input_file.with_name(f"{input_file.stem}_calibrated.json")
+
+    settings = {"multipv": args.multipv}
+    if args.nodes or args.movetime:
+        settings.update(depth=None, nodes=args.nodes, movetime=args.movetime)
+    elif args.depth:
+        settings['depth'] = args.depth
+
+    try:
+        pool = EnginePool(args.engine, args.workers)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    cache = open_analysis_cache(None if args.no_cache else DEFAULT_ANALYSIS_CACHE)
+
+    print(f"🔬 Calibrating {input_file} with {Path(pool.path).name} x{pool.size}...")
+    errors = []
+    tmp_file = output_file.with_name(output_file.name + '.tmp')
+    with pool, open(tmp_file, 'w') as f, JsonArrayWriter(f) as out:
+        for puzzle in iter_calibrated(iter_puzzles(input_file), pool, cache, settings, args.all, errors):
+            out.write(puzzle)
+            metrics = puzzle.get('calibration')
+            if metrics:
+                print(f"   {str(puzzle.get('id')):24} {str(metrics['previousRating']):>5} -> {metrics['rating']:4} "
+                      f"(difficulty {rating_to_difficulty(metrics['rating'])}) | {metrics['alternatives']} alt, "
+                      f"depth {metrics['depth']}, swing {metrics['swing']}"
+                      + ("" if metrics['keyRank'] else " | ⚠️  key move not in engine's top lines"))
+    os.replace(tmp_file, output_file)
+    cache.save()
+
+    for index, puzzle, e in errors:
+        print(f"⚠️  Puzzle {index} ({puzzle.get('id')}) not calibrated: {e}")
+    print(f"\n✅ {out.count} puzzles written to {output_file} "
+          f"({cache.misses} positions analysed, {cache.hits} from cache)")
+
+
+if __name__ == '__main__':
+    main()
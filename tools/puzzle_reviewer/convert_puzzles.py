@@ -4,15 +4,71 @@ Puzzle Converter
 ----------------
 Converts puzzles from review UI / puzzle creator format
 to the final puzzle_set_XXXX.json format required by the app.
+
+Each puzzle also gets a solutionTree listing every winning user move
+(see solution_tree.py), built on a process pool.
+
+Converted puzzles are cached by content hash (see build_cache.py), so
+re-running only converts new or edited puzzles. Input is read and output
+written one puzzle at a time (see puzzle_importer/json_stream.py), so
+memory stays flat for very large sets.
+
+Usage:
+  python3 convert_puzzles.py                       # interactive
+  python3 convert_puzzles.py INPUT [LEVEL_ID] [TITLE] [DESCRIPTION] [OUTPUT]
+  python3 convert_puzzles.py INPUT ... --watch     # re-emit on every change to INPUT
+  python3 convert_puzzles.py --manifest FILE       # many exports -> many sets (see batch_convert.py)
+  python3 convert_puzzles.py INPUT ... --no-cache  # convert everything from scratch
+  python3 convert_puzzles.py INPUT ... --compact   # unindented JSON (--ndjson: one puzzle per line,
+                                                   # puzzle_set_<LEVEL_ID>.ndjson, never into assets)
+  python3 convert_puzzles.py INPUT ... --bundle    # also rebuild puzzles.bundle + index.json
+  python3 convert_puzzles.py INPUT ... --calibrate # rate custom puzzles with Stockfish first
+  python3 convert_puzzles.py INPUT ... --profile   # per-stage time, rows and peak memory
+                                                   # (--trace FILE / --cprofile FILE)
+
+Writing a set into assets/data/puzzles rebuilds the packed bundle and
+index.json there automatically (see puzzle_bundle.py). The app only loads
+JSON sets, so NDJSON output is refused there.
+
+Library use:
+
+  from convert_puzzles import convert_file
+  output_path, count, errors = convert_file("selected.json", "0011", "Checkmate Basics")
 """
 
-import json
+import argparse
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def convert_puzzle_to_app_format(puzzle, puzzle_index):
+from build_cache import ConversionCache, puzzle_key
+from puzzle_bundle import PUZZLES_DIR, rebuild
+from solution_tree import build_solution_tree, build_trees
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'puzzle_importer'))
+import pipeline_trace  # noqa: E402
+from json_stream import READ_ERRORS, JsonArrayWriter, format_extension, iter_puzzles  # noqa: E402
+from pipeline_trace import ProgressBar, stage, traced  # noqa: E402
+
+# Bump whenever the conversion output changes, to invalidate cached puzzles
+CONVERTER_VERSION = 3
+
+WATCH_INTERVAL = 0.02
+
+# Puzzles converted per batch; solution trees for a batch are built on the
+# process pool once it has at least POOL_THRESHOLD cache misses
+TREE_BATCH = 512
+POOL_THRESHOLD = 64
+
+DEFAULT_TITLE = "Tactical Puzzles"
+DEFAULT_DESCRIPTION = "Practice tactical patterns"
+
+def convert_puzzle_to_app_format(puzzle, puzzle_index, solution_tree=None):
     """
-    Convert a puzzle from tool format to app format.
+    Convert a puzzle from tool format to app format. `solution_tree` is a
+    precomputed tree from solution_tree.py; it is built here if not given.
 
     Tool format:
     {
@@ -40,13 +96,15 @@ def convert_puzzle_to_app_format(puzzle, puzzle_index):
       "solutionSequence": [
         { "move": "e7e5", "isUserMove": false, "comment": "Opponent moves" },
         { "move": "e2e4", "isUserMove": true, "comment": "Fork!" }
-      ]
+      ],
+      "solutionTree": {
+        "<position after e2e4>": null
+      }
     }
     """
 
-    # Extract FEN to determine whose turn it is
-    fen_parts = puzzle['fen'].split()
-    to_move = "white" if fen_parts[1] == 'w' else "black"
+    # The user plays the side answering the opponent's first move
+    to_move = determine_user_color(puzzle['fen'], puzzle.get('moveSequence', []))
 
     # Generate title based on themes
     themes = puzzle.get('themes', [])
@@ -54,17 +112,7 @@ def convert_puzzle_to_app_format(puzzle, puzzle_index):
     subtitle = generate_subtitle(themes, to_move)
 
     # Determine difficulty based on rating
-    rating = puzzle.get('rating', 800)
-    if rating < 900:
-        difficulty = 1
-    elif rating < 1200:
-        difficulty = 2
-    elif rating < 1500:
-        difficulty = 3
-    elif rating < 1800:
-        difficulty = 4
-    else:
-        difficulty = 5
+    difficulty = rating_to_difficulty(puzzle.get('rating', 800))
 
     # Build solution sequence (alternating user/opponent moves)
     move_sequence = puzzle.get('moveSequence', [])
@@ -77,7 +125,10 @@ def convert_puzzle_to_app_format(puzzle, puzzle_index):
     success_message = generate_success_message(themes)
     failure_message = "Not quite right. Try again!"
 
-    return {
+    if solution_tree is None:
+        solution_tree = build_solution_tree(puzzle['fen'], move_sequence)
+
+    converted = {
         "id": puzzle.get('id', f"puzzle_{puzzle_index:04d}"),
         "title": title,
         "subtitle": subtitle,
@@ -91,6 +142,60 @@ def convert_puzzle_to_app_format(puzzle, puzzle_index):
         "solutionMoves": user_moves,
         "solutionSequence": solution_sequence
     }
+    # Left out when the line doesn't replay (the app then follows solutionSequence)
+    if solution_tree:
+        converted["solutionTree"] = solution_tree
+    return converted
+
+def rating_to_difficulty(rating):
+    """App difficulty (1-5) for a puzzle rating"""
+    if rating < 900:
+        return 1
+    elif rating < 1200:
+        return 2
+    elif rating < 1500:
+        return 3
+    elif rating < 1800:
+        return 4
+    return 5
+
+def piece_at(fen, square):
+    """Piece letter on a square (e.g. 'e1') of a FEN board, or None"""
+    ranks = fen.split()[0].split('/')
+    file_index = ord(square[0]) - ord('a')
+    rank = ranks[8 - int(square[1])]
+
+    column = 0
+    for char in rank:
+        if char.isdigit():
+            column += int(char)
+            continue
+        if column == file_index:
+            return char
+        column += 1
+    return None
+
+def determine_user_color(fen, moves):
+    """
+    Colour the user plays ("white"/"black").
+
+    The first move in moveSequence is the opponent's, so the user is the
+    other colour from the piece it moves. Lichess FENs have the opponent to
+    move; custom puzzles sometimes don't, so the moved piece is trusted over
+    the FEN's side-to-move field.
+    """
+    fen_side = "white" if fen.split()[1] == 'w' else "black"
+    if not moves:
+        return fen_side
+
+    try:
+        piece = piece_at(fen, moves[0][:2])
+    except (IndexError, ValueError):
+        piece = None
+
+    if piece is None:
+        return "black" if fen_side == "white" else "white"
+    return "black" if piece.isupper() else "white"
 
 def build_solution_sequence(moves, starting_turn, themes):
     """
@@ -208,7 +313,7 @@ def generate_success_message(themes):
     else:
         return "Success!"
 
-def get_user_input():
+def get_user_input(fmt='pretty'):
     """Get puzzle set metadata from user"""
     print("\n" + "="*60)
     print("🔄 PUZZLE CONVERTER")
@@ -235,9 +340,10 @@ def get_user_input():
 
     # Output file
     print("\n📤 OUTPUT:")
-    output_file = input(f"Output filename [puzzle_set_{level_id}.json]: ").strip()
+    default_output = f"puzzle_set_{level_id}{format_extension(fmt)}"
+    output_file = input(f"Output filename [{default_output}]: ").strip()
     if not output_file:
-        output_file = f"puzzle_set_{level_id}.json"
+        output_file = default_output
 
     return {
         "input_file": input_path,
@@ -247,71 +353,325 @@ def get_user_input():
         "output_file": output_file
     }
 
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_converted(puzzles, cache=None, errors=None, workers=None):
+    """
+    Convert tool-format puzzles one at a time, reusing cached conversions
+    for puzzles whose content hasn't changed. Solution trees for the rest
+    are built in batches on a process pool. Failures are appended to
+    `errors` as (index, puzzle, exception) and skipped.
+    """
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    try:
+        for batch in _batches(enumerate(puzzles, 1), TREE_BATCH):
+            with stage('cache', rows_in=len(batch)) as s:
+                keys = [puzzle_key(puzzle, CONVERTER_VERSION) if cache is not None else None for _, puzzle in batch]
+                converted = [cache.get(key) if cache is not None else None for key in keys]
+                misses = [slot for slot, value in enumerate(converted) if value is None]
+                s.add(rows_out=len(batch) - len(misses))
+
+            if pool is None and workers > 1 and len(misses) >= POOL_THRESHOLD:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            lines = [(batch[slot][1].get('fen', ''), batch[slot][1].get('moveSequence', [])) for slot in misses]
+            with stage('solution_trees', rows_in=len(lines)) as s:
+                trees = build_trees(lines, pool if len(misses) >= POOL_THRESHOLD else None, workers)
+                s.add(rows_out=sum(1 for tree in trees if tree))
+
+            for slot, tree in zip(misses, trees):
+                i, puzzle = batch[slot]
+                with stage('convert', rows_in=1) as s:
+                    try:
+                        converted[slot] = convert_puzzle_to_app_format(puzzle, i, tree)
+                    except Exception as e:
+                        if errors is not None:
+                            errors.append((i, puzzle, e))
+                        continue
+                    s.add(rows_out=1)
+                if cache is not None:
+                    cache.put(keys[slot], converted[slot])
+
+            for (i, puzzle), value in zip(batch, converted):
+                if value is None:
+                    continue
+                # The fallback id depends on position, not content
+                value['id'] = puzzle.get('id', f"puzzle_{i:04d}")
+                yield value
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+def convert_puzzles(puzzles, cache=None):
+    """Convert a list of tool-format puzzles; returns (converted, errors)"""
+    errors = []
+    converted_puzzles = list(iter_converted(puzzles, cache, errors))
+    return converted_puzzles, errors
+
+def check_output_format(output_file, fmt):
+    """Raise ValueError for NDJSON aimed at assets/data/puzzles (the app only loads JSON sets)"""
+    if fmt == 'ndjson' and Path(output_file).resolve().parent == PUZZLES_DIR:
+        raise ValueError(f"{Path(output_file).name}: the app only loads JSON puzzle sets; "
+                         f"write NDJSON outside assets/data/puzzles")
+
+def write_puzzle_set(config, converted_puzzles, fmt='pretty', on_puzzle=None):
+    """
+    Stream the final puzzle set JSON to disk (atomically) from any iterable
+    of converted puzzles, calling on_puzzle(count) after each one.
+    Returns (path, puzzle count). Raises ValueError for NDJSON aimed at
+    assets/data/puzzles.
+    """
+    check_output_format(config['output_file'], fmt)
+    header = {
+        "levelId": config['level_id'],
+        "title": config['title'],
+        "description": config['description'],
+    }
+
+    output_path = Path(config['output_file'])
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    try:
+        with stage('write') as s, open(tmp_path, 'w') as f, \
+                JsonArrayWriter(f, fmt, header=header, key='puzzles') as out:
+            for puzzle in converted_puzzles:
+                out.write(puzzle)
+                if on_puzzle:
+                    on_puzzle(out.count)
+            s.add(rows_out=out.count)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, output_path)
+    return output_path, out.count
+
+def make_config(input_file, level_id="0001", title=DEFAULT_TITLE, description=DEFAULT_DESCRIPTION,
+                output_file=None, fmt='pretty'):
+    """Conversion settings, as get_user_input() returns them"""
+    return {
+        "input_file": Path(input_file),
+        "level_id": level_id,
+        "title": title,
+        "description": description,
+        "output_file": output_file or f"puzzle_set_{level_id}{format_extension(fmt)}"
+    }
+
+def convert_file(input_file, level_id="0001", title=DEFAULT_TITLE, description=DEFAULT_DESCRIPTION,
+                 output_file=None, cache=None, fmt='pretty', on_puzzle=None, calibrate=None, workers=None):
+    """
+    Convert one review/creator export into a puzzle set file without any
+    prompts. `calibrate` optionally re-rates the puzzles on the way in
+    (e.g. calibrate_difficulty.iter_calibrated bound to an engine pool).
+    Returns (output_path, puzzle count, errors).
+    """
+    config = make_config(input_file, level_id, title, description, output_file, fmt)
+    errors = []
+    puzzles = traced(iter_puzzles(config['input_file']), 'read', rows=None)
+    if calibrate is not None:
+        puzzles = calibrate(puzzles)
+    converted_puzzles = iter_converted(puzzles, cache, errors, workers)
+    output_path, count = write_puzzle_set(config, converted_puzzles, fmt, on_puzzle)
+    return output_path, count, errors
+
+def update_bundle(output_path, force=False):
+    """
+    Rebuild puzzles.bundle and index.json when a set was written into
+    assets/data/puzzles (or always, with force). Returns rebuild()'s result
+    or None.
+    """
+    if not force and Path(output_path).resolve().parent != PUZZLES_DIR:
+        return None
+    with stage('bundle'):
+        return rebuild(PUZZLES_DIR)
+
+def print_unreadable(unreadable):
+    """Report puzzle sets update_bundle() had to leave out of the bundle"""
+    for file_name, error in unreadable:
+        print(f"⚠️  {file_name} can't be read and was left out of the bundle and index.json: {error}")
+
+def watch(config, cache, fmt='pretty', bundle=False):
+    """Re-emit the puzzle set every time the input file changes"""
+    input_file = config['input_file']
+    print(f"\n👀 Watching {input_file} (Ctrl+C to stop)...")
+
+    last_seen = None
+    try:
+        while True:
+            try:
+                stat = os.stat(input_file)
+            except FileNotFoundError:
+                time.sleep(WATCH_INTERVAL)
+                continue
+
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature != last_seen:
+                start = time.perf_counter()
+                hits_before, misses_before = cache.hits, cache.misses
+                errors = []
+                try:
+                    output_path, count = write_puzzle_set(
+                        config, iter_converted(iter_puzzles(input_file), cache, errors), fmt)
+                except READ_ERRORS:
+                    # Export still being written; try again on the next tick
+                    time.sleep(WATCH_INTERVAL)
+                    continue
+
+                last_seen = signature
+                rebuilt = update_bundle(output_path, bundle)
+                elapsed = (time.perf_counter() - start) * 1000
+
+                print(f"🔄 {time.strftime('%H:%M:%S')} {count} puzzles -> {output_path} "
+                      f"({cache.misses - misses_before} converted, {cache.hits - hits_before} cached, "
+                      f"{elapsed:.1f} ms)")
+                for i, _, e in errors:
+                    print(f"⚠️  Error converting puzzle {i}: {e}")
+                if rebuilt is not None:
+                    print_unreadable(rebuilt[4])
+                cache.save()
+
+            time.sleep(WATCH_INTERVAL)
+    except KeyboardInterrupt:
+        cache.save()
+        print("\n👋 Stopped watching")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert review UI / creator exports to app puzzle sets (prompts when no INPUT is given)")
+    parser.add_argument('input_file', nargs='?', metavar='INPUT', help="puzzles JSON from the review UI or creator")
+    parser.add_argument('level_id', nargs='?', default="0001", metavar='LEVEL_ID', help="level id (default: 0001)")
+    parser.add_argument('title', nargs='?', default=DEFAULT_TITLE, metavar='TITLE', help="level title")
+    parser.add_argument('description', nargs='?', default=DEFAULT_DESCRIPTION, metavar='DESCRIPTION',
+                        help="level description")
+    parser.add_argument('output_file', nargs='?', metavar='OUTPUT',
+                        help="output file (default: puzzle_set_<LEVEL_ID>.json, .ndjson with --ndjson)")
+    parser.add_argument('--watch', action='store_true', help="re-emit the puzzle set on every change to INPUT")
+    parser.add_argument('--manifest', metavar='FILE',
+                        help="convert every set listed in a manifest on a process pool (see batch_convert.py)")
+    parser.add_argument('--no-cache', action='store_true', help="convert everything from scratch")
+    output_format = parser.add_mutually_exclusive_group()
+    output_format.add_argument('--compact', dest='format', action='store_const', const='compact', default='pretty',
+                               help="write unindented JSON")
+    output_format.add_argument('--ndjson', dest='format', action='store_const', const='ndjson',
+                               help="write one puzzle per line (not loadable by the app)")
+    pipeline_trace.add_arguments(parser)
+    parser.add_argument('--bundle', action='store_true',
+                        help="rebuild assets/data/puzzles/puzzles.bundle and index.json after writing")
+    parser.add_argument('--calibrate', action='store_true',
+                        help="rate custom/unrated puzzles with a local engine first (see calibrate_difficulty.py)")
+    parser.add_argument('--engine', help="UCI engine for --calibrate (default: $STOCKFISH_PATH or stockfish on PATH)")
+    return parser.parse_args(argv)
+
 def main():
-    if len(sys.argv) > 1:
-        # Command-line mode
-        input_file = Path(sys.argv[1])
-        if not input_file.exists():
-            print(f"❌ File not found: {input_file}")
+    args = parse_args()
+    pipeline_trace.start_from_args(args)
+    try:
+        run(args)
+    finally:
+        pipeline_trace.finish()
+
+def run(args):
+    """Convert (or watch) the input chosen on the command line or at the prompts"""
+    if args.manifest:
+        # Imported here: batch_convert imports this module
+        from batch_convert import run_manifest
+        if run_manifest(args.manifest, args.format, not args.no_cache, bundle=args.bundle):
             sys.exit(1)
+        return
 
-        level_id = sys.argv[2] if len(sys.argv) > 2 else "0001"
-        title = sys.argv[3] if len(sys.argv) > 3 else "Tactical Puzzles"
-        description = sys.argv[4] if len(sys.argv) > 4 else "Practice tactical patterns"
-        output_file = sys.argv[5] if len(sys.argv) > 5 else f"puzzle_set_{level_id}.json"
-
-        config = {
-            "input_file": input_file,
-            "level_id": level_id,
-            "title": title,
-            "description": description,
-            "output_file": output_file
-        }
+    if args.input_file:
+        # Command-line mode
+        config = make_config(args.input_file, args.level_id, args.title, args.description, args.output_file,
+                             args.format)
+        if not config['input_file'].exists() and not args.watch:
+            print(f"❌ File not found: {config['input_file']}")
+            sys.exit(1)
     else:
         # Interactive mode
-        config = get_user_input()
+        config = get_user_input(args.format)
 
-    # Load puzzles
-    print(f"\n📖 Loading puzzles from {config['input_file']}...")
-    with open(config['input_file'], 'r') as f:
-        puzzles = json.load(f)
-
-    print(f"✅ Loaded {len(puzzles)} puzzles")
+    try:
+        check_output_format(config['output_file'], args.format)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
 
-    # Convert each puzzle
-    print("\n🔄 Converting puzzles to app format...")
-    converted_puzzles = []
-    for i, puzzle in enumerate(puzzles, 1):
+    cache = ConversionCache() if not args.no_cache else None
+    output_format = args.format
+
+    if args.watch:
+        if args.calibrate:
+            print("⚠️  --calibrate is ignored in watch mode; run calibrate_difficulty.py on the export instead")
+        watch(config, cache if cache is not None else ConversionCache(path=None), output_format, args.bundle)
+        return
+
+    calibrate = pool = None
+    calibration_errors = []
+    if args.calibrate:
+        # Imported here: calibrate_difficulty imports this module
+        from calibrate_difficulty import iter_calibrated
+        from engine_pool import DEFAULT_ANALYSIS_CACHE, EnginePool, open_analysis_cache
         try:
-            converted = convert_puzzle_to_app_format(puzzle, i)
-            converted_puzzles.append(converted)
-        except Exception as e:
-            print(f"⚠️  Error converting puzzle {i}: {e}")
-            print(f"   Puzzle data: {puzzle}")
-            continue
-
-    # Build final puzzle set
-    puzzle_set = {
-        "levelId": config['level_id'],
-        "title": config['title'],
-        "description": config['description'],
-        "puzzles": converted_puzzles
-    }
-
-    # Save
-    output_path = Path(config['output_file'])
-    with open(output_path, 'w') as f:
-        json.dump(puzzle_set, f, indent=2)
+            pool = EnginePool(args.engine)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        analysis_cache = open_analysis_cache(None if args.no_cache else DEFAULT_ANALYSIS_CACHE)
+        calibrate = lambda puzzles: iter_calibrated(puzzles, pool, analysis_cache, errors=calibration_errors)
+
+    # Stream puzzles in, convert each (unchanged ones come from the cache)
+    # and stream them straight out to the puzzle set
+    print(f"\n📖 Reading puzzles from {config['input_file']}...")
+    if pool is not None:
+        print(f"🔬 Calibrating custom/unrated puzzles with {Path(pool.path).name} x{pool.size}...")
+    print("🔄 Converting puzzles to app format...")
+    progress = ProgressBar("   Converted", unit='puzzles')
+    try:
+        output_path, count, errors = convert_file(**config, cache=cache, fmt=output_format,
+                                                  on_puzzle=progress.update, calibrate=calibrate)
+    finally:
+        if pool is not None:
+            pool.close()
+    progress.close()
+    for i, puzzle, e in errors:
+        print(f"⚠️  Error converting puzzle {i}: {e}")
+        print(f"   Puzzle data: {puzzle}")
+    if pool is not None:
+        analysis_cache.save()
+        for i, puzzle, e in calibration_errors:
+            print(f"⚠️  Puzzle {i} kept its rating (not calibrated): {e}")
+        print(f"   {analysis_cache.misses} positions analysed, {analysis_cache.hits} from the analysis cache")
+
+    if cache is not None:
+        cache.save()
+        print(f"   {cache.misses} converted, {cache.hits} reused from cache")
 
     print(f"\n✅ SUCCESS!")
-    print(f"   Converted: {len(converted_puzzles)} puzzles")
+    print(f"   Converted: {count} puzzles")
     print(f"   Saved to: {output_path}")
 
+    rebuilt = update_bundle(output_path, args.bundle)
+    if rebuilt is not None:
+        bundle_path, set_count, index, repeated, unreadable = rebuilt
+        print(f"   Bundle: {bundle_path} ({len(index)} puzzles from {set_count} sets, index.json regenerated)")
+        for puzzle_id, file_name in repeated:
+            print(f"⚠️  {puzzle_id} in {file_name} repeats an id from {index[puzzle_id]}")
+        print_unreadable(unreadable)
+
     # Show recommended next steps
     print("\n📋 NEXT STEPS:")
     print(f"   1. Review the output file: {output_path}")
-    print(f"   2. Move to: assets/data/puzzles/puzzle_set_{config['level_id']}.json")
-    print(f"   3. Test in the app!")
+    if output_format == 'ndjson':
+        print("   2. Re-run without --ndjson for a set the app can load")
+    else:
+        print(f"   2. Move to: assets/data/puzzles/puzzle_set_{config['level_id']}.json")
+        print(f"   3. Test in the app!")
     print("\n" + "="*60)
 
 if __name__ == '__main__':
@@ -0,0 +1,201 @@
+# tools/puzzle_reviewer/engine_pool.py
+"""
+Local Engine Pool
+-----------------
+A fixed number of local UCI engine processes (Stockfish by default),
+driven over pipes with python-chess, plus a per-position analysis cache.
+
+    with EnginePool() as pool:
+        lines = analyse_positions(fens, pool, cache, {"depth": 18, "multipv": 5})
+
+Engines start lazily, so a run whose positions are all cached never
+launches one. Each worker thread borrows an engine for one analysis; the
+engines themselves run in parallel as separate processes.
+
+The engine is $STOCKFISH_PATH, or `stockfish` on PATH.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import chess
+import chess.engine
+
+from build_cache import ConversionCache
+
+DEFAULT_ANALYSIS_CACHE = Path(__file__).resolve().parent / '.analysis_cache.json'
+
+# Engine options per process; one thread each, the pool provides the parallelism
+DEFAULT_OPTIONS = {"Threads": 1, "Hash": 32}
+
+DEFAULT_LIMITS = {"depth": 18, "nodes": None, "movetime": None, "multipv": 5}
+
+# Centipawn value for mate scores (mate in N scores MATE_SCORE - N)
+MATE_SCORE = 100_000
+
+
+def find_engine(path=None):
+    """Path to the UCI engine binary, or None if there isn't one"""
+    candidate = path or os.environ.get('STOCKFISH_PATH') or shutil.which('stockfish')
+    if candidate and Path(candidate).exists():
+        return str(candidate)
+    return None
+
+
+def engine_id(path):
+    """Identity of an engine binary for cache keys (no need to start it)"""
+    stat = os.stat(path)
+    return f"{Path(path).name}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def _limit(settings):
+    return chess.engine.Limit(
+        depth=settings.get('depth'),
+        nodes=settings.get('nodes'),
+        time=settings['movetime'] / 1000 if settings.get('movetime') else None,
+    )
+
+
+class EnginePool:
+    """Up to `size` engine processes, each lent to one analysis at a time"""
+
+    def __init__(self, path=None, size=None, options=None):
+        self.path = find_engine(path)
+        if self.path is None:
+            raise FileNotFoundError("No UCI engine found: install Stockfish or set STOCKFISH_PATH")
+        self.size = size or os.cpu_count() or 1
+        self.options = dict(DEFAULT_OPTIONS, **(options or {}))
+        self.id = engine_id(self.path)
+        self.idle = queue.Queue()
+        self.engines = []
+        self.lock = threading.Lock()
+
+    def _start(self):
+        engine = chess.engine.SimpleEngine.popen_uci(self.path)
+        engine.configure({name: value for name, value in self.options.items() if name in engine.options})
+        return engine
+
+    def _acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if len(self.engines) < self.size:
+                engine = self._start()
+                self.engines.append(engine)
+                return engine
+        return self.idle.get()
+
+    def _discard(self, engine):
+        with self.lock:
+            if engine in self.engines:
+                self.engines.remove(engine)
+        try:
+            engine.quit()
+        except (chess.engine.EngineError, chess.engine.EngineTerminatedError, OSError):
+            pass
+
+    def run(self, task):
+        """task(engine) on a borrowed engine; a crashed engine is replaced and the task retried once"""
+        for attempt in range(2):
+            engine = self._acquire()
+            try:
+                result = task(engine)
+            except chess.engine.EngineTerminatedError:
+                self._discard(engine)
+                if attempt:
+                    raise
+                continue
+            except BaseException:
+                self.idle.put(engine)
+                raise
+            self.idle.put(engine)
+            return result
+
+    def map(self, task, items):
+        """[task(engine, item) for item in items], spread over the pool, in order"""
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.size, len(items))) as threads:
+            return list(threads.map(lambda item: self.run(lambda engine: task(engine, item)), items))
+
+    def close(self):
+        with self.lock:
+            engines, self.engines = self.engines, []
+        for engine in engines:
+            try:
+                engine.quit()
+            except (chess.engine.EngineError, chess.engine.EngineTerminatedError, OSError):
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def analyse(engine, fen, settings):
+    """
+    Top `multipv` lines for a position, best first, each
+    {"move": uci, "score": centipawns for the side to move, "mate": N or None}.
+    """
+    board = chess.Board(fen)
+    if board.is_game_over():
+        return []
+    infos = engine.analyse(board, _limit(settings), multipv=settings.get('multipv') or 1)
+    lines = []
+    for info in infos:
+        if not info.get('pv'):
+            continue
+        score = info['score'].relative
+        lines.append({"move": info['pv'][0].uci(), "score": score.score(mate_score=MATE_SCORE), "mate": score.mate()})
+    return lines
+
+
+def analysis_key(fen, settings, engine):
+    """Cache key for one position under one engine and search limit"""
+    board = chess.Board(fen)
+    # Move counters don't change the analysis
+    position = ' '.join(board.fen().split()[:4])
+    limits = json.dumps({key: settings.get(key) for key in DEFAULT_LIMITS}, sort_keys=True)
+    return hashlib.sha256(f"{engine}\0{limits}\0{position}".encode()).hexdigest()
+
+
+def analyse_positions(fens, pool, cache=None, settings=None):
+    """
+    {fen: analyse() lines} for every FEN, from `cache` where possible and
+    on `pool` otherwise (engines only start for cache misses).
+    """
+    settings = dict(DEFAULT_LIMITS, **(settings or {}))
+    fens = list(dict.fromkeys(fens))
+
+    results = {}
+    keys = {}
+    for fen in fens:
+        keys[fen] = analysis_key(fen, settings, pool.id)
+        cached = cache.get(keys[fen]) if cache is not None else None
+        if cached is not None:
+            results[fen] = cached['lines']
+
+    misses = [fen for fen in fens if fen not in results]
+    if misses:
+        for fen, lines in zip(misses, pool.map(lambda engine, fen: analyse(engine, fen, settings), misses)):
+            results[fen] = lines
+            if cache is not None:
+                cache.put(keys[fen], {"lines": lines})
+    return results
+
+
+def open_analysis_cache(path=DEFAULT_ANALYSIS_CACHE):
+    """Per-position analysis cache (in memory only if path is None)"""
+    return ConversionCache(path)
@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+# tools/puzzle_reviewer/puzzle_bundle.py
+"""
+Packed Puzzle Bundle
+--------------------
+Packs every assets/data/puzzles/puzzle_set_*.json into one binary file,
+assets/data/puzzles/puzzles.bundle, that can return any puzzle by id
+without parsing a whole set, and regenerates index.json (puzzle id ->
+set file) alongside it.
+
+Layout (little-endian):
+
+  header          magic, version, counts and section offsets
+  string table    u32 offsets + UTF-8 blob; titles, hints, messages,
+                  comments and themes are stored once and shared
+  set table       file name, levelId, title, description, record range
+  id index        open-addressing hash table: FNV-1a 64 of the puzzle
+                  id -> record number (load factor <= 0.5)
+  record offsets  u32 per puzzle
+  records         per puzzle: string ids, 32-byte board (4 bits per
+                  square) + side/castling/en passant/clocks, moves as
+                  16-bit UCI codes, solution tree keyed by packed boards
+
+Anything the packed form can't reproduce exactly (unusual FENs, SAN
+moves, extra fields) falls back to strings, so reading a puzzle back
+always gives the same dict as the JSON.
+
+Usage:
+  python3 puzzle_bundle.py                 # rebuild puzzles.bundle + index.json
+  python3 puzzle_bundle.py get puzzle_0001 # print one puzzle from the bundle
+  python3 puzzle_bundle.py bench           # random-access timing vs JSON
+"""
+
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from pathlib import Path
+
+PUZZLES_DIR = Path(__file__).resolve().parent.parent.parent / 'assets' / 'data' / 'puzzles'
+BUNDLE_NAME = 'puzzles.bundle'
+
+MAGIC = b'PZBN'
+BUNDLE_VERSION = 1
+
+HEADER = struct.Struct('<4sHHIIIIIIII')
+SET_ENTRY = struct.Struct('<IIIIIII')
+BUCKET = struct.Struct('<QI')
+
+NO_STRING = 0xFFFFFFFF
+NO_MOVE = 0x7FFE      # tree leaf: puzzle solved
+RAW_MOVE = 0x7FFF     # followed by a u32 string id (non-UCI move)
+USER_MOVE = 0x8000    # solutionSequence flag
+
+PIECES = '.PNBRQK..pnbrqk'
+PIECE_CODES = {piece: code for code, piece in enumerate(PIECES) if piece != '.'}
+PROMOTIONS = 'nbrq'
+CASTLING = 'KQkq'
+
+# Record flags
+FEN_AS_STRING = 1
+USER_IS_BLACK = 2
+HAS_SEQUENCE = 4
+HAS_TREE = 8
+
+PUZZLE_FIELDS = (
+    'id', 'title', 'subtitle', 'fen', 'toMove', 'themes', 'difficulty', 'hints',
+    'successMessage', 'failureMessage', 'solutionMoves', 'solutionSequence', 'solutionTree',
+)
+SET_FIELDS = ('levelId', 'title', 'description', 'puzzles')
+
+
+def fnv1a(text):
+    """64-bit FNV-1a hash of a string's UTF-8 bytes"""
+    value = 0xcbf29ce484222325
+    for byte in text.encode('utf-8'):
+        value = ((value ^ byte) * 0x100000001b3) & 0xFFFFFFFFFFFFFFFF
+    return value
+
+
+# === Packing ===
+
+def pack_placement(placement):
+    """FEN piece placement -> 32 bytes (4 bits per square, a1 first)"""
+    squares = [0] * 64
+    square = 56
+    for char in placement:
+        if char == '/':
+            square -= 16
+        elif char.isdigit():
+            square += int(char)
+        else:
+            squares[square] = PIECE_CODES[char]
+            square += 1
+    return bytes(squares[i] | (squares[i + 1] << 4) for i in range(0, 64, 2))
+
+
+def unpack_placement(packed):
+    squares = []
+    for byte in packed:
+        squares.append(byte & 0x0F)
+        squares.append(byte >> 4)
+
+    ranks = []
+    for rank in range(7, -1, -1):
+        row, empty = [], 0
+        for code in squares[rank * 8:rank * 8 + 8]:
+            if code == 0:
+                empty += 1
+                continue
+            if empty:
+                row.append(str(empty))
+                empty = 0
+            row.append(PIECES[code])
+        if empty:
+            row.append(str(empty))
+        ranks.append(''.join(row))
+    return '/'.join(ranks)
+
+
+def _square(name):
+    return (ord(name[0]) - ord('a')) + 8 * (int(name[1]) - 1)
+
+
+def _square_name(square):
+    return chr(ord('a') + square % 8) + str(square // 8 + 1)
+
+
+def move_code(move):
+    """UCI move -> 15-bit code, or None if it isn't plain UCI"""
+    if len(move) not in (4, 5) or move[0] not in 'abcdefgh' or move[2] not in 'abcdefgh':
+        return None
+    if move[1] not in '12345678' or move[3] not in '12345678':
+        return None
+    promotion = 0
+    if len(move) == 5:
+        if move[4] not in PROMOTIONS:
+            return None
+        promotion = PROMOTIONS.index(move[4]) + 1
+    return _square(move[:2]) | (_square(move[2:4]) << 6) | (promotion << 12)
+
+
+def move_from_code(code):
+    promotion = (code >> 12) & 0x7
+    return _square_name(code & 0x3F) + _square_name((code >> 6) & 0x3F) + (PROMOTIONS[promotion - 1] if promotion else '')
+
+
+class _Writer:
+    """Bundle builder: shared string table plus packed records"""
+
+    def __init__(self):
+        self.strings = {}
+
+    def string(self, value):
+        if value is None:
+            return NO_STRING
+        if value not in self.strings:
+            self.strings[value] = len(self.strings)
+        return self.strings[value]
+
+    def move(self, out, move, flag=0):
+        code = move_code(move)
+        if code is None:
+            out += struct.pack('<HI', RAW_MOVE | flag, self.string(move))
+        else:
+            out += struct.pack('<H', code | flag)
+
+    def position(self, fen):
+        """Packed FEN (42 bytes), or None if it wouldn't round-trip"""
+        fields = fen.split(' ')
+        if len(fields) != 6:
+            return None
+        placement, side, castling, ep, halfmove, fullmove = fields
+        try:
+            state = (1 if side == 'w' else 0) | sum(2 << i for i, right in enumerate(CASTLING) if right in castling)
+            packed = pack_placement(placement) + struct.pack(
+                '<BBHH', state, 255 if ep == '-' else _square(ep), int(halfmove), int(fullmove))
+        except (KeyError, ValueError, IndexError, struct.error):
+            return None
+        return packed if unpack_position(packed) == fen else None
+
+    def record(self, puzzle):
+        extra = {key: value for key, value in puzzle.items() if key not in PUZZLE_FIELDS}
+        tree = puzzle.get('solutionTree')
+        tree_keys = None
+        if tree is not None:
+            tree_keys = [_tree_key(key) for key in tree]
+            if None in tree_keys:
+                extra['solutionTree'] = tree
+                tree = None
+
+        position = self.position(puzzle['fen'])
+        flags = (
+            (FEN_AS_STRING if position is None else 0)
+            | (USER_IS_BLACK if puzzle['toMove'] == 'black' else 0)
+            | (HAS_SEQUENCE if 'solutionSequence' in puzzle else 0)
+            | (HAS_TREE if tree is not None else 0)
+        )
+        if puzzle['toMove'] not in ('white', 'black'):
+            extra['toMove'] = puzzle['toMove']
+
+        out = bytearray(struct.pack(
+            '<IIIIIIBB',
+            self.string(puzzle['id']), self.string(puzzle['title']), self.string(puzzle['subtitle']),
+            self.string(puzzle['successMessage']), self.string(puzzle['failureMessage']),
+            self.string(json.dumps(extra, sort_keys=True)) if extra else NO_STRING,
+            flags, puzzle['difficulty'],
+        ))
+        out += struct.pack('<I', self.string(puzzle['fen'])) if position is None else position
+
+        for values in (puzzle['themes'], puzzle['hints']):
+            out += struct.pack(f'<H{len(values)}I', len(values), *(self.string(value) for value in values))
+
+        out += struct.pack('<H', len(puzzle['solutionMoves']))
+        for move in puzzle['solutionMoves']:
+            self.move(out, move)
+
+        if flags & HAS_SEQUENCE:
+            out += struct.pack('<H', len(puzzle['solutionSequence']))
+            for step in puzzle['solutionSequence']:
+                self.move(out, step['move'], USER_MOVE if step['isUserMove'] else 0)
+                out += struct.pack('<I', self.string(step.get('comment')))
+
+        if flags & HAS_TREE:
+            out += struct.pack('<H', len(tree))
+            for packed_key, reply in zip(tree_keys, tree.values()):
+                out += packed_key
+                if reply is None:
+                    out += struct.pack('<H', NO_MOVE)
+                else:
+                    self.move(out, reply)
+        return bytes(out)
+
+
+def _tree_key(key):
+    """'<placement> <side>' -> 33 bytes, or None if it wouldn't round-trip"""
+    fields = key.split(' ')
+    if len(fields) != 2 or fields[1] not in ('w', 'b'):
+        return None
+    try:
+        packed = pack_placement(fields[0]) + (b'\x01' if fields[1] == 'w' else b'\x00')
+    except (KeyError, IndexError):
+        return None
+    return packed if unpack_placement(packed[:32]) == fields[0] else None
+
+
+def unpack_position(packed):
+    state, ep, halfmove, fullmove = struct.unpack_from('<BBHH', packed, 32)
+    castling = ''.join(right for i, right in enumerate(CASTLING) if state & (2 << i)) or '-'
+    return ' '.join((
+        unpack_placement(packed[:32]),
+        'w' if state & 1 else 'b',
+        castling,
+        '-' if ep == 255 else _square_name(ep),
+        str(halfmove),
+        str(fullmove),
+    ))
+
+
+def write_bundle(puzzle_sets, path):
+    """
+    Write [(file name, puzzle set dict), ...] to a bundle file. Returns
+    {puzzle id: file name} for the ids it indexes (first set wins when
+    an id appears in several sets) and the list of repeated ids.
+    """
+    writer = _Writer()
+    records = []
+    sets = []
+    id_index = {}
+    repeated = []
+
+    for file_name, puzzle_set in puzzle_sets:
+        extra = {key: value for key, value in puzzle_set.items() if key not in SET_FIELDS}
+        sets.append((
+            writer.string(file_name), writer.string(puzzle_set.get('levelId')),
+            writer.string(puzzle_set.get('title')), writer.string(puzzle_set.get('description')),
+            writer.string(json.dumps(extra, sort_keys=True)) if extra else NO_STRING,
+            len(records), len(puzzle_set['puzzles']),
+        ))
+        for puzzle in puzzle_set['puzzles']:
+            if puzzle['id'] in id_index:
+                repeated.append((puzzle['id'], file_name))
+            else:
+                id_index[puzzle['id']] = (len(records), file_name)
+            records.append(writer.record(puzzle))
+
+    buckets = 1
+    while buckets < 2 * max(len(id_index), 1):
+        buckets *= 2
+    table = [(0, 0)] * buckets
+    for puzzle_id, (record, _) in id_index.items():
+        key = fnv1a(puzzle_id)
+        slot = key & (buckets - 1)
+        while table[slot][1]:
+            slot = (slot + 1) & (buckets - 1)
+        table[slot] = (key, record + 1)
+
+    encoded = [value.encode('utf-8') for value in writer.strings]
+    string_offsets = [0]
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    strings_off = HEADER.size
+    sets_off = strings_off + 4 * len(string_offsets) + string_offsets[-1]
+    index_off = sets_off + SET_ENTRY.size * len(sets)
+    offsets_off = index_off + BUCKET.size * buckets
+    record_offsets = []
+    position = offsets_off + 4 * len(records)
+    for record in records:
+        record_offsets.append(position)
+        position += len(record)
+
+    tmp_path = Path(str(path) + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(
+            MAGIC, BUNDLE_VERSION, 0, len(records), len(sets), len(encoded), buckets,
+            strings_off, sets_off, index_off, offsets_off,
+        ))
+        f.write(struct.pack(f'<{len(string_offsets)}I', *string_offsets))
+        f.write(b''.join(encoded))
+        for entry in sets:
+            f.write(SET_ENTRY.pack(*entry))
+        for key, record in table:
+            f.write(BUCKET.pack(key, record))
+        f.write(struct.pack(f'<{len(records)}I', *record_offsets))
+        f.write(b''.join(records))
+    os.replace(tmp_path, path)
+
+    return {puzzle_id: file_name for puzzle_id, (_, file_name) in id_index.items()}, repeated
+
+
+def rebuild(puzzles_dir=PUZZLES_DIR):
+    """
+    Rebuild puzzles.bundle and index.json from the puzzle sets in a
+    directory. Sets that can't be read are left out and returned as
+    [(file name, error), ...] after (bundle path, set count, index,
+    repeated ids).
+    """
+    puzzles_dir = Path(puzzles_dir)
+    puzzle_sets = []
+    unreadable = []
+    for path in sorted(puzzles_dir.glob('puzzle_set_*.json')):
+        try:
+            with open(path) as f:
+                puzzle_set = json.load(f)
+            if not isinstance(puzzle_set, dict) or not isinstance(puzzle_set.get('puzzles'), list):
+                raise ValueError("not a puzzle set (expected an object with a \"puzzles\" list)")
+        except (OSError, ValueError) as e:
+            unreadable.append((path.name, e))
+            continue
+        puzzle_sets.append((path.name, puzzle_set))
+
+    bundle_path = puzzles_dir / BUNDLE_NAME
+    index, repeated = write_bundle(puzzle_sets, bundle_path)
+
+    tmp_path = puzzles_dir / 'index.json.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, puzzles_dir / 'index.json')
+    return bundle_path, len(puzzle_sets), index, repeated, unreadable
+
+
+# === Reading ===
+
+class PuzzleBundle:
+    """Memory-mapped reader: get(puzzle_id) in a few microseconds"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.count, n_sets, n_strings, self.buckets,
+         strings_off, sets_off, self.index_off, self.offsets_off) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != BUNDLE_VERSION:
+            raise ValueError(f"{path} is not a version {BUNDLE_VERSION} puzzle bundle")
+
+        self.string_offsets = struct.unpack_from(f'<{n_strings + 1}I', self.data, strings_off)
+        self.string_base = strings_off + 4 * (n_strings + 1)
+        self._strings = [None] * n_strings
+        self.sets = [SET_ENTRY.unpack_from(self.data, sets_off + i * SET_ENTRY.size) for i in range(n_sets)]
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.data.close()
+
+    def string(self, index):
+        if index == NO_STRING:
+            return None
+        value = self._strings[index]
+        if value is None:
+            start = self.string_base + self.string_offsets[index]
+            end = self.string_base + self.string_offsets[index + 1]
+            value = self._strings[index] = self.data[start:end].decode('utf-8')
+        return value
+
+    def find(self, puzzle_id):
+        """Record number of a puzzle id, or None (one hash probe on average)"""
+        key = fnv1a(puzzle_id)
+        mask = self.buckets - 1
+        slot = key & mask
+        while True:
+            stored, record = BUCKET.unpack_from(self.data, self.index_off + slot * BUCKET.size)
+            if not record:
+                return None
+            if stored == key and self._record_id(record - 1) == puzzle_id:
+                return record - 1
+            slot = (slot + 1) & mask
+
+    def _record_offset(self, record):
+        return struct.unpack_from('<I', self.data, self.offsets_off + 4 * record)[0]
+
+    def _record_id(self, record):
+        return self.string(struct.unpack_from('<I', self.data, self._record_offset(record))[0])
+
+    def get(self, puzzle_id):
+        """Puzzle dict (same as in the JSON set), or None"""
+        record = self.find(puzzle_id)
+        return None if record is None else self.record(record)
+
+    def _move(self, offset):
+        code, = struct.unpack_from('<H', self.data, offset)
+        flag = code & USER_MOVE
+        code &= ~USER_MOVE
+        if code == RAW_MOVE:
+            return self.string(struct.unpack_from('<I', self.data, offset + 2)[0]), flag, offset + 6
+        if code == NO_MOVE:
+            return None, flag, offset + 2
+        return move_from_code(code), flag, offset + 2
+
+    def _strings_at(self, offset):
+        count, = struct.unpack_from('<H', self.data, offset)
+        ids = struct.unpack_from(f'<{count}I', self.data, offset + 2)
+        return [self.string(index) for index in ids], offset + 2 + 4 * count
+
+    def record(self, record):
+        """Decode record number `record`"""
+        data = self.data
+        offset = self._record_offset(record)
+        (id_, title, subtitle, success, failure, extra, flags, difficulty) = struct.unpack_from('<IIIIIIBB', data, offset)
+        offset += 26
+
+        if flags & FEN_AS_STRING:
+            fen = self.string(struct.unpack_from('<I', data, offset)[0])
+            offset += 4
+        else:
+            fen = unpack_position(data[offset:offset + 38])
+            offset += 38
+
+        themes, offset = self._strings_at(offset)
+        hints, offset = self._strings_at(offset)
+
+        count, = struct.unpack_from('<H', data, offset)
+        offset += 2
+        solution_moves = []
+        for _ in range(count):
+            move, _, offset = self._move(offset)
+            solution_moves.append(move)
+
+        puzzle = {
+            "id": self.string(id_),
+            "title": self.string(title),
+            "subtitle": self.string(subtitle),
+            "fen": fen,
+            "toMove": "black" if flags & USER_IS_BLACK else "white",
+            "themes": themes,
+            "difficulty": difficulty,
+            "hints": hints,
+            "successMessage": self.string(success),
+            "failureMessage": self.string(failure),
+            "solutionMoves": solution_moves,
+        }
+
+        if flags & HAS_SEQUENCE:
+            count, = struct.unpack_from('<H', data, offset)
+            offset += 2
+            sequence = []
+            for _ in range(count):
+                move, flag, offset = self._move(offset)
+                step = {"move": move, "isUserMove": bool(flag)}
+                comment = self.string(struct.unpack_from('<I', data, offset)[0])
+                offset += 4
+                if comment is not None:
+                    step["comment"] = comment
+                sequence.append(step)
+            puzzle["solutionSequence"] = sequence
+
+        if flags & HAS_TREE:
+            count, = struct.unpack_from('<H', data, offset)
+            offset += 2
+            tree = {}
+            for _ in range(count):
+                key = f"{unpack_placement(data[offset:offset + 32])} {'w' if data[offset + 32] else 'b'}"
+                reply, _, offset = self._move(offset + 33)
+                tree[key] = reply
+            puzzle["solutionTree"] = tree
+
+        if extra != NO_STRING:
+            puzzle.update(json.loads(self.string(extra)))
+        return puzzle
+
+    def puzzle_set(self, name):
+        """A whole set by file name or levelId, as in its JSON file"""
+        for file_name, level_id, title, description, extra, first, count in self.sets:
+            if name in (self.string(file_name), self.string(level_id)):
+                puzzle_set = {
+                    "levelId": self.string(level_id),
+                    "title": self.string(title),
+                    "description": self.string(description),
+                    "puzzles": [self.record(record) for record in range(first, first + count)],
+                }
+                if extra != NO_STRING:
+                    puzzle_set.update(json.loads(self.string(extra)))
+                return puzzle_set
+        return None
+
+
+# === CLI ===
+
+def benchmark(puzzles_dir, rounds=20_000):
+    bundle_path = Path(puzzles_dir) / BUNDLE_NAME
+    set_files = sorted(Path(puzzles_dir).glob('puzzle_set_*.json'))
+    json_size = sum(path.stat().st_size for path in set_files)
+    print(f"📦 {bundle_path.name}: {bundle_path.stat().st_size:,} bytes "
+          f"({bundle_path.stat().st_size / json_size:.0%} of {json_size:,} bytes of JSON)")
+
+    with open(Path(puzzles_dir) / 'index.json') as f:
+        index = json.load(f)
+    ids = list(index)
+    picks = [random.choice(ids) for _ in range(rounds)]
+
+    start = time.perf_counter()
+    bundle = PuzzleBundle(bundle_path)
+    open_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for puzzle_id in picks:
+        bundle.find(puzzle_id)
+    find_time = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for puzzle_id in picks:
+        bundle.get(puzzle_id)
+    get_time = (time.perf_counter() - start) / rounds
+
+    json_rounds = max(1, rounds // 100)
+    start = time.perf_counter()
+    for puzzle_id in picks[:json_rounds]:
+        with open(Path(puzzles_dir) / index[puzzle_id]) as f:
+            next(p for p in json.load(f)['puzzles'] if p['id'] == puzzle_id)
+    json_time = (time.perf_counter() - start) / json_rounds
+
+    print(f"   open bundle:        {open_time * 1e6:8.1f} µs")
+    print(f"   id -> record:       {find_time * 1e6:8.1f} µs")
+    print(f"   id -> puzzle dict:  {get_time * 1e6:8.1f} µs")
+    print(f"   JSON (parse set):   {json_time * 1e6:8.1f} µs")
+    bundle.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or read the packed puzzle bundle")
+    parser.add_argument('command', nargs='?', default='build', choices=('build', 'get', 'bench'))
+    parser.add_argument('puzzle_id', nargs='?', help="puzzle id for 'get'")
+    parser.add_argument('--puzzles-dir', default=str(PUZZLES_DIR), help="puzzle sets (default: assets/data/puzzles)")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        bundle_path, set_count, index, repeated, unreadable = rebuild(args.puzzles_dir)
+        print(f"✅ {bundle_path}: {len(index)} puzzles from {set_count} sets (index.json regenerated)")
+        for puzzle_id, file_name in repeated:
+            print(f"⚠️  {puzzle_id} in {file_name} repeats an id from {index[puzzle_id]}; "
+                  f"id lookups return the {index[puzzle_id]} puzzle")
+        for file_name, error in unreadable:
+            print(f"❌ {file_name} left out of the bundle, it can't be read: {error}")
+        if unreadable:
+            sys.exit(1)
+    elif args.command == 'get':
+        bundle = PuzzleBundle(Path(args.puzzles_dir) / BUNDLE_NAME)
+        puzzle = bundle.get(args.puzzle_id or '')
+        if puzzle is None:
+            print(f"❌ Puzzle not found: {args.puzzle_id}")
+            sys.exit(1)
+        print(json.dumps(puzzle, indent=2))
+    else:
+        benchmark(args.puzzles_dir)
+
+
+if __name__ == '__main__':
+    main()
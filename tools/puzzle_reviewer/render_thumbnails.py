@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+# tools/puzzle_reviewer/render_thumbnails.py
+"""
+Board Thumbnails
+----------------
+Pre-renders a board thumbnail for every puzzle in a puzzle set or
+candidate file and packs them into PNG sprite sheets, so the review UI
+and level-select screens can show a board as an image lookup instead of
+drawing it from the FEN:
+
+  <output>/
+    sheet_000.png    up to columns x rows thumbnails, left to right
+    index.json       {"size", "columns", "sheets": [...],
+                      "thumbnails": {puzzle id: [sheet, x, y]}}
+
+Each thumbnail shows the position the user solves (after the opponent's
+first move), from the user's side, in the app's board colours. Puzzles
+with the same position share one cell.
+
+The 12 piece SVGs in assets/images/pieces are rasterized once per square
+size with cairosvg (optional: only needed until the atlas is cached) into
+an atlas of 26 ready-made square tiles: each piece on a light and a dark
+square, plus the two empty squares. A board is then 64 tile lookups, done
+for a whole batch of boards at once with numpy. Replaying the first move,
+rendering and encoding the sheets run on a process pool. Rendered boards
+are cached (compressed) in .thumbnail_cache/ by FEN and size, so
+re-running on a grown file only draws the new positions.
+
+Usage:
+  python3 render_thumbnails.py INPUT [-o OUTPUT_DIR] [--size 128]
+  python3 render_thumbnails.py ../../assets/data/puzzles/puzzle_set_0001.json --workers 4
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import chess
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'puzzle_importer'))
+from json_stream import READ_ERRORS, iter_puzzles  # noqa: E402
+from validate_candidates import puzzle_moves  # noqa: E402
+
+try:
+    import cairosvg
+except (ImportError, OSError):  # optional dependency (OSError: libcairo missing)
+    cairosvg = None
+
+PIECES_DIR = Path(__file__).resolve().parent.parent.parent / 'assets' / 'images' / 'pieces'
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / '.thumbnail_cache'
+
+# Bump whenever the rendering changes, to invalidate cached atlases and boards
+THUMBNAIL_VERSION = 1
+
+THUMBNAILS = {
+    "size": 128,               # pixels per side, a multiple of 8
+    "columns": 16,
+    "rows": 16,                # per sheet
+    "light": (0xF0, 0xD9, 0xB5),
+    "dark": (0xB5, 0x88, 0x63),
+}
+
+PIECE_FILES = {
+    symbol: f"piece_{'white' if symbol.isupper() else 'black'}_{chess.piece_name(chess.Piece.from_symbol(symbol).piece_type)}.svg"
+    for symbol in 'PNBRQKpnbrqk'
+}
+# Atlas tiles: 0/1 empty light/dark square, then each piece on light/dark
+TILE_INDEX = {symbol: 2 + 2 * i for i, symbol in enumerate(PIECE_FILES)}
+
+# Boards per pool task
+RENDER_BATCH = 256
+
+
+# === PNG ===
+
+def encode_png(pixels):
+    """PNG bytes for an (height, width, 3 or 4) uint8 array"""
+    height, width, channels = pixels.shape
+    colour_type = {3: 2, 4: 6}[channels]
+    rows = np.zeros((height, 1 + width * channels), dtype=np.uint8)  # filter byte 0 per row
+    rows[:, 1:] = pixels.reshape(height, -1)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, colour_type, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows.tobytes(), 6))
+            + chunk(b'IEND', b''))
+
+
+def decode_png(data):
+    """(height, width, 4) uint8 RGBA array from an 8-bit RGBA, non-interlaced PNG (what cairosvg writes)"""
+    pos, idat, header = 8, [], None
+    while pos < len(data):
+        length, kind = struct.unpack('>I4s', data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        if kind == b'IHDR':
+            header = struct.unpack('>IIBBBBB', body)
+        elif kind == b'IDAT':
+            idat.append(body)
+        pos += 12 + length
+    if header is None or header[2:4] != (8, 6) or header[6] != 0:
+        raise ValueError("expected an 8-bit RGBA, non-interlaced PNG")
+
+    width, height = header[:2]
+    stride = width * 4
+    raw = zlib.decompress(b''.join(idat))
+    pixels = np.zeros((height, stride), dtype=np.int32)
+    previous = np.zeros(stride, dtype=np.int32)
+    for y in range(height):
+        kind = raw[y * (stride + 1)]
+        line = np.frombuffer(raw, dtype=np.uint8, count=stride, offset=y * (stride + 1) + 1).astype(np.int32)
+        if kind == 2:
+            line = (line + previous) & 0xFF
+        elif kind in (1, 3, 4):
+            # Sub, Average and Paeth depend on the reconstructed pixel to the left
+            line = line.tolist()
+            for x in range(stride):
+                left = line[x - 4] if x >= 4 else 0
+                up = int(previous[x])
+                if kind == 1:
+                    line[x] = (line[x] + left) & 0xFF
+                elif kind == 3:
+                    line[x] = (line[x] + (left + up) // 2) & 0xFF
+                else:
+                    corner = int(previous[x - 4]) if x >= 4 else 0
+                    p = left + up - corner
+                    pa, pb, pc = abs(p - left), abs(p - up), abs(p - corner)
+                    line[x] = (line[x] + (left if pa <= pb and pa <= pc else up if pb <= pc else corner)) & 0xFF
+            line = np.array(line, dtype=np.int32)
+        pixels[y] = previous = line
+    return pixels.astype(np.uint8).reshape(height, width, 4)
+
+
+# === Atlas ===
+
+def atlas_signature(square, settings=THUMBNAILS, pieces_dir=PIECES_DIR):
+    """Hash of everything a tile depends on: piece SVGs, square size, colours"""
+    digest = hashlib.sha256(f"{THUMBNAIL_VERSION}:{square}:{settings['light']}:{settings['dark']}".encode())
+    for file_name in PIECE_FILES.values():
+        digest.update((Path(pieces_dir) / file_name).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def rasterize_pieces(square, pieces_dir=PIECES_DIR):
+    """{symbol: (square, square, 4) RGBA sprite}; raises RuntimeError without cairosvg"""
+    if cairosvg is None:
+        raise RuntimeError("cairosvg is needed to rasterize the piece SVGs once per size: pip install cairosvg")
+    return {
+        symbol: decode_png(cairosvg.svg2png(url=str(Path(pieces_dir) / file_name),
+                                            output_width=square, output_height=square))
+        for symbol, file_name in PIECE_FILES.items()
+    }
+
+
+def build_atlas(sprites, settings=THUMBNAILS):
+    """(26, square, square, 3) uint8 tiles (see TILE_INDEX) from RGBA sprites"""
+    square = next(iter(sprites.values())).shape[0]
+    backgrounds = [np.full((square, square, 3), settings[shade], dtype=np.float32) for shade in ('light', 'dark')]
+    tiles = [background.copy() for background in backgrounds]
+    for symbol in PIECE_FILES:
+        sprite = sprites[symbol].astype(np.float32)
+        alpha = sprite[..., 3:] / 255
+        for background in backgrounds:
+            tiles.append(sprite[..., :3] * alpha + background * (1 - alpha))
+    return np.rint(np.stack(tiles)).astype(np.uint8)
+
+
+def load_atlas(square, cache_dir=DEFAULT_CACHE_DIR, settings=THUMBNAILS):
+    """(atlas, signature), rasterizing and caching the atlas on first use"""
+    signature = atlas_signature(square, settings)
+    atlas_file = Path(cache_dir) / f"atlas_{square}_{signature}.npy"
+    if atlas_file.exists():
+        return np.load(atlas_file), signature
+
+    sprites = rasterize_pieces(square)
+    atlas = build_atlas(sprites, settings)
+    atlas_file.parent.mkdir(parents=True, exist_ok=True)
+    np.save(atlas_file, atlas)
+    # The raw sprites as one strip, for a look at what the boards are made of
+    strip = np.concatenate([sprites[symbol] for symbol in PIECE_FILES], axis=1)
+    (Path(cache_dir) / f"pieces_{square}.png").write_bytes(encode_png(strip))
+    return atlas, signature
+
+
+# === Boards ===
+
+def puzzle_source(puzzle):
+    """What a puzzle's thumbnail depends on: (fen, first move, toMove)"""
+    moves = puzzle_moves(puzzle)
+    return puzzle['fen'], moves[0] if moves else '', puzzle.get('toMove') or ''
+
+
+def display_position(fen, first_move='', to_move=''):
+    """Board key (placement + ' w'/' b' for the side at the bottom) of the position the user solves"""
+    board = chess.Board(fen)
+    if first_move:
+        try:
+            move = chess.Move.from_uci(first_move)
+        except ValueError:
+            move = None
+        if move is not None and board.is_legal(move):
+            board.push(move)
+    user = to_move if to_move in ('white', 'black') else 'white' if board.turn == chess.WHITE else 'black'
+    return f"{board.board_fen()} {user[0]}"
+
+
+def tile_grid(key):
+    """(8, 8) atlas indices for a board key, top-left first as displayed"""
+    placement, bottom = key.split()
+    grid = np.zeros((8, 8), dtype=np.uint8)
+    for row, rank in enumerate(placement.split('/')):
+        col = 0
+        for char in rank:
+            if char.isdigit():
+                col += int(char)
+            else:
+                grid[row, col] = TILE_INDEX[char]
+                col += 1
+    if bottom == 'b':
+        grid = grid[::-1, ::-1]
+    # a8 (top-left from White's side, and h1 from Black's) is a light square
+    return grid + (np.indices((8, 8)).sum(axis=0) % 2).astype(np.uint8)
+
+
+def render_boards(keys, atlas):
+    """(len(keys), size, size, 3) thumbnails for board keys"""
+    square = atlas.shape[1]
+    grids = np.stack([tile_grid(key) for key in keys])
+    tiles = atlas[grids]  # (n, 8, 8, square, square, 3)
+    return tiles.transpose(0, 1, 3, 2, 4, 5).reshape(len(keys), 8 * square, 8 * square, 3)
+
+
+_worker_atlas = None
+
+
+def _init_worker(atlas):
+    global _worker_atlas
+    _worker_atlas = atlas
+
+
+def _render_batch(sources):
+    # -> [(board key, zlib-compressed board) or (None, error message)] per source
+    keys = []
+    for source in sources:
+        try:
+            keys.append(display_position(*source))
+        except ValueError as e:
+            keys.append(e)
+    valid = [key for key in keys if isinstance(key, str)]
+    boards = iter(render_boards(valid, _worker_atlas)) if valid else iter(())
+    return [(key, zlib.compress(next(boards).tobytes(), 6)) if isinstance(key, str) else (None, str(key))
+            for key in keys]
+
+
+# === Cache ===
+
+class ThumbnailCache:
+    """
+    Rendered boards of one size, zlib-compressed and appended to
+    <cache>/boards_<size>.bin; boards_<size>.json maps board keys to
+    [offset, length] and puzzle sources (FEN, first move, toMove) to board
+    keys. The cache starts over when the atlas signature changes.
+    """
+
+    def __init__(self, cache_dir, size, signature):
+        self.size = size
+        self.blob_file = Path(cache_dir) / f"boards_{size}.bin"
+        self.index_file = Path(cache_dir) / f"boards_{size}.json"
+        self.signature = signature
+        self.boards = {}
+        self.positions = {}
+        try:
+            with open(self.index_file) as f:
+                data = json.load(f)
+            if data.get('signature') == signature and self.blob_file.exists():
+                self.boards = data['boards']
+                self.positions = data['positions']
+        except (OSError, ValueError, KeyError):
+            self.boards, self.positions = {}, {}
+        self.end = max((offset + length for offset, length in self.boards.values()), default=0)
+        if self.blob_file.exists():
+            # Drop boards an interrupted run appended after the last save
+            with open(self.blob_file, 'r+b') as blob:
+                blob.truncate(self.end)
+
+    @staticmethod
+    def source_key(source):
+        return '|'.join(source)
+
+    def get(self, source):
+        """Board key of a puzzle source if cached, else None"""
+        return self.positions.get(self.source_key(source))
+
+    def put(self, source, key, data):
+        """Record a rendered board (compressed bytes) for a source"""
+        self.positions[self.source_key(source)] = key
+        if key in self.boards:
+            return
+        self.blob_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.blob_file, 'ab') as blob:
+            blob.write(data)
+        self.boards[key] = [self.end, len(data)]
+        self.end += len(data)
+
+    def save(self):
+        tmp_file = self.index_file.with_name(self.index_file.name + '.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump({"signature": self.signature, "size": self.size,
+                       "boards": self.boards, "positions": self.positions}, f)
+        os.replace(tmp_file, self.index_file)
+
+
+# === Sheets ===
+
+def _write_sheet(task):
+    blob_file, size, spans, columns, path = task
+    rows = -(-len(spans) // columns)
+    sheet = np.zeros((rows * size, min(columns, len(spans)) * size, 3), dtype=np.uint8)
+    with open(blob_file, 'rb') as blob:
+        for cell, (offset, length) in enumerate(spans):
+            blob.seek(offset)
+            board = np.frombuffer(zlib.decompress(blob.read(length)), dtype=np.uint8).reshape(size, size, 3)
+            y, x = divmod(cell, columns)
+            sheet[y * size:(y + 1) * size, x * size:(x + 1) * size] = board
+    Path(path).write_bytes(encode_png(sheet))
+    return path
+
+
+def render_thumbnails(input_file, output_dir, settings=THUMBNAILS, workers=None, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Render and pack thumbnails for every puzzle in `input_file`. Returns
+    (index dict, boards rendered, puzzles from cache, puzzles skipped as
+    (id, error)).
+    """
+    size = settings['size']
+    if size % 8:
+        raise ValueError(f"thumbnail size must be a multiple of 8, got {size}")
+    atlas, signature = load_atlas(size // 8, cache_dir, settings)
+    cache = ThumbnailCache(cache_dir, size, signature)
+
+    keys = {}        # puzzle id -> board key
+    pending = {}     # puzzle id -> source still to render
+    skipped = []
+    for number, puzzle in enumerate(iter_puzzles(input_file), 1):
+        puzzle_id = str(puzzle.get('id', number))
+        try:
+            source = puzzle_source(puzzle)
+            key = cache.get(source)
+        except (KeyError, TypeError) as e:
+            skipped.append((puzzle_id, f"no usable {e}"))
+            continue
+        if key is not None:
+            keys[puzzle_id] = key
+        else:
+            pending[puzzle_id] = source
+    cached = len(keys)
+
+    sources = list(dict.fromkeys(pending.values()))
+    batches = [sources[i:i + RENDER_BATCH] for i in range(0, len(sources), RENDER_BATCH)]
+    rendered = 0
+    per_sheet = settings['columns'] * settings['rows']
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                             initializer=_init_worker, initargs=(atlas,)) as pool:
+        failed = {}
+        for batch, results in zip(batches, pool.map(_render_batch, batches)):
+            for source, (key, data) in zip(batch, results):
+                if key is None:
+                    failed[source] = data
+                else:
+                    rendered += key not in cache.boards
+                    cache.put(source, key, data)
+        cache.save()
+
+        for puzzle_id, source in pending.items():
+            if source in failed:
+                skipped.append((puzzle_id, failed[source]))
+            else:
+                keys[puzzle_id] = cache.get(source)
+
+        # One cell per distinct board, in first-seen order
+        cells = {key: cell for cell, key in enumerate(dict.fromkeys(keys.values()))}
+        ordered = list(cells)
+        sheets = [
+            (str(cache.blob_file), size, [cache.boards[key] for key in ordered[i:i + per_sheet]],
+             settings['columns'], str(output_dir / f"sheet_{i // per_sheet:03d}.png"))
+            for i in range(0, len(ordered), per_sheet)
+        ]
+        sheet_names = [Path(path).name for path in pool.map(_write_sheet, sheets)]
+
+    for stale in output_dir.glob('sheet_*.png'):
+        if stale.name not in sheet_names:
+            stale.unlink()
+
+    thumbnails = {}
+    for puzzle_id, key in keys.items():
+        sheet, cell = divmod(cells[key], per_sheet)
+        y, x = divmod(cell, settings['columns'])
+        thumbnails[puzzle_id] = [sheet, x * size, y * size]
+    index = {
+        "version": THUMBNAIL_VERSION,
+        "size": size,
+        "columns": settings['columns'],
+        "sheets": sheet_names,
+        "thumbnails": thumbnails,
+    }
+    with open(output_dir / 'index.json', 'w') as f:
+        json.dump(index, f, indent=2)
+    return index, rendered, cached, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render board thumbnails for a puzzle set or candidate file into sprite sheets")
+    parser.add_argument('input_file', metavar='INPUT', help="puzzle set, candidates or review export (JSON/NDJSON)")
+    parser.add_argument('-o', '--output', help="output directory (default: INPUT with _thumbnails suffix)")
+    parser.add_argument('--size', type=int, default=THUMBNAILS['size'], help=f"thumbnail size in pixels, a multiple of 8 (default: {THUMBNAILS['size']})")
+    parser.add_argument('--columns', type=int, default=THUMBNAILS['columns'], help=f"thumbnails per sheet row (default: {THUMBNAILS['columns']})")
+    parser.add_argument('--rows', type=int, default=THUMBNAILS['rows'], help=f"rows per sheet (default: {THUMBNAILS['rows']})")
+    parser.add_argument('--workers', type=int, help="processes (default: all CPUs)")
+    args = parser.parse_args()
+
+    input_file = Path(args.input_file)
+    if not input_file.exists():
+        print(f"❌ File not found: {input_file}")
+        sys.exit(1)
+    output_dir = Path(args.output) if args.output else input_file.with_name(f"{input_file.stem}_thumbnails")
+    settings = dict(THUMBNAILS, size=args.size, columns=args.columns, rows=args.rows)
+
+    print(f"🖼️  Rendering {args.size}px thumbnails for {input_file}...")
+    start = time.perf_counter()
+    try:
+        index, rendered, cached, skipped = render_thumbnails(input_file, output_dir, settings, args.workers)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except READ_ERRORS as e:
+        print(f"❌ Could not read {input_file}: {e}")
+        sys.exit(1)
+
+    for puzzle_id, e in skipped:
+        print(f"⚠️  Puzzle {puzzle_id} skipped: {e}")
+    print(f"\n✅ {len(index['thumbnails'])} thumbnails ({rendered} boards rendered, {cached} puzzles from cache) "
+          f"in {len(index['sheets'])} sheets written to {output_dir} ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
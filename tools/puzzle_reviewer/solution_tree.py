@@ -0,0 +1,180 @@
+# tools/puzzle_reviewer/solution_tree.py
+"""
+Solution Trees
+--------------
+Precomputes every winning user move of a puzzle so the app can check an
+answer with a single table lookup instead of comparing against one line.
+
+The tree is a table keyed by the position reached after a correct user
+move (the first two FEN fields: placement and side to move):
+
+  "solutionTree": {
+    "<position after a correct user move>": "<opponent reply (UCI)>" | null
+  }
+
+null means the puzzle is solved. Keys are positions, so lines that
+transpose into each other share entries. The mainline is always in the
+tree; for checkmate puzzles every other move that still forces mate in
+no more moves than the mainline has left is accepted too (searched when
+at most MAX_MATE_DEPTH user moves remain - longer mates accept the
+mainline until then). Alternatives are answered with the reply that
+holds out longest.
+
+Trees are built with python-chess, sharded across a process pool.
+"""
+
+import chess
+
+MAX_MATE_DEPTH = 2
+
+SHARDS_PER_WORKER = 4
+
+
+def position_key(board):
+    """Table key: FEN placement and side to move"""
+    return f"{board.board_fen()} {'w' if board.turn == chess.WHITE else 'b'}"
+
+
+def _mate_after(board, move, depth):
+    """
+    Number of moves (counting `move`) in which the side to move forces
+    mate by playing `move`, if it is at most `depth`; otherwise None.
+    """
+    if depth == 1 and not board.gives_check(move):
+        return None
+
+    board.push(move)
+    try:
+        if board.is_checkmate():
+            return 1
+        if depth == 1:
+            return None
+
+        replies = list(board.legal_moves)
+        if not replies:
+            return None  # stalemate
+
+        slowest = 0
+        for reply in replies:
+            board.push(reply)
+            moves_to_mate = _mate_depth(board, depth - 1)
+            board.pop()
+            if moves_to_mate is None:
+                return None
+            slowest = max(slowest, moves_to_mate)
+        return 1 + slowest
+    finally:
+        board.pop()
+
+
+def _mate_depth(board, depth):
+    """Fewest moves (at most `depth`) in which the side to move forces mate, or None"""
+    fastest = None
+    for move in list(board.legal_moves):
+        moves_to_mate = _mate_after(board, move, depth)
+        if moves_to_mate is not None and (fastest is None or moves_to_mate < fastest):
+            fastest = moves_to_mate
+            if fastest == 1:
+                break
+    return fastest
+
+
+def _longest_defence(board, depth):
+    """Opponent reply that delays mate the longest (ties: first in UCI order)"""
+    best, best_depth = None, 0
+    for reply in sorted(board.legal_moves, key=lambda move: move.uci()):
+        board.push(reply)
+        moves_to_mate = _mate_depth(board, depth)
+        board.pop()
+        if moves_to_mate is not None and moves_to_mate > best_depth:
+            best, best_depth = reply, moves_to_mate
+    return best
+
+
+def _add_mating_moves(board, depth, tree):
+    """Add every user move that forces mate within `depth` moves, with its line"""
+    for move in list(board.legal_moves):
+        moves_to_mate = _mate_after(board, move, depth)
+        if moves_to_mate is None:
+            continue
+
+        board.push(move)
+        key = position_key(board)
+        if moves_to_mate == 1:
+            tree[key] = None
+        elif key not in tree:
+            reply = _longest_defence(board, depth - 1)
+            tree[key] = reply.uci()
+            board.push(reply)
+            _add_mating_moves(board, depth - 1, tree)
+            board.pop()
+        board.pop()
+
+
+def build_solution_tree(fen, moves):
+    """
+    Solution tree (see module docstring) for a puzzle given as a FEN and
+    its UCI line, opponent's move first. Returns {} if the line doesn't
+    replay legally.
+    """
+    try:
+        board = chess.Board(fen)
+        line = [chess.Move.from_uci(move) for move in moves]
+    except ValueError:
+        return {}
+    if len(line) < 2:
+        return {}
+
+    # Custom puzzles sometimes have the wrong side to move in the FEN
+    piece = board.piece_at(line[0].from_square)
+    if piece is not None:
+        board.turn = piece.color
+
+    replay = board.copy(stack=False)
+    for move in line:
+        if not replay.is_legal(move):
+            return {}
+        replay.push(move)
+    is_mate = replay.is_checkmate()
+
+    tree = {}
+    board.push(line[0])
+    for ply in range(1, len(line), 2):
+        # The mainline and its reply go in first, so searched alternatives
+        # that transpose into it reuse the mainline's continuation
+        reply = line[ply + 1] if ply + 1 < len(line) else None
+        board.push(line[ply])
+        tree[position_key(board)] = reply.uci() if reply else None
+        board.pop()
+
+        user_moves_left = (len(line) - ply + 1) // 2
+        if is_mate and user_moves_left <= MAX_MATE_DEPTH:
+            _add_mating_moves(board, user_moves_left, tree)
+
+        board.push(line[ply])
+        if reply:
+            board.push(reply)
+
+    return tree
+
+
+def _tree_shard(lines):
+    return [build_solution_tree(fen, moves) for fen, moves in lines]
+
+
+def build_trees(lines, pool=None, workers=1):
+    """
+    Solution trees for (fen, moves) pairs, in input order. Pass a
+    concurrent.futures.ProcessPoolExecutor (and its worker count) to
+    build them in parallel.
+    """
+    if pool is None or workers == 1:
+        return _tree_shard(lines)
+
+    shard_size = max(1, -(-len(lines) // (workers * SHARDS_PER_WORKER)))
+    shards = [lines[i:i + shard_size] for i in range(0, len(lines), shard_size)]
+
+    trees = []
+    for shard_trees in pool.map(_tree_shard, shards):
+        trees.extend(shard_trees)
+    return trees
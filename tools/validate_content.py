@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+# tools/validate_content.py
+"""
+Content Validator
+-----------------
+Checks everything under assets/data as one graph:
+
+  campaigns/index.json -> campaigns -> levels -> puzzle sets -> puzzles
+                                           \\-> bots, check/checkmate positions
+
+  schema      every file against assets/schemas (levels, bots) or the
+              shapes the app's fromJson() expects (campaigns, puzzle sets,
+              positions)
+  chess       every puzzle FEN and solution replayed with python-chess
+              (legal moves, mates for mate themes, toMove, alternative
+              solutionMoves), bot starting FENs, and check/checkmate
+              position answers
+  references  campaign levelIds, level campaignId/puzzles/botIds/games,
+              the puzzle set each level loads, puzzles/index.json, and
+              puzzle ids repeated across sets
+
+Per-file results (issues plus the ids each file defines and references)
+are cached by content hash in tools/.content_cache.json, so a re-run only
+re-checks edited files; the reference checks run on the cached facts and
+take milliseconds.
+
+Usage:
+  python3 validate_content.py
+  python3 validate_content.py --report report.json
+  python3 validate_content.py --no-cache           # re-check every file
+
+Exits with status 1 if there are errors.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import chess
+
+TOOLS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(TOOLS_DIR / 'puzzle_importer'))
+from validate_candidates import validate_puzzles  # noqa: E402
+
+REPO_DIR = TOOLS_DIR.parent
+CONTENT_DIR = REPO_DIR / 'assets' / 'data'
+SCHEMAS_DIR = REPO_DIR / 'assets' / 'schemas'
+DEFAULT_CACHE_FILE = TOOLS_DIR / '.content_cache.json'
+
+# Bump whenever a per-file check changes, so cached results are redone
+VALIDATOR_VERSION = 3
+
+# Answers the check/checkmate game has buttons for
+POSITION_ANSWERS = ["check", "checkmate"]
+
+STRING = {"type": "string"}
+STRINGS = {"type": "array", "items": STRING}
+
+# The fields the app's fromJson() requires, for content without a schema file
+BOSS_SCHEMA = {
+    "type": "object",
+    "required": ["id", "name", "elo", "style"],
+    "properties": {"id": STRING, "name": STRING, "elo": {"type": "integer"}, "style": STRING},
+}
+CAMPAIGN_SCHEMA = {
+    "type": "object",
+    "required": ["id", "title", "levelIds", "boss"],
+    "properties": {"id": STRING, "title": STRING, "description": STRING, "levelIds": STRINGS, "boss": BOSS_SCHEMA},
+}
+CAMPAIGN_INDEX_SCHEMA = {
+    "type": "object",
+    "additionalProperties": {"type": "object", "required": ["id"], "properties": {"id": STRING}},
+}
+PUZZLE_SCHEMA = {
+    "type": "object",
+    "required": ["id", "title", "subtitle", "fen", "toMove", "themes", "difficulty", "solutionMoves",
+                 "hints", "successMessage", "failureMessage"],
+    "properties": {
+        "id": STRING, "title": STRING, "subtitle": STRING, "fen": STRING,
+        "toMove": {"type": "string", "enum": ["white", "black"]},
+        "themes": STRINGS, "difficulty": {"type": "integer"},
+        "solutionMoves": {"type": "array", "items": STRING, "minItems": 1},
+        "hints": STRINGS, "successMessage": STRING, "failureMessage": STRING,
+        "solutionSequence": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["move", "isUserMove"],
+                "properties": {"move": STRING, "isUserMove": {"type": "boolean"},
+                               "comment": {"type": ["string", "null"]}},
+            },
+        },
+        "solutionTree": {"type": "object", "additionalProperties": {"type": ["string", "null"]}},
+    },
+}
+PUZZLE_SET_SCHEMA = {
+    "type": "object",
+    "required": ["levelId", "title", "description", "puzzles"],
+    "properties": {"levelId": STRING, "title": STRING, "description": STRING,
+                   "puzzles": {"type": "array", "items": PUZZLE_SCHEMA}},
+}
+PUZZLE_INDEX_SCHEMA = {"type": "object", "additionalProperties": STRING}
+POSITIONS_SCHEMA = {
+    "type": "object",
+    "required": ["positions"],
+    "properties": {"positions": {"type": "array", "items": {
+        "type": "object",
+        "required": ["id", "fen", "answer"],
+        "properties": {"id": {"type": "integer"}, "fen": STRING,
+                       "answer": {"type": "string", "enum": POSITION_ANSWERS}, "description": STRING},
+    }}},
+}
+
+# kind -> schema file in assets/schemas or inline schema
+SCHEMAS = {
+    'campaign_index': CAMPAIGN_INDEX_SCHEMA,
+    'campaign': CAMPAIGN_SCHEMA,
+    'level': 'level.schemas.json',
+    'puzzle_index': PUZZLE_INDEX_SCHEMA,
+    'puzzle_set': PUZZLE_SET_SCHEMA,
+    'bots': 'bots.schema.json',
+    'positions': POSITIONS_SCHEMA,
+}
+
+JSON_TYPES = {
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, list),
+    'string': lambda value: isinstance(value, str),
+    'integer': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'number': lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    'boolean': lambda value: isinstance(value, bool),
+    'null': lambda value: value is None,
+}
+
+
+# === Schema ===
+
+class SchemaChecker:
+    """
+    The JSON Schema keywords assets/schemas uses: type, enum, required,
+    properties, patternProperties, additionalProperties, items, minItems,
+    minimum, maximum, pattern and file $refs.
+    """
+
+    def __init__(self, schemas_dir=SCHEMAS_DIR):
+        self.schemas_dir = Path(schemas_dir)
+        self.files = {}
+
+    def load(self, name):
+        if name not in self.files:
+            with open(self.schemas_dir / name) as f:
+                self.files[name] = json.load(f)
+        return self.files[name]
+
+    def errors(self, value, schema, path='$'):
+        """Messages for every way `value` breaks `schema` (a dict or schema file name)"""
+        if isinstance(schema, str):
+            schema = self.load(schema)
+        if '$ref' in schema:
+            yield from self.errors(value, schema['$ref'], path)
+            return
+
+        types = schema.get('type')
+        if types is not None:
+            types = [types] if isinstance(types, str) else types
+            if not any(JSON_TYPES[name](value) for name in types):
+                yield f"{path}: expected {' or '.join(types)}, got {type(value).__name__}"
+                return
+
+        if 'enum' in schema and value not in schema['enum']:
+            yield f"{path}: {value!r} is not one of {', '.join(map(str, schema['enum']))}"
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if 'minimum' in schema and value < schema['minimum']:
+                yield f"{path}: {value} is below the minimum {schema['minimum']}"
+            if 'maximum' in schema and value > schema['maximum']:
+                yield f"{path}: {value} is above the maximum {schema['maximum']}"
+        if isinstance(value, str) and 'pattern' in schema and not re.search(schema['pattern'], value):
+            yield f"{path}: {value!r} doesn't match {schema['pattern']}"
+
+        if isinstance(value, list):
+            if len(value) < schema.get('minItems', 0):
+                yield f"{path}: needs at least {schema['minItems']} items"
+            if 'items' in schema:
+                for i, item in enumerate(value):
+                    yield from self.errors(item, schema['items'], f"{path}[{i}]")
+
+        if isinstance(value, dict):
+            for key in schema.get('required', []):
+                if key not in value:
+                    yield f"{path}: missing required field '{key}'"
+            properties = schema.get('properties', {})
+            patterns = schema.get('patternProperties', {})
+            additional = schema.get('additionalProperties', True)
+            for key, item in value.items():
+                matched = False
+                if key in properties:
+                    matched = True
+                    yield from self.errors(item, properties[key], f"{path}.{key}")
+                for pattern, item_schema in patterns.items():
+                    if re.search(pattern, key):
+                        matched = True
+                        yield from self.errors(item, item_schema, f"{path}.{key}")
+                if not matched:
+                    if additional is False:
+                        yield f"{path}: unexpected field '{key}'"
+                    elif isinstance(additional, dict):
+                        yield from self.errors(item, additional, f"{path}.{key}")
+
+
+# === Per-file checks ===
+
+def file_kind(relative_path):
+    """What a file under assets/data holds, or None for files we don't check"""
+    parts = Path(relative_path).parts
+    if len(parts) != 2 or not parts[1].endswith('.json'):
+        return None
+    folder, name = parts
+    if folder == 'campaigns':
+        return 'campaign_index' if name == 'index.json' else 'campaign'
+    if folder == 'levels':
+        return 'level'
+    if folder == 'puzzles':
+        return 'puzzle_index' if name == 'index.json' else 'puzzle_set'
+    if folder == 'bots' and name == 'bots.json':
+        return 'bots'
+    if folder == 'games' and name == 'check_checkmate_positions.json':
+        return 'positions'
+    return None
+
+
+def _issue(severity, code, message):
+    return {"severity": severity, "code": code, "message": message}
+
+
+def check_puzzles(puzzles, workers=None):
+    """Chess issues for a puzzle set's puzzles (replayed on a process pool)"""
+    issues = []
+    replayable = [puzzle for puzzle in puzzles if isinstance(puzzle, dict) and isinstance(puzzle.get('fen'), str)]
+    for result in validate_puzzles(replayable, workers):
+        for error in result['errors']:
+            details = ', '.join(f"{key}={value}" for key, value in error.items() if key != 'code')
+            issues.append(_issue('error', error['code'], f"puzzle {result['id']}: {error['code']}"
+                                 + (f" ({details})" if details else "")))
+
+    for puzzle in replayable:
+        sequence = puzzle.get('solutionSequence') or []
+        if not isinstance(sequence, list) or not sequence or not all(isinstance(step, dict) for step in sequence):
+            continue
+        try:
+            board = chess.Board(puzzle['fen'])
+            board.push_uci(sequence[0]['move'])
+        except (ValueError, KeyError, TypeError):
+            continue  # reported by validate_puzzles
+
+        user_colour = 'white' if board.turn == chess.WHITE else 'black'
+        if puzzle.get('toMove') != user_colour:
+            issues.append(_issue('error', 'wrong_to_move',
+                                 f"puzzle {puzzle['id']}: toMove is {puzzle.get('toMove')}, the user plays {user_colour}"))
+
+        flags = [step.get('isUserMove') for step in sequence]
+        if flags != [i % 2 == 1 for i in range(len(sequence))]:
+            issues.append(_issue('error', 'user_move_order',
+                                 f"puzzle {puzzle['id']}: isUserMove should alternate, opponent first"))
+
+        for move in puzzle.get('solutionMoves') or []:
+            try:
+                legal = board.is_legal(chess.Move.from_uci(move))
+            except (ValueError, TypeError):
+                legal = False
+            if not legal:
+                issues.append(_issue('error', 'illegal_solution_move',
+                                     f"puzzle {puzzle['id']}: solutionMove {move} is illegal after {sequence[0]['move']}"))
+    return issues
+
+
+def _fen_problem(fen):
+    """None if `fen` is a legal position, else why not"""
+    try:
+        board = chess.Board(fen)
+    except ValueError as e:
+        return str(e)
+    status = board.status()
+    if status != chess.STATUS_VALID:
+        return f"illegal position ({status!r})"
+    return None
+
+
+def check_file(kind, data, checker, workers=None):
+    """(issues, facts) for one parsed file; facts are the ids it defines and references"""
+    issues = [_issue('error', 'schema', message) for message in checker.errors(data, SCHEMAS[kind])]
+    if not isinstance(data, dict):
+        return issues, {}
+
+    if kind == 'campaign_index':
+        facts = {"campaigns": {key: value.get('id') for key, value in data.items() if isinstance(value, dict)}}
+
+    elif kind == 'campaign':
+        facts = {"id": data.get('id'), "levelIds": _strings(data.get('levelIds'))}
+
+    elif kind == 'level':
+        play = data.get('play') if isinstance(data.get('play'), dict) else {}
+        games = [game for game in play.get('games') or [] if isinstance(game, dict)]
+        facts = {
+            "id": data.get('id'),
+            "campaignId": data.get('campaignId'),
+            "puzzles": _strings(data.get('puzzles')),
+            "botIds": _strings(play.get('botIds')) + [game['botId'] for game in games if isinstance(game.get('botId'), str)],
+            "positionIds": [position for game in games for position in game.get('positionIds') or []],
+        }
+
+    elif kind == 'puzzle_index':
+        facts = {"entries": {key: value for key, value in data.items() if isinstance(value, str)}}
+
+    elif kind == 'puzzle_set':
+        puzzles = [puzzle for puzzle in data.get('puzzles') or [] if isinstance(puzzle, dict)]
+        ids = [puzzle.get('id') for puzzle in puzzles]
+        for puzzle_id in sorted({i for i in ids if ids.count(i) > 1}, key=str):
+            issues.append(_issue('error', 'duplicate_puzzle', f"puzzle id {puzzle_id} appears more than once"))
+        issues.extend(check_puzzles(puzzles, workers))
+        facts = {"levelId": data.get('levelId'), "puzzleIds": [i for i in ids if isinstance(i, str)]}
+
+    elif kind == 'bots':
+        bots = {key: value for key, value in data.items() if isinstance(value, dict)}
+        for key, bot in bots.items():
+            if bot.get('id') != key:
+                issues.append(_issue('error', 'bot_id_mismatch', f"{key}: id is {bot.get('id')!r}"))
+            if isinstance(bot.get('startingFen'), str):
+                problem = _fen_problem(bot['startingFen'])
+                if problem:
+                    issues.append(_issue('error', 'invalid_fen', f"{key}: startingFen {problem}"))
+        facts = {"ids": sorted(bots)}
+
+    elif kind == 'positions':
+        positions = [position for position in data.get('positions') or [] if isinstance(position, dict)]
+        ids = [position.get('id') for position in positions]
+        for position_id in sorted({i for i in ids if ids.count(i) > 1}, key=str):
+            issues.append(_issue('error', 'duplicate_position', f"position id {position_id} appears more than once"))
+        for position in positions:
+            if not isinstance(position.get('fen'), str):
+                continue
+            problem = _fen_problem(position['fen'])
+            if problem:
+                issues.append(_issue('error', 'invalid_fen', f"position {position.get('id')}: {problem}"))
+                continue
+            board = chess.Board(position['fen'])
+            actual = ('checkmate' if board.is_checkmate() else 'check' if board.is_check()
+                      else 'stalemate' if board.is_stalemate() else 'neither')
+            if position.get('answer') != actual:
+                issues.append(_issue('error', 'wrong_answer',
+                                     f"position {position.get('id')}: answer is {position.get('answer')}, "
+                                     f"the position is {actual}"))
+            elif actual not in POSITION_ANSWERS:
+                issues.append(_issue('error', 'unanswerable_position',
+                                     f"position {position.get('id')}: the position is {actual}, "
+                                     f"the game only offers {' and '.join(POSITION_ANSWERS)}"))
+        facts = {"ids": [i for i in ids if isinstance(i, int)]}
+
+    return issues, facts
+
+
+def _strings(value):
+    return [item for item in value if isinstance(item, str)] if isinstance(value, list) else []
+
+
+# === Cache ===
+
+def schema_digest(schemas_dir=SCHEMAS_DIR):
+    """Hash of the validator version and every schema file"""
+    digest = hashlib.sha256(str(VALIDATOR_VERSION).encode())
+    for path in sorted(Path(schemas_dir).glob('*.json')):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def load_cache(path):
+    if path is None or not Path(path).exists():
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        # A corrupt cache is just an empty cache
+        return {}
+
+
+def save_cache(path, cache):
+    tmp_path = Path(path).with_name(Path(path).name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def scan_files(content_dir, checker, cache, schemas_key, workers=None):
+    """
+    {relative path: {kind, issues, facts}} for every known file, reusing
+    cached results whose content hash (and schemas) still match.
+    Returns (files, checked paths).
+    """
+    files = {}
+    checked = []
+    for path in sorted(Path(content_dir).rglob('*.json')):
+        relative = path.relative_to(content_dir).as_posix()
+        kind = file_kind(relative)
+        if kind is None:
+            continue
+
+        stat = path.stat()
+        cached = cache.get(relative)
+        if cached and cached.get('schemas') == schemas_key and \
+                cached.get('size') == stat.st_size and cached.get('mtime_ns') == stat.st_mtime_ns:
+            # Unchanged since last run: skip even the hashing
+            files[relative] = cached
+            continue
+
+        raw = path.read_bytes()
+        content_hash = hashlib.sha256(raw).hexdigest()
+        if cached and cached.get('schemas') == schemas_key and cached.get('hash') == content_hash:
+            entry = cached
+        else:
+            try:
+                data = json.loads(raw)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                issues, facts = [_issue('error', 'invalid_json', str(e))], {}
+            else:
+                issues, facts = check_file(kind, data, checker, workers)
+            entry = {"kind": kind, "hash": content_hash, "schemas": schemas_key, "issues": issues, "facts": facts}
+            checked.append(relative)
+
+        entry = dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        files[relative] = entry
+        cache[relative] = entry
+
+    for relative in list(cache):
+        if relative not in files:
+            del cache[relative]
+    return files, checked
+
+
+# === References ===
+
+def check_references(files):
+    """{relative path: [issues]} for broken links between files"""
+    issues = {}
+
+    def report(relative, severity, code, message):
+        issues.setdefault(relative, []).append(_issue(severity, code, message))
+
+    def of_kind(kind):
+        return {relative: entry['facts'] for relative, entry in files.items() if entry['kind'] == kind}
+
+    # Files that failed to parse define nothing (their own issue says why)
+    campaigns = {facts['id']: relative for relative, facts in of_kind('campaign').items() if facts.get('id')}
+    levels = {facts['id']: (relative, facts) for relative, facts in of_kind('level').items() if facts.get('id')}
+    puzzle_sets = of_kind('puzzle_set')
+    set_names = {Path(relative).stem: relative for relative in puzzle_sets}
+    bots = {bot for facts in of_kind('bots').values() for bot in facts.get('ids', [])}
+    positions = {position for facts in of_kind('positions').values() for position in facts.get('ids', [])}
+
+    puzzle_files = {}
+    for relative, facts in puzzle_sets.items():
+        for puzzle_id in facts.get('puzzleIds', []):
+            if puzzle_id in puzzle_files:
+                report(relative, 'warning', 'repeated_puzzle',
+                       f"puzzle {puzzle_id} is also in {puzzle_files[puzzle_id]} (the first one wins)")
+            else:
+                puzzle_files[puzzle_id] = relative
+
+    # Campaign index -> campaign files -> levels
+    for relative, facts in of_kind('campaign_index').items():
+        for key, campaign_id in facts.get('campaigns', {}).items():
+            if key != campaign_id:
+                report(relative, 'error', 'campaign_id_mismatch', f"{key}: id is {campaign_id!r}")
+            if key not in campaigns:
+                report(relative, 'error', 'missing_campaign', f"{key} has no campaign file")
+        for campaign_id, campaign_file in campaigns.items():
+            if campaign_id not in facts.get('campaigns', {}):
+                report(campaign_file, 'warning', 'unlisted_campaign', f"{campaign_id} is not in {relative}")
+
+    level_campaigns = {}
+    for campaign_id, relative in campaigns.items():
+        for level_id in files[relative]['facts'].get('levelIds', []):
+            level_campaigns.setdefault(level_id, []).append(campaign_id)
+            if level_id not in levels:
+                report(relative, 'error', 'missing_level', f"level {level_id} doesn't exist")
+
+    # Levels -> campaign, puzzle set, puzzles, bots, positions
+    for level_id, (relative, facts) in levels.items():
+        listed_in = level_campaigns.get(level_id, [])
+        if facts.get('campaignId') and facts['campaignId'] not in campaigns:
+            report(relative, 'error', 'missing_campaign', f"campaignId {facts['campaignId']} doesn't exist")
+        elif facts.get('campaignId') and facts['campaignId'] not in listed_in:
+            report(relative, 'error', 'campaign_mismatch',
+                   f"campaignId is {facts['campaignId']} but that campaign's levelIds don't include {level_id}")
+        if not listed_in:
+            report(relative, 'warning', 'orphan_level', f"{level_id} is in no campaign")
+
+        # The app loads puzzle_set_<number>.json for a level
+        set_name = f"puzzle_set_{str(level_id).split('_')[-1].zfill(4)}"
+        if set_name not in set_names:
+            report(relative, 'error', 'missing_puzzle_set', f"no {set_name}.json for {level_id}")
+
+        for reference in facts.get('puzzles', []):
+            if reference.startswith('puzzle_set_'):
+                if reference not in set_names:
+                    report(relative, 'error', 'missing_puzzle_set', f"puzzles lists {reference}, which doesn't exist")
+            elif reference not in puzzle_files:
+                report(relative, 'error', 'missing_puzzle', f"puzzle {reference} isn't in any puzzle set")
+
+        for bot_id in dict.fromkeys(facts.get('botIds', [])):
+            if bot_id not in bots:
+                report(relative, 'error', 'missing_bot', f"bot {bot_id} isn't in bots.json")
+
+        missing = [position for position in facts.get('positionIds', []) if position not in positions]
+        if missing:
+            report(relative, 'error', 'missing_position',
+                   f"check/checkmate positions {', '.join(map(str, missing))} don't exist")
+
+    # Puzzle sets -> levels
+    for relative, facts in puzzle_sets.items():
+        if not facts.get('levelId'):
+            continue
+        level_id = f"level_{str(facts.get('levelId')).zfill(4)}"
+        if level_id not in levels:
+            report(relative, 'warning', 'orphan_puzzle_set', f"levelId {facts.get('levelId')} has no level file")
+
+    # puzzles/index.json -> puzzle sets
+    for relative, facts in of_kind('puzzle_index').items():
+        entries = facts.get('entries', {})
+        for puzzle_id, set_file in entries.items():
+            if puzzle_id not in puzzle_files:
+                report(relative, 'error', 'stale_index', f"{puzzle_id} -> {set_file}, but no set has that puzzle")
+            elif Path(puzzle_files[puzzle_id]).name != set_file:
+                report(relative, 'error', 'stale_index',
+                       f"{puzzle_id} -> {set_file}, but it is in {Path(puzzle_files[puzzle_id]).name}")
+        unindexed = [puzzle_id for puzzle_id in puzzle_files if puzzle_id not in entries]
+        if unindexed:
+            report(relative, 'error', 'stale_index', f"{len(unindexed)} puzzles missing (e.g. {unindexed[0]}); "
+                   "rebuild it with 'python3 puzzle_bundle.py build'")
+
+    return issues
+
+
+def validate_content(content_dir=CONTENT_DIR, schemas_dir=SCHEMAS_DIR, cache_file=DEFAULT_CACHE_FILE, workers=None):
+    """
+    Validate the whole content tree. Returns (issues, stats): issues maps
+    relative path -> [{severity, code, message}], stats has files/checked.
+    """
+    checker = SchemaChecker(schemas_dir)
+    cache = load_cache(cache_file)
+    files, checked = scan_files(content_dir, checker, cache, schema_digest(schemas_dir), workers)
+    if cache_file is not None and (checked or len(cache) != len(files) or not Path(cache_file).exists()):
+        save_cache(cache_file, cache)
+
+    issues = {relative: list(entry['issues']) for relative, entry in files.items() if entry['issues']}
+    for relative, found in check_references(files).items():
+        issues.setdefault(relative, []).extend(found)
+    return issues, {"files": len(files), "checked": len(checked)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate campaigns, levels, puzzles and bots in assets/data")
+    parser.add_argument('--content-dir', default=str(CONTENT_DIR), help="content root (default: assets/data)")
+    parser.add_argument('--schemas-dir', default=str(SCHEMAS_DIR), help="schema folder (default: assets/schemas)")
+    parser.add_argument('--no-cache', action='store_true', help="re-check every file and don't write the cache")
+    parser.add_argument('--report', help="write every issue as JSON to this file")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for puzzle replay")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    issues, stats = validate_content(
+        Path(args.content_dir), Path(args.schemas_dir), None if args.no_cache else DEFAULT_CACHE_FILE, args.workers)
+    elapsed = time.perf_counter() - start
+
+    errors = sum(1 for found in issues.values() for issue in found if issue['severity'] == 'error')
+    warnings = sum(1 for found in issues.values() for issue in found if issue['severity'] == 'warning')
+    for relative in sorted(issues):
+        print(f"\n📄 {relative}")
+        for issue in issues[relative]:
+            icon = "❌" if issue['severity'] == 'error' else "⚠️ "
+            print(f"   {icon} {issue['message']}")
+
+    print(f"\n🔎 {stats['files']} files ({stats['checked']} re-checked, "
+          f"{stats['files'] - stats['checked']} cached) in {elapsed * 1000:.0f} ms")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({"errors": errors, "warnings": warnings, "files": issues}, f, indent=2)
+        print(f"📄 Report written to {args.report}")
+
+    if errors:
+        print(f"❌ {errors} errors, {warnings} warnings")
+        sys.exit(1)
+    print(f"✅ Content is valid ({warnings} warnings)")
+
+
+if __name__ == '__main__':
+    main()